@@ -1,31 +1,153 @@
-from flask import Flask, jsonify, request
+import json
+import sys
+import threading
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+import click
+from flask import Blueprint, Flask, Response, current_app, jsonify, request
 from flask_cors import CORS
-from dotenv import load_dotenv
-import os
-from data.api_client import FootballDataAPI
 
-load_dotenv()
+# Also importable as backend.app, e.g. by `flask --app app` next to backend/__init__.py
+sys.path.append(str(Path(__file__).resolve().parent))
+from utils.metrics import instrument
 
-app = Flask(__name__)
-CORS(app)
+api = Blueprint('api', __name__)
 
-football_api = FootballDataAPI()
 
-@app.route('/')
+class Services:
+    """API client, prediction model and match database, each built on first use
+
+    Nothing heavy is imported until a request needs it, so a cold process
+    answers /api/teams without loading numpy, SQLAlchemy or the model files.
+    """
+    def __init__(self, config):
+        self.config = config
+        self.built = {}
+        self.lock = threading.RLock()
+
+    def _get(self, name, build):
+        service = self.built.get(name)
+        if service is None:
+            with self.lock:
+                service = self.built.get(name)
+                if service is None:
+                    service = self.built[name] = build()
+        return service
+
+    @property
+    def football_api(self):
+        def build():
+            from data.api_client import FootballDataAPI
+            return FootballDataAPI()
+        return self._get('football_api', build)
+
+    @property
+    def model_server(self):
+        # Prediction model and form cache live in memory, reloaded in the background when the files change
+        def build():
+            from models.model_server import DEFAULT_MODEL_FILE, ModelServer
+            return ModelServer(
+                model_file=self.config['PREDICTION_MODEL_PATH'] or DEFAULT_MODEL_FILE,
+                poll_interval=self.config['MODEL_RELOAD_INTERVAL']
+            ).start()
+        return self._get('model_server', build)
+
+    @property
+    def match_db(self):
+        # Pooled connections shared by the request threads
+        def build():
+            from data.database import MatchDatabase
+            return MatchDatabase(self.config['DATABASE_URL'], self.config['DATABASE_POOL_SIZE'],
+                                 self.config['DATABASE_MAX_OVERFLOW'])
+        return self._get('match_db', build)
+
+    def warm_up(self):
+        """Build everything now, e.g. in a server's master process before forking"""
+        self.football_api, self.model_server, self.match_db
+        return self
+
+    def after_fork(self):
+        """Make services built before a fork safe to use in the child
+
+        The model snapshot's arrays stay shared copy-on-write. Threads do
+        not survive a fork, so the model watcher is restarted; pooled
+        database connections and the API client's sockets and cache file
+        belong to the parent, so the pool is emptied without closing them
+        and the client is rebuilt on first use.
+        """
+        with self.lock:
+            self.built.pop('football_api', None)
+            if 'match_db' in self.built:
+                self.built['match_db'].engine.dispose(close=False)
+            if 'model_server' in self.built:
+                self.built['model_server'].start()
+
+
+def services():
+    return current_app.extensions['services']
+
+
+def create_app(config=None):
+    """Flask app with the API routes; clients and models are built lazily
+
+    Args:
+        config (object, optional): settings object, Config from config.py
+            (read from the environment / .env) by default
+    """
+    if config is None:
+        from config import Config
+        config = Config
+
+    app = Flask(__name__)
+    app.config.from_object(config)
+    CORS(app)
+    app.extensions['services'] = Services(app.config)
+    app.register_blueprint(api)
+    app.cli.add_command(startup_report_command)
+    # Route latency histograms and GET /metrics
+    instrument(app)
+    if app.config['PROFILE_SLOW_MS'] is not None:
+        from utils.profiler import profile_slow_requests
+        profile_slow_requests(app, app.config['PROFILE_OUTPUT'], app.config['PROFILE_SLOW_MS'],
+                              app.config['PROFILE_INTERVAL_MS'])
+
+    if app.config['PRELOAD_SERVICES']:
+        app.extensions['services'].warm_up()
+    return app
+
+
+def describe_prediction(result, home_short, away_short):
+    """Most likely outcome as text"""
+    outcomes = {
+        f"{home_short} win": result['home_win_prob'],
+        "Draw": result['draw_prob'],
+        f"{away_short} win": result['away_win_prob'],
+    }
+    outcome = max(outcomes, key=outcomes.get)
+    return f"{outcome} ({outcomes[outcome]}%)"
+
+
+def ndjson_lines(results, chunk_size=500):
+    """Results as newline-delimited JSON, a chunk of lines at a time"""
+    for start in range(0, len(results), chunk_size):
+        yield ''.join(json.dumps(result) + '\n' for result in results[start:start + chunk_size])
+
+@api.route('/')
 def hello():
     return jsonify({"message": "Tactical Matchup Predictor API"})
 
-@app.route('/api/teams', methods=['GET'])
+@api.route('/api/teams', methods=['GET'])
 def get_teams():
     """Team List"""
-    team_data = football_api.get_teams()
+    team_list = services().football_api.team_registry().all_teams()
 
-    if 'error' in team_data:
+    if team_list is None:
         return jsonify({"Error": "Unable to Fetch Data"}), 500
     
     teams = []
     # important team data
-    for team in team_data['teams']:
+    for team in team_list:
         teams.append({
             'id': team['id'],
             'name': team['name'],
@@ -36,7 +158,7 @@ def get_teams():
 
     return jsonify({"teams": teams})
 
-@app.route('/api/predict', methods=['POST'])
+@api.route('/api/predict', methods=['POST'])
 def predict_match():
     """prediction algorithm
 
@@ -52,30 +174,67 @@ def predict_match():
     home_short = home_data['shortName']
     away_short = away_data['shortName']
     
-    base_home_prob = 46.1 # calculated from my data calc in data folder
-    base_away_prob = 32.4
-    base_draw_prob = 21.6
-
-    home_recent_form = football_api.get_recent_form(home_team, limit=5)
-    away_recent_form = football_api.get_recent_form(away_team, limit=5)
-
-    home_season_form = football_api.get_season_form(home_team)
-    away_season_form = football_api.get_season_form(away_team)
+    # Answered from the in-memory model only, no file or network access
+    result = services().model_server.predict(home_team, away_team)
 
-
-    # basic logic, not in depth yet
     prediction = {
         "home_team": home_team,
         "away_team": away_team,
-        "prediction": f"Loading analysis for {home_short} vs {away_short} . . .",
-        "home_win_prob": 46.1,
-        "draw_prob": 21.6,
-        "away_win_prob": 32.4,
-        "confidence": "Medium"
+        "prediction": describe_prediction(result, home_short, away_short),
+        **result
     }
 
     return jsonify(prediction)
 
+@api.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """Predictions for many fixtures, streamed back as NDJSON
+
+    Takes a list of fixtures, or {"fixtures": [...]}, each shaped like an
+    /api/predict body or a football-data.org match. All fixtures go
+    through the model in one pass; one JSON line per fixture, in order.
+    """
+    data = request.get_json(silent=True)
+    fixtures = data.get('fixtures') if isinstance(data, dict) else data
+    if not isinstance(fixtures, list):
+        return jsonify({"Error": "Expected a list of fixtures"}), 400
+
+    try:
+        results = services().model_server.predict_fixtures(fixtures)
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"Error": "Every fixture needs a homeTeam and awayTeam"}), 400
+
+    return Response(ndjson_lines(results), mimetype='application/x-ndjson')
+
+@api.route('/api/teams/<path:team>/matches', methods=['GET'])
+def team_matches(team):
+    """A team's last finished matches before ?before= (now by default), newest first"""
+    before = request.args.get('before') or datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    limit = min(max(request.args.get('limit', 5, type=int), 1), 50)
+
+    from data.database import team_points
+
+    recent = services().match_db.last_n_before(team, before, limit)
+    points = team_points(recent, team)
+    return jsonify({
+        "team": team,
+        "before": before,
+        "matches": [asdict(match) for match in recent],
+        "points_per_game": points / len(recent) if recent else None
+    })
+
+
+@click.command('startup-report')
+@click.option('--path', default='/api/teams', help="request timed after startup")
+@click.option('--top', default=15, help="packages to list")
+def startup_report_command(path, top):
+    """Import-time breakdown of a cold start up to the first response"""
+    from utils.startup_report import print_report
+    print_report(path, top)
+
+
+app = create_app()
 
 if __name__ == '__main__':
+    # Development server only; serve production traffic with gunicorn -c gunicorn.conf.py app:app
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,44 @@
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BACKEND_DIR = Path(__file__).resolve().parent
+SQLITE_PREFIX = 'sqlite:///'
+
+
+def database_url(url=None):
+    """DATABASE_URL with a relative SQLite path resolved against backend/
+
+    Scripts run from backend/data or backend/models then share the app's
+    database file instead of creating their own.
+    """
+    url = url or os.getenv('DATABASE_URL', 'sqlite:///tactical_predictor.db')
+    if url.startswith(SQLITE_PREFIX):
+        path = url[len(SQLITE_PREFIX):]
+        if path and path != ':memory:' and not os.path.isabs(path):
+            return SQLITE_PREFIX + str(BACKEND_DIR / path)
+    return url
+
+
+class Config:
+    """Settings read from the environment / .env"""
+    SECRET_KEY = os.getenv('SECRET_KEY', 'dev')
+    FLASK_ENV = os.getenv('FLASK_ENV', 'production')
+
+    DATABASE_URL = database_url()
+    # Connections kept open for Flask worker threads, plus extra ones under load
+    DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', 5))
+    DATABASE_MAX_OVERFLOW = int(os.getenv('DATABASE_MAX_OVERFLOW', 10))
+
+    # Prediction model served by /api/predict, the model server's default when unset
+    PREDICTION_MODEL_PATH = os.getenv('PREDICTION_MODEL_PATH')
+    MODEL_RELOAD_INTERVAL = float(os.getenv('MODEL_RELOAD_INTERVAL', 5.0))
+    # Build the API client, model and database in create_app() instead of on first use
+    PRELOAD_SERVICES = os.getenv('PRELOAD_SERVICES', '0').lower() in ('1', 'true', 'yes')
+
+    # Sampled stacks of requests slower than PROFILE_SLOW_MS go to PROFILE_OUTPUT; unset leaves profiling off
+    PROFILE_SLOW_MS = float(os.getenv('PROFILE_SLOW_MS')) if os.getenv('PROFILE_SLOW_MS') else None
+    PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 5.0))
+    PROFILE_OUTPUT = os.getenv('PROFILE_OUTPUT', str(BACKEND_DIR / 'slow_requests.folded'))
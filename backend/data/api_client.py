@@ -1,30 +1,456 @@
 import requests
 import json
 import os 
+import random
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.metrics import REGISTRY, Counter, Gauge
 
 load_dotenv()
 
+# Seconds a cached response stays fresh, per endpoint
+DEFAULT_TTLS = {
+    'competitions': 24 * 60 * 60,
+    'teams': 24 * 60 * 60,
+    'matches': 5 * 60,
+}
+
+API_CALLS = REGISTRY.histogram(
+    'football_api_call_duration_seconds', "FootballDataAPI method calls, cache hits included", ['method'])
+UPSTREAM_REQUESTS = REGISTRY.histogram(
+    'football_api_upstream_request_duration_seconds', "HTTP requests sent to football-data.org, each retry counted",
+    ['endpoint', 'status'])
+
+
+def timed_call(method):
+    """Count and time calls to a FootballDataAPI method under its name"""
+    return API_CALLS.time(method=method.__name__)(method)
+
+
+class CacheEntry:
+    """Cached response body with its validators and expiry time"""
+    __slots__ = ('data', 'etag', 'last_modified', 'expires_at')
+
+    def __init__(self, data, etag=None, last_modified=None, expires_at=0.0):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    def is_fresh(self):
+        return time.time() < self.expires_at
+
+
+class SQLiteCacheStore:
+    """On-disk store for cached API responses so they survive restarts
+    """
+    def __init__(self, path='api_cache.db'):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, data TEXT, etag TEXT, last_modified TEXT, expires_at REAL)'
+        )
+        self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT data, etag, last_modified, expires_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        data, etag, last_modified, expires_at = row
+        return CacheEntry(json.loads(data), etag, last_modified, expires_at)
+
+    def set(self, key, entry):
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                (key, json.dumps(entry.data), entry.etag, entry.last_modified, entry.expires_at)
+            )
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute('DELETE FROM responses')
+            self.conn.commit()
+
+
+class ResponseCache:
+    """In-memory LRU of API responses with per-endpoint TTLs
+
+    An optional store (e.g. SQLiteCacheStore) backs the LRU so entries
+    survive restarts. Expired entries are kept for conditional revalidation
+    and as a fallback when the API is unavailable.
+    """
+    def __init__(self, max_entries=512, ttls=None, store=None):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.store = store
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.metrics = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stale_served': 0,
+                        'disk_hits': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(url, params=None):
+        if not params:
+            return url
+        query = '&'.join(f"{k}={params[k]}" for k in sorted(params))
+        return f"{url}?{query}"
+
+    def get(self, key):
+        """Return the entry for key (fresh or stale) or None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+        if self.store is not None:
+            entry = self.store.get(key)
+            if entry is not None:
+                self.record('disk_hits')
+                self._remember(key, entry)
+            return entry
+        return None
+
+    def set(self, endpoint, key, data, etag=None, last_modified=None):
+        expires_at = time.time() + self.ttls.get(endpoint, 0)
+        entry = CacheEntry(data, etag, last_modified, expires_at)
+        self._remember(key, entry)
+        if self.store is not None:
+            self.store.set(key, entry)
+        return entry
+
+    def refresh(self, endpoint, key, entry):
+        """Extend a stale entry after the API confirmed it is unchanged"""
+        entry.expires_at = time.time() + self.ttls.get(endpoint, 0)
+        if self.store is not None:
+            self.store.set(key, entry)
+
+    def _remember(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.metrics['evictions'] += 1
+
+    def record(self, metric):
+        with self.lock:
+            self.metrics[metric] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self):
+        """Hit/miss counters and hit ratio"""
+        with self.lock:
+            stats = dict(self.metrics)
+            stats['entries'] = len(self.entries)
+        lookups = stats['hits'] + stats['misses'] + stats['revalidated']
+        stats['hit_ratio'] = (stats['hits'] + stats['revalidated']) / lookups if lookups else 0.0
+        return stats
+
+    def collect(self):
+        """stats() as metrics for the /metrics endpoint"""
+        stats = self.stats()
+        events = Counter('football_api_cache_events_total', "Response cache lookups and evictions", ['event'])
+        for event in self.metrics:
+            events.inc(stats[event], event=event)
+        hit_ratio = Gauge('football_api_cache_hit_ratio', "Lookups answered from the cache, revalidations included")
+        hit_ratio.set(stats['hit_ratio'])
+        entries = Gauge('football_api_cache_entries', "Responses held in memory")
+        entries.set(stats['entries'])
+        return [events, hit_ratio, entries]
+
+
+class TeamRegistry:
+    """Team list for one competition, indexed by name, shortName, TLA and id
+
+    Loaded once and kept in memory. Lookups after the refresh interval
+    trigger a background reload so requests never wait on the API.
+    """
+    def __init__(self, api, competition_id=2021, refresh_interval=24 * 60 * 60):
+        self.api = api
+        self.competition_id = competition_id
+        self.refresh_interval = refresh_interval
+        self.teams = []
+        self.by_id = {}
+        self.by_name = {}
+        self.by_short_name = {}
+        self.by_tla = {}
+        self.loaded_at = 0.0
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.refreshing = False
+
+    def load(self):
+        """Fetch the team list and rebuild the indexes, True on success"""
+        team_data = self.api.get_teams(self.competition_id)
+        if 'error' in team_data:
+            return False
+
+        teams = team_data['teams']
+        by_id, by_name, by_short_name, by_tla = {}, {}, {}, {}
+        for team in teams:
+            by_id[team['id']] = team
+            by_name[team['name'].casefold()] = team
+            if team.get('shortName'):
+                by_short_name[team['shortName'].casefold()] = team
+            if team.get('tla'):
+                by_tla[team['tla'].casefold()] = team
+
+        # Swap whole indexes so readers never see a half-built registry
+        with self.lock:
+            self.teams = teams
+            self.by_id, self.by_name = by_id, by_name
+            self.by_short_name, self.by_tla = by_short_name, by_tla
+            self.loaded_at = time.time()
+        return True
+
+    def ensure_loaded(self):
+        """Load on first use, refresh in the background once stale"""
+        if not self.loaded_at:
+            with self.load_lock:
+                return bool(self.loaded_at) or self.load()
+        if time.time() - self.loaded_at >= self.refresh_interval:
+            self._refresh_in_background()
+        return True
+
+    def _refresh_in_background(self):
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+
+        def refresh():
+            try:
+                self.load()
+            finally:
+                with self.lock:
+                    self.refreshing = False
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def find(self, team):
+        """Team dict by id, name, shortName or TLA (case-insensitive)"""
+        if not self.ensure_loaded():
+            return None
+        if isinstance(team, int):
+            return self.by_id.get(team)
+        key = str(team).casefold()
+        return self.by_name.get(key) or self.by_short_name.get(key) or self.by_tla.get(key)
+
+    def get_id(self, team):
+        found = self.find(team)
+        return found['id'] if found else None
+
+    def all_teams(self):
+        """Every team in the competition, None if the list can't be loaded"""
+        if not self.ensure_loaded():
+            return None
+        return self.teams
+
+
+class RateLimiter:
+    """Token bucket matching football-data.org's per-minute request quota
+
+    Starts from the configured quota and then follows the server's own
+    count from the X-Requests-Available-Minute / X-RequestCounter-Reset
+    response headers, so callers go as fast as the quota allows.
+    """
+    def __init__(self, requests_per_minute=10):
+        # A zero quota would never refill, and acquire() would divide by zero
+        if requests_per_minute < 1:
+            raise ValueError(f"requests_per_minute must be at least 1, got {requests_per_minute}")
+        self.capacity = requests_per_minute
+        self.tokens = float(requests_per_minute)
+        self.refill_rate = requests_per_minute / 60.0
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.refill_rate)
+            time.sleep(wait)
+
+    def update(self, headers):
+        """Sync the bucket with the quota reported by the API"""
+        available = headers.get('X-Requests-Available-Minute')
+        reset = headers.get('X-RequestCounter-Reset')
+        if available is None:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, float(available))
+            if int(available) <= 0 and reset is not None:
+                self.blocked_until = max(self.blocked_until, now + float(reset))
+
+    def block_for(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
 class FootballDataAPI:
     """Class for Data API
     """
-    def __init__(self):
-        """init with url, api key and headers
+    def __init__(self, cache=None):
+        """init with url, api key, headers and response cache
         """
-        self.base_url = 'https://api.football-data.org/v4'
+        self.base_url = os.getenv('FOOTBALL_DATA_BASE_URL', 'https://api.football-data.org/v4')
         self.API_key = os.getenv('FOOTBALL_DATA_API_KEY')
         self.headers = {'X-Auth-Token': self.API_key}
+        self.timeout = 10
+        self.max_retries = 4
+        self.backoff_base = 1.0
+        self.backoff_cap = 60.0
+        self.rate_limiter = RateLimiter(int(os.getenv('FOOTBALL_DATA_RATE_LIMIT', 10)))
+        # One keep-alive session shared by every thread calling the API
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        self.session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        if cache is None:
+            cache_path = os.getenv('API_CACHE_PATH')
+            cache = ResponseCache(store=SQLiteCacheStore(cache_path) if cache_path else None)
+        self.cache = cache
+        self.registries = {}
+        REGISTRY.set_collector('football_api_cache', lambda: self.cache.collect())
+
+    def team_registry(self, competition_id=2021):
+        """Shared TeamRegistry for a competition"""
+        registry = self.registries.get(competition_id)
+        if registry is None:
+            registry = self.registries.setdefault(competition_id, TeamRegistry(self, competition_id))
+        return registry
+
+    def request(self, url, params=None, headers=None, endpoint='other'):
+        """Rate-limited GET on the shared session
+
+        Retries 429 and 5xx responses and connection errors with jittered
+        exponential backoff, waiting out the quota reset on 429s.
+
+        Returns:
+            requests.Response: the last response received
+        """
+        headers = headers or self.headers
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                UPSTREAM_REQUESTS.observe(time.perf_counter() - started, endpoint=endpoint, status='error')
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            UPSTREAM_REQUESTS.observe(time.perf_counter() - started, endpoint=endpoint,
+                                      status=response.status_code)
+            self.rate_limiter.update(response.headers)
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            if attempt == self.max_retries:
+                return response
+
+            delay = self._backoff(attempt)
+            if response.status_code == 429:
+                reset = response.headers.get('X-RequestCounter-Reset') or response.headers.get('Retry-After')
+                if reset is not None:
+                    delay = max(delay, float(reset))
+                self.rate_limiter.block_for(delay)
+            time.sleep(delay)
+        return response
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff delay in seconds"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _get(self, endpoint, url, params=None):
+        """GET through the response cache
+
+        Returns (status_code, data). Fresh entries skip the network, stale
+        ones are revalidated with If-None-Match / If-Modified-Since and served
+        as-is if the API errors.
+        """
+        key = self.cache.make_key(url, params)
+        entry = self.cache.get(key)
+        if entry is not None and entry.is_fresh():
+            self.cache.record('hits')
+            return 200, entry.data
+
+        headers = dict(self.headers)
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        try:
+            response = self.request(url, params=params, headers=headers, endpoint=endpoint)
+        except requests.RequestException:
+            if entry is None:
+                raise
+            self.cache.record('stale_served')
+            return 200, entry.data
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.record('revalidated')
+            self.cache.refresh(endpoint, key, entry)
+            return 200, entry.data
+
+        if response.status_code == 200:
+            self.cache.record('misses')
+            data = response.json()
+            self.cache.set(endpoint, key, data,
+                           etag=response.headers.get('ETag'),
+                           last_modified=response.headers.get('Last-Modified'))
+            return 200, data
+
+        if entry is not None:
+            self.cache.record('stale_served')
+            return 200, entry.data
+        self.cache.record('misses')
+        return response.status_code, None
     
+    @timed_call
     def get_comps(self):
         """Get football competitions"""
         url = f"{self.base_url}/competitions"
-        response = requests.get(url, headers=self.headers)
+        status_code, data = self._get('competitions', url)
 
-        if response.status_code == 200:
-            return response.json()
+        if status_code == 200:
+            return data
         else:
-            return {f"error: API Error Code: {response.status_code}"} 
+            return {f"error: API Error Code: {status_code}"} 
         
+    @timed_call
     def get_teams(self, competition_id=2021): #2021 is PL check documentation for all codes: https://docs.football-data.org/general/v4/lookup_tables.html#_league_codes
         """Get football teams from comps
 
@@ -32,14 +458,15 @@ class FootballDataAPI:
             competition_id (_type_): _description_
         """
         url = f"{self.base_url}/competitions/{competition_id}/teams"
-        response = requests.get(url, headers=self.headers)
+        status_code, data = self._get('teams', url)
 
-        if response.status_code == 200:
-            return response.json()
+        if status_code == 200:
+            return data
         else:
-            return (f"error: API Error Code: {response.status_code}")
+            return (f"error: API Error Code: {status_code}")
     
     
+    @timed_call
     def get_matches(self, team_id, limit = 5):
         """Get matches based on team_id 
 
@@ -54,33 +481,28 @@ class FootballDataAPI:
             'dateFrom': '2023-08-01',
             'dateTo': '2024-06-01'
         } #5 calls for recent form
-        response = requests.get(url, headers=self.headers, params=params)
+        status_code, data = self._get('matches', url, params)
 
-        if response.status_code == 200:
-            return response.json()
+        if status_code == 200:
+            return data
         else:
-            return (f"error: API Error Code: {response.status_code}")
+            return (f"error: API Error Code: {status_code}")
     
+    @timed_call
     def get_id_by_name(self, team_name):
         """Gets the team id by finding using name
 
         Args:
             team_name (_type_): _description_
         """
-        team_data = self.get_teams()
-
-        if 'error' in team_data:
-            return None
-        
-        for team in team_data['teams']:
-            if team['name'] == team_name:
-                return team['id']
-        
-        return None
+        return self.team_registry().get_id(team_name)
 
+    @timed_call
     def get_recent_form(self, team_name, limit=5):
         """Get form from last matches"""
         team_id = self.get_id_by_name(team_name)
+        if not team_id:
+            return 0
         matches_data = self.get_matches(team_id, limit=limit)
         
         if 'matches' not in matches_data or not matches_data['matches']:
@@ -104,6 +526,7 @@ class FootballDataAPI:
         
         return total_points / matches_analyzed if matches_analyzed > 0 else 0
     
+    @timed_call
     def get_season_form(self, team_name, limit=5):
         """Get team form over season"""
         team_id = self.get_id_by_name(team_name)
@@ -118,10 +541,9 @@ class FootballDataAPI:
             'dateTo': '2024-06-01'
         }
         
-        response = requests.get(url, headers=self.headers, params=params)
+        status_code, data = self._get('matches', url, params)
         
-        if response.status_code == 200:
-            data = response.json()
+        if status_code == 200:
             result_set = data.get('resultSet', {})
             
             # Extract wins, draws, losses
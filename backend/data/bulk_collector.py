@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from api_client import FootballDataAPI
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.match_stream import iter_matches, slim_match, write_matches
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT_DIR = os.path.join(DATA_DIR, 'collected')
+CHECKPOINT_FILE = 'checkpoint.json'
+
+
+def season_label(year):
+    """'2023-24' for the season starting in 2023"""
+    return f"{year}-{str(year + 1)[-2:]}"
+
+
+def season_file(output_dir, competition, year):
+    return os.path.join(output_dir, f"{competition}_{season_label(year)}.jsonl")
+
+
+def _write_json(path, data):
+    """Write through a temporary file so an interrupted write never leaves half a file"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
+
+class Checkpoint:
+    """Seasons already written, saved after each one so an interrupted run resumes"""
+    def __init__(self, path):
+        self.path = path
+        self.completed = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.completed = json.load(f).get('completed', {})
+
+    @staticmethod
+    def key(competition, year):
+        return f"{competition}/{year}"
+
+    def is_done(self, competition, year):
+        entry = self.completed.get(self.key(competition, year))
+        return entry is not None and os.path.exists(entry['file'])
+
+    def mark_done(self, competition, year, file, matches):
+        self.completed[self.key(competition, year)] = {
+            'file': file, 'matches': matches, 'collected_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        }
+        _write_json(self.path, {'completed': self.completed})
+
+
+class BulkCollector:
+    """Collects many competitions and seasons concurrently from football-data.org
+
+    Seasons are fetched by asyncio tasks, at most `concurrency` at a time,
+    each on a worker thread calling the one FootballDataAPI. Every request
+    therefore draws on the same rate limiter and follows the quota the API
+    reports. A season is written to its own slim JSON Lines file as soon
+    as it arrives (optionally also upserted into the match database), then
+    checkpointed, so nothing is held beyond the seasons in flight and a
+    rerun skips what is already on disk.
+    """
+    def __init__(self, api=None, output_dir=DEFAULT_OUTPUT_DIR, concurrency=4, database=None, verbose=True):
+        self.api = api or FootballDataAPI()
+        self.output_dir = output_dir
+        self.concurrency = concurrency
+        self.database = database
+        self.verbose = verbose
+        os.makedirs(output_dir, exist_ok=True)
+        self.checkpoint = Checkpoint(os.path.join(output_dir, CHECKPOINT_FILE))
+
+    def fetch_season(self, competition, year):
+        """Finished matches of one season, raises RuntimeError on an API error"""
+        url = f"{self.api.base_url}/competitions/{competition}/matches"
+        response = self.api.request(url, params={'season': year, 'status': 'FINISHED'}, endpoint='matches')
+        if response.status_code != 200:
+            raise RuntimeError(f"API Error Code: {response.status_code}")
+        return response.json()['matches']
+
+    def write_season(self, competition, year, matches):
+        """Write a season's slim matches to its JSON Lines file, returns the path"""
+        path = season_file(self.output_dir, competition, year)
+        label = season_label(year)
+        temp_path = path + '.tmp'
+        write_matches(temp_path, (dict(slim_match(match), season=label) for match in matches))
+        os.replace(temp_path, path)
+        return path
+
+    async def _collect_season(self, semaphore, executor, database_lock, competition, year):
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            try:
+                matches = await loop.run_in_executor(executor, self.fetch_season, competition, year)
+                path = await loop.run_in_executor(executor, self.write_season, competition, year, matches)
+                if self.database is not None:
+                    # One ingest at a time, SQLite takes a single write transaction anyway
+                    async with database_lock:
+                        await loop.run_in_executor(executor, self.database.insert_matches,
+                                                   iter_matches(path, slim=False))
+            except Exception as e:
+                print(f"Failed {competition} {season_label(year)}: {e}")
+                return competition, year, None, f"{type(e).__name__}: {e}"
+        self.checkpoint.mark_done(competition, year, path, len(matches))
+        if self.verbose:
+            print(f"{competition} {season_label(year)}: {len(matches)} matches -> {os.path.basename(path)}")
+        return competition, year, len(matches), None
+
+    async def collect(self, competitions, seasons):
+        """Collect every (competition, season) pair not already checkpointed
+
+        Args:
+            competitions (list): competition codes, e.g. ['PL', 'BL1']
+            seasons (list): season start years, e.g. [2021, 2022, 2023]
+
+        Returns:
+            dict: 'collected' and 'skipped' lists of (competition, year), 'failed'
+                (competition, year, error) and the 'matches' written
+        """
+        pending, skipped = [], []
+        for competition in competitions:
+            for year in seasons:
+                if self.checkpoint.is_done(competition, year):
+                    skipped.append((competition, year))
+                else:
+                    pending.append((competition, year))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        database_lock = asyncio.Lock()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='collector') as executor:
+            results = await asyncio.gather(*(
+                self._collect_season(semaphore, executor, database_lock, competition, year)
+                for competition, year in pending
+            ))
+
+        return {
+            'collected': [(competition, year) for competition, year, count, _ in results if count is not None],
+            'skipped': skipped,
+            'failed': [(competition, year, error) for competition, year, count, error in results if count is None],
+            'matches': sum(count for _, _, count, _ in results if count is not None),
+        }
+
+    def run(self, competitions, seasons):
+        return asyncio.run(self.collect(competitions, seasons))
+
+
+def parse_seasons(text):
+    """'2019-2023' or '2019,2021' as a list of season start years"""
+    years = []
+    for part in text.split(','):
+        start, _, end = part.partition('-')
+        years.extend(range(int(start), int(end or start) + 1))
+    return years
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Collect many competitions and seasons from football-data.org")
+    arg_parser.add_argument('--competitions', default='PL', help="comma separated codes, e.g. PL,BL1,SA")
+    arg_parser.add_argument('--seasons', default='2019-2023', help="start years, e.g. 2019-2023 or 2019,2021")
+    arg_parser.add_argument('--output', default=DEFAULT_OUTPUT_DIR, help="directory for season files and the checkpoint")
+    arg_parser.add_argument('--concurrency', type=int, default=4)
+    arg_parser.add_argument('--database', nargs='?', const='', default=None,
+                            help="also upsert into the match database (DATABASE_URL without a value)")
+    args = arg_parser.parse_args()
+
+    match_database = None
+    if args.database is not None:
+        from database import MatchDatabase
+        match_database = MatchDatabase(args.database or None)
+
+    collector = BulkCollector(output_dir=args.output, concurrency=args.concurrency, database=match_database)
+    summary = collector.run(args.competitions.split(','), parse_seasons(args.seasons))
+    print(f"\nCollected {len(summary['collected'])} seasons ({summary['matches']} matches), "
+          f"skipped {len(summary['skipped'])} already on disk, {len(summary['failed'])} failed")
+    if summary['failed']:
+        for competition, year, error in summary['failed']:
+            print(f"  {competition} {season_label(year)}: {error}")
+        print("Rerun the same command to retry the failed seasons")
+        sys.exit(1)
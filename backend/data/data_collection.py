@@ -1,12 +1,15 @@
 import json
-import time
-import requests
+import os
 from datetime import datetime
 from api_client import FootballDataAPI
 
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class HistoricalPLData:
-    def __init__(self):
+    """One competition's seasons fetched one at a time; bulk_collector.py collects many at once"""
+    def __init__(self, competition='PL'):
         self.api = FootballDataAPI()
+        self.competition = competition
         self.seasons = [
             ('2019-08-01', '2020-07-31', '2019-20'),
             ('2020-09-01', '2021-07-31', '2020-21'),  
@@ -16,8 +19,8 @@ class HistoricalPLData:
         ]
 
     def collect_season(self, start_date, end_date, season_name):
-        print(f"Collecting all season data for PL Season {season_name}")
-        url = f"{self.api.base_url}/competitions/PL/matches"
+        print(f"Collecting all season data for {self.competition} Season {season_name}")
+        url = f"{self.api.base_url}/competitions/{self.competition}/matches"
         params = {
             'dateFrom': start_date,
             'dateTo': end_date,
@@ -25,7 +28,7 @@ class HistoricalPLData:
         }
 
         try:
-            response = requests.get(url, headers=self.api.headers, params=params)
+            response = self.api.request(url, params=params, endpoint='matches')
             if response.status_code == 200:
                 data = response.json()
                 print(f"Found {len(data['matches'])} matches for {season_name}")
@@ -48,15 +51,13 @@ class HistoricalPLData:
                 match['season'] = season_name
             
             all_matches.extend(season_matches)
-
-            time.sleep(2)
         
         return all_matches
     
-    def save_data(self, matches, filename="22-23_fixtures.json"):
-        save_path = 'C:\Users\Eric_\OneDrive\Documents\GitHub\Football-Match-Predictor\backend\data'
-        print(f"Saving {len(matches)} to {filename}")
-        with open(filename, 'w') as file:
+    def save_data(self, matches, filename="22-23_fixtures.json", save_path=DATA_DIR):
+        path = os.path.join(save_path, filename)
+        print(f"Saving {len(matches)} to {path}")
+        with open(path, 'w') as file:
             json.dump(matches, file, indent=2)
         print("File Saved!")
 
@@ -76,7 +77,7 @@ def main():
     
     print(f"\nCollection complete!")
     print(f"Total matches collected: {len(fixtures23)}")
-    print(f"Data saved to: 22-23_fixtures.json")
+    print(f"Data saved to: {os.path.join(DATA_DIR, '22-23_fixtures.json')}")
 
 if __name__ == "__main__":
     main()    
\ No newline at end of file
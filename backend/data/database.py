@@ -0,0 +1,437 @@
+import argparse
+import os
+import sys
+from itertools import islice
+from pathlib import Path
+
+from sqlalchemy import (Column, Float, ForeignKey, Index, Integer, MetaData, String, Table,
+                        UniqueConstraint, bindparam, create_engine, event, func, insert, inspect,
+                        select, union_all)
+from sqlalchemy.pool import StaticPool
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from config import SQLITE_PREFIX, Config, database_url
+from utils.match_record import OUTCOME_CODES, WINNERS, Match, team_key
+from utils.match_stream import iter_matches
+
+ESPN, FOOTBALL_DATA = 'espn', 'football-data'
+# teams columns holding each source's spelling and id of a team
+SOURCE_COLUMNS = {ESPN: ('espn_name', 'espn_id'), FOOTBALL_DATA: ('football_data_name', 'football_data_id')}
+
+metadata = MetaData()
+
+teams = Table(
+    'teams', metadata,
+    Column('id', Integer, primary_key=True),
+    # team_key() of the name, shared by the ESPN and football-data.org spellings
+    Column('key', String, nullable=False, unique=True),
+    Column('name', String, nullable=False),
+    # Each source's own spelling, so its matches read back as they were ingested
+    Column('espn_name', String),
+    Column('espn_id', String),
+    Column('football_data_name', String),
+    Column('football_data_id', Integer),
+)
+
+seasons = Table(
+    'seasons', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String, nullable=False, unique=True),
+)
+
+matches = Table(
+    'matches', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('source', String),
+    Column('source_id', String),
+    Column('season_id', Integer, ForeignKey('seasons.id')),
+    # ISO kick-off as the source gives it, and its calendar day
+    Column('date', String, nullable=False),
+    Column('day', String, nullable=False),
+    Column('home_team_id', Integer, ForeignKey('teams.id'), nullable=False),
+    Column('away_team_id', Integer, ForeignKey('teams.id'), nullable=False),
+    Column('home_goals', Integer),
+    Column('away_goals', Integer),
+    # HOME_WIN / DRAW / AWAY_WIN codes from utils/match_record.py, NULL without a result
+    Column('outcome', Integer),
+    # Row id of the first copy of this fixture stored from any source; queries
+    # across sources read only rows where fixture_id = id, so a fixture counts once
+    Column('fixture_id', Integer),
+    # Each source keeps its own copy of a fixture
+    UniqueConstraint('source', 'home_team_id', 'away_team_id', 'day'),
+    Index('ix_matches_fixture', 'home_team_id', 'away_team_id', 'day'),
+    Index('ix_matches_home_team_date', 'home_team_id', 'date'),
+    Index('ix_matches_away_team_date', 'away_team_id', 'date'),
+    Index('ix_matches_date', 'date'),
+)
+
+form_snapshots = Table(
+    'form_snapshots', metadata,
+    Column('team_id', Integer, ForeignKey('teams.id'), primary_key=True),
+    Column('date', String, primary_key=True),
+    Column('after_match', Integer),
+    Column('form_score', Float),
+    Column('matches_used', Integer),
+)
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers work while an ingest is writing"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def source_of(match):
+    """'football-data' or 'espn' from a raw match dict's schema"""
+    return FOOTBALL_DATA if 'utcDate' in match else ESPN
+
+
+def team_points(recent, team_name):
+    """League points team_name took from the matches, however the source spelled its name"""
+    key = team_key(team_name)
+    return sum(m.points_for(m.home_team if team_key(m.home_team) == key else m.away_team)
+               for m in recent)
+
+
+def existing_database(url=None):
+    """MatchDatabase for url, or None for a SQLite file that hasn't been created yet"""
+    url = database_url(url) if url else Config.DATABASE_URL
+    if url.startswith(SQLITE_PREFIX):
+        path = url[len(SQLITE_PREFIX):]
+        if path and path != ':memory:' and not os.path.exists(path):
+            return None
+    return MatchDatabase(url)
+
+
+def stored_matches(source, url=None):
+    """Match records from one source in the match database, None if it has none"""
+    database = existing_database(url)
+    if database is None:
+        return None
+    return database.load_matches(source=source) or None
+
+
+class MatchDatabase:
+    """Teams, seasons, matches and form snapshots in SQLite (or any SQLAlchemy URL)
+
+    One engine with a connection pool is shared by every thread, so Flask
+    request handlers just check a connection out per query. The "last N
+    matches before date" query is built once with bind parameters and
+    served by the (team, date) indexes on both sides of a match.
+
+    Inserts are upserts keyed on (source, home team, away team, day), so
+    re-running an ingest updates scores instead of duplicating matches.
+    ESPN and football-data.org copies of a fixture are separate rows linked
+    by fixture_id: load_matches(source) returns everything one source
+    stored, and queries across sources see each fixture once, as the
+    source that stored it first.
+    """
+    def __init__(self, url=None, pool_size=None, max_overflow=None):
+        url = database_url(url) if url else Config.DATABASE_URL
+        if url in ('sqlite://', SQLITE_PREFIX + ':memory:'):
+            # One shared connection, or every checkout would see its own empty database
+            self.engine = create_engine(url, poolclass=StaticPool,
+                                        connect_args={'check_same_thread': False})
+        else:
+            self.engine = create_engine(
+                url,
+                pool_size=pool_size or Config.DATABASE_POOL_SIZE,
+                max_overflow=Config.DATABASE_MAX_OVERFLOW if max_overflow is None else max_overflow,
+                pool_pre_ping=True
+            )
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _sqlite_pragmas)
+        metadata.create_all(self.engine)
+        if 'fixture_id' not in {column['name'] for column in inspect(self.engine).get_columns('matches')}:
+            raise RuntimeError(f"{self.engine.url} has the old one-row-per-fixture matches table; "
+                               "delete it and ingest the match files again")
+
+        self.team_ids = {}
+        self.team_names = {}
+        self.source_names = {}
+        self.season_ids = {}
+        self.last_n_query = self._last_n_query()
+        self.load_lookups()
+
+    def load_lookups(self):
+        """Cache team and season ids; both tables are small"""
+        with self.engine.connect() as conn:
+            self._load_teams(conn)
+            for season_id, name in conn.execute(select(seasons.c.id, seasons.c.name)):
+                self.season_ids[name] = season_id
+
+    def _load_teams(self, conn):
+        self.team_ids, self.team_names, self.source_names = {}, {}, {}
+        for row in conn.execute(select(teams)).mappings():
+            self.team_ids[row['key']] = row['id']
+            self.team_names[row['id']] = row['name']
+            for source, (name_column, _) in SOURCE_COLUMNS.items():
+                if row[name_column] is not None:
+                    self.source_names[source, row['id']] = row[name_column]
+
+    def _upsert(self, table, keys, updates):
+        """INSERT ... ON CONFLICT (keys) DO UPDATE for SQLite and PostgreSQL"""
+        if self.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=keys, set_={column: statement.excluded[column] for column in updates})
+
+    def _intern_teams(self, conn, team_refs):
+        """Insert teams seen for the first time and record new source spellings
+
+        Args:
+            team_refs (iterable): (name, source id, source) per team appearance
+        """
+        new_teams, renamed = {}, {}
+        for name, external_id, source in team_refs:
+            key = team_key(name)
+            team_id = self.team_ids.get(key)
+            if team_id is None:
+                values = new_teams.setdefault(key, {'key': key, 'name': name,
+                                                    **{column: None for pair in SOURCE_COLUMNS.values()
+                                                       for column in pair}})
+            elif source in SOURCE_COLUMNS and (source, team_id) not in self.source_names:
+                values = renamed.setdefault(team_id, {})
+            else:
+                continue
+            if source in SOURCE_COLUMNS and values.get(SOURCE_COLUMNS[source][0]) is None:
+                name_column, id_column = SOURCE_COLUMNS[source]
+                values[name_column] = name
+                values[id_column] = external_id if external_id is None or source == FOOTBALL_DATA else str(external_id)
+
+        for team_id, values in renamed.items():
+            conn.execute(teams.update().where(teams.c.id == team_id).values(**values))
+        if new_teams:
+            conn.execute(insert(teams), list(new_teams.values()))
+        if new_teams or renamed:
+            self._load_teams(conn)
+
+    def _intern_seasons(self, conn, names):
+        new_seasons = set(names) - set(self.season_ids)
+        if not new_seasons:
+            return
+        conn.execute(insert(seasons), [{'name': name} for name in sorted(new_seasons)])
+        rows = conn.execute(select(seasons.c.id, seasons.c.name).where(seasons.c.name.in_(new_seasons)))
+        self.season_ids.update((name, season_id) for season_id, name in rows)
+
+    def insert_matches(self, match_data, source=None, chunk_size=5000):
+        """Bulk upsert matches in one transaction
+
+        Args:
+            match_data (iterable): raw ESPN / football-data.org dicts (source
+                is read from their schema) or Match records
+            source (str, optional): source for Match records, 'espn' or 'football-data'
+            chunk_size (int, optional): rows per executemany. Defaults to 5000.
+
+        Returns:
+            int: number of matches written
+        """
+        # Kick-off times are left as first stored, a source's date format never changes under it
+        statement = self._upsert(matches, ['source', 'home_team_id', 'away_team_id', 'day'],
+                                 ['source_id', 'season_id', 'home_goals', 'away_goals', 'outcome'])
+        written = 0
+        try:
+            with self.engine.begin() as conn:
+                for chunk in _chunks(match_data, chunk_size):
+                    records = [(m, source) if isinstance(m, Match) else (Match.from_dict(m), source_of(m))
+                               for m in chunk]
+                    self._intern_teams(conn, ((team, team_id, match_source) for m, match_source in records
+                                              for team, team_id in ((m.home_team, m.home_id),
+                                                                    (m.away_team, m.away_id))))
+                    self._intern_seasons(conn, (str(m.season) for m, _ in records if m.season is not None))
+                    conn.execute(statement, [{
+                        'source': match_source,
+                        'source_id': None if m.match_id is None else str(m.match_id),
+                        'season_id': self.season_ids.get(str(m.season)) if m.season is not None else None,
+                        'date': m.date,
+                        'day': m.date[:10],
+                        'home_team_id': self.team_ids[team_key(m.home_team)],
+                        'away_team_id': self.team_ids[team_key(m.away_team)],
+                        'home_goals': m.home_goals,
+                        'away_goals': m.away_goals,
+                        'outcome': OUTCOME_CODES.get(m.winner),
+                    } for m, match_source in records])
+                    written += len(records)
+                conn.execute(self._link_fixtures())
+        except Exception:
+            # Ids cached during the rolled back transaction no longer exist
+            self.season_ids = {}
+            self.load_lookups()
+            raise
+        return written
+
+    @staticmethod
+    def _link_fixtures():
+        """Point new rows at the first stored copy of their fixture"""
+        first = matches.alias('first')
+        first_id = (select(func.min(first.c.id))
+                    .where(first.c.home_team_id == matches.c.home_team_id,
+                           first.c.away_team_id == matches.c.away_team_id,
+                           first.c.day == matches.c.day)
+                    .scalar_subquery())
+        return matches.update().where(matches.c.fixture_id.is_(None)).values(fixture_id=first_id)
+
+    def _row_match(self, row):
+        match_id, source, source_id, season, date, home, away, home_goals, away_goals, outcome = row
+        return Match(
+            match_id=source_id if source_id is not None else match_id,
+            date=date,
+            season=season,
+            home_team=self.source_names.get((source, home), self.team_names[home]),
+            away_team=self.source_names.get((source, away), self.team_names[away]),
+            home_id=None,
+            away_id=None,
+            home_goals=home_goals,
+            away_goals=away_goals,
+            winner=WINNERS.get(outcome)
+        )
+
+    def _match_columns(self):
+        return (matches.c.id, matches.c.source, matches.c.source_id, seasons.c.name.label('season'), matches.c.date,
+                matches.c.home_team_id, matches.c.away_team_id, matches.c.home_goals,
+                matches.c.away_goals, matches.c.outcome)
+
+    def _last_n_query(self):
+        """Finished matches of :team_id before :before, newest first, at most :limit
+
+        Each side of the UNION is one range scan of its (team, date) index.
+        """
+        sides = []
+        for team_column in (matches.c.home_team_id, matches.c.away_team_id):
+            side = (select(*self._match_columns())
+                    .select_from(matches.outerjoin(seasons, matches.c.season_id == seasons.c.id))
+                    .where(team_column == bindparam('team_id'), matches.c.date < bindparam('before'),
+                           matches.c.outcome.is_not(None), matches.c.fixture_id == matches.c.id)
+                    .order_by(matches.c.date.desc(), matches.c.id.desc())
+                    .limit(bindparam('limit')))
+            sides.append(select(side.subquery()))
+        both = union_all(*sides).subquery()
+        return select(both).order_by(both.c.date.desc(), both.c.id.desc()).limit(bindparam('limit'))
+
+    def team_id(self, team_name):
+        return self.team_ids.get(team_key(team_name))
+
+    def last_n_before(self, team_name, match_date, num_games=5):
+        """Last N finished matches strictly before match_date, most recent first"""
+        team_id = self.team_id(team_name)
+        if team_id is None:
+            return []
+        with self.engine.connect() as conn:
+            rows = conn.execute(self.last_n_query,
+                                {'team_id': team_id, 'before': match_date, 'limit': num_games})
+            return [self._row_match(row) for row in rows]
+
+    def points_before(self, team_name, match_date, num_games=5):
+        """Return (points, games) over the last N games before match_date"""
+        recent = self.last_n_before(team_name, match_date, num_games)
+        return team_points(recent, team_name), len(recent)
+
+    def form_before(self, team_name, match_date, num_games=5, min_games=3):
+        """Points per game over the last N games, None if fewer than min_games"""
+        points, games = self.points_before(team_name, match_date, num_games)
+        if games < min_games:
+            return None
+        return points / games
+
+    def load_matches(self, source=None, season=None):
+        """Match records in date order, optionally from one source or season
+
+        Without a source every fixture appears once, from whichever source
+        stored it first.
+        """
+        query = (select(*self._match_columns())
+                 .select_from(matches.outerjoin(seasons, matches.c.season_id == seasons.c.id))
+                 .order_by(matches.c.date, matches.c.id))
+        query = query.where(matches.c.fixture_id == matches.c.id if source is None else matches.c.source == source)
+        if season is not None:
+            query = query.where(seasons.c.name == str(season))
+        with self.engine.connect() as conn:
+            return [self._row_match(row) for row in conn.execute(query)]
+
+    def match_count(self, source=None):
+        query = select(func.count()).select_from(matches)
+        query = query.where(matches.c.fixture_id == matches.c.id if source is None else matches.c.source == source)
+        with self.engine.connect() as conn:
+            return conn.execute(query).scalar_one()
+
+    def save_form_cache(self, cache):
+        """Store every team's form_timeline from a form cache dict as snapshots
+
+        Returns:
+            int: number of snapshots written
+        """
+        statement = self._upsert(form_snapshots, ['team_id', 'date'],
+                                 ['after_match', 'form_score', 'matches_used'])
+        team_data = cache.get('teams', {})
+        with self.engine.begin() as conn:
+            # Teams only in the form cache still need a row
+            self._intern_teams(conn, ((name, None, None) for name in team_data))
+            rows = [{
+                'team_id': self.team_ids[team_key(name)],
+                'date': entry['date'],
+                'after_match': entry['after_match'],
+                'form_score': entry['form_score'],
+                'matches_used': entry['matches_used'],
+            } for name, team in team_data.items() for entry in team.get('form_timeline', [])]
+            if rows:
+                conn.execute(statement, rows)
+        return len(rows)
+
+    def form_snapshot(self, team_name, as_of=None):
+        """Latest form snapshot on or before as_of (the latest overall without one)"""
+        team_id = self.team_id(team_name)
+        if team_id is None:
+            return None
+        query = (select(form_snapshots.c.date, form_snapshots.c.after_match,
+                        form_snapshots.c.form_score, form_snapshots.c.matches_used)
+                 .where(form_snapshots.c.team_id == team_id)
+                 .order_by(form_snapshots.c.date.desc()).limit(1))
+        if as_of is not None:
+            query = query.where(form_snapshots.c.date <= as_of)
+        with self.engine.connect() as conn:
+            row = conn.execute(query).mappings().first()
+        return dict(row) if row else None
+
+
+if __name__ == "__main__":
+    import json
+
+    arg_parser = argparse.ArgumentParser(description="Load match data and form caches into the match database")
+    arg_parser.add_argument('--url', help="SQLAlchemy URL, DATABASE_URL by default")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser('ingest', help="bulk load ESPN or football-data.org match files")
+    ingest.add_argument('files', nargs='+')
+    form = commands.add_parser('form-cache', help="store a form cache's timelines as form snapshots")
+    form.add_argument('cache_file')
+    last = commands.add_parser('last', help="a team's last N matches before a date")
+    last.add_argument('team')
+    last.add_argument('date')
+    last.add_argument('-n', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    database = MatchDatabase(args.url)
+    if args.command == 'ingest':
+        for path in args.files:
+            print(f"{path}: {database.insert_matches(iter_matches(path, slim=False))} matches")
+        print(f"{database.match_count()} matches in {database.engine.url}")
+    elif args.command == 'form-cache':
+        with open(args.cache_file, 'r') as f:
+            print(f"Stored {database.save_form_cache(json.load(f))} form snapshots")
+    else:
+        for m in database.last_n_before(args.team, args.date, args.n):
+            print(f"{m.date[:10]}  {m.home_team} {m.home_goals}-{m.away_goals} {m.away_team}")
@@ -1,18 +1,99 @@
 import json
 import os
+import sys
 import glob
+import hashlib
+import heapq
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from utils.match_record import OUTCOME_CODES, Match, read_matches
+from utils.match_stream import iter_matches, last_match, write_matches
+
+
+class IngestManifest:
+    """Record of every ingested file's mtime, size and hash
+
+    Lets a rerun skip files that haven't changed since the last ingest.
+    Changes are staged by record() and only written by save(), so a crash
+    before the output is saved leaves the old manifest in place.
+    """
+    def __init__(self, manifest_file):
+        self.manifest_file = manifest_file
+        self.files = {}
+        # Match ids from files that were reparsed, superseded on merge
+        self.replaced_ids = set()
+        if os.path.exists(manifest_file):
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+
+    @staticmethod
+    def file_hash(file_path):
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def is_unchanged(self, file_path):
+        """True if the file matches what was ingested last time"""
+        entry = self.files.get(os.path.basename(file_path))
+        if entry is None:
+            return False
+        stat = os.stat(file_path)
+        if entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            return True
+        # Touched but identical content still doesn't need reparsing
+        if entry['sha256'] == self.file_hash(file_path):
+            entry['mtime'], entry['size'] = stat.st_mtime, stat.st_size
+            return True
+        return False
+
+    def record(self, file_path, match_ids):
+        stat = os.stat(file_path)
+        previous = self.files.get(os.path.basename(file_path))
+        if previous:
+            self.replaced_ids.update(previous['match_ids'])
+        self.files[os.path.basename(file_path)] = {
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'sha256': self.file_hash(file_path),
+            'match_ids': match_ids
+        }
+
+    def save(self):
+        with open(self.manifest_file, 'w', encoding='utf-8') as f:
+            json.dump({'files': self.files}, f, indent=2)
+
+
+def _parse_file_worker(file_path):
+    """Process pool entry point: (events in file, parsed matches) or None on error"""
+    parser = ESPNJSONParser()
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"✗ Error parsing {file_path}: {e}")
+        return None
+    events = data.get('events', [])
+    return len(events), parser.parse_events(events)
+
+
 class ESPNJSONParser:
-    def __init__(self):
+    def __init__(self, manifest_file=None, keep_matches=True):
         self.parsed_matches = []
+        self.keep_matches = keep_matches
+        # Open JSON Lines file that parsed matches are written to as they arrive
+        self.stream = None
+        self.manifest = IngestManifest(manifest_file) if manifest_file else None
         self.stats = {
             'total_files': 0,
             'total_matches': 0,
             'completed_matches': 0,
+            'skipped_files': 0,
             'seasons_found': set(),
-            'date_range': {'earliest': None, 'latest': None}
+            'date_range': {'earliest': None, 'latest': None},
+            'outcomes': {'HOME_TEAM': 0, 'AWAY_TEAM': 0, 'DRAW': 0}
         }
     
     def parse_espn_match(self, event):
@@ -139,58 +220,100 @@ class ESPNJSONParser:
         
         return events
     
+    def parse_events(self, events):
+        """Parse a list of ESPN events, skipping incomplete matches"""
+        parsed = []
+        for event in events:
+            parsed_match = self.parse_espn_match(event)
+            if parsed_match:
+                parsed.append(parsed_match)
+        return parsed
+    
+    def _record_file(self, file_path, total_events, file_matches):
+        """Add one file's parsed matches and update statistics"""
+        self.stats['total_files'] += 1
+        self.stats['total_matches'] += total_events
+        
+        if self.stream is not None:
+            write_matches(self.stream, file_matches)
+        
+        for parsed_match in file_matches:
+            if self.keep_matches:
+                self.parsed_matches.append(parsed_match)
+            self.stats['completed_matches'] += 1
+            self.stats['outcomes'][parsed_match['score']['winner']] += 1
+            
+            # Update statistics
+            if parsed_match.get('season'):
+                self.stats['seasons_found'].add(parsed_match['season'])
+            
+            # Track date range
+            match_date = parsed_match.get('date')
+            if match_date:
+                if not self.stats['date_range']['earliest'] or match_date < self.stats['date_range']['earliest']:
+                    self.stats['date_range']['earliest'] = match_date
+                if not self.stats['date_range']['latest'] or match_date > self.stats['date_range']['latest']:
+                    self.stats['date_range']['latest'] = match_date
+        
+        if self.manifest is not None:
+            self.manifest.record(file_path, [m['_original_id'] for m in file_matches])
+        print(f"✓ {os.path.basename(file_path)}: {len(file_matches)} completed matches")
+    
     def parse_json_file(self, file_path):
         """Parse a single ESPN JSON file"""
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
-            self.stats['total_files'] += 1
-            file_matches = 0
-            
-            # Parse each event in the file
             events = data.get('events', [])
-            for event in events:
-                parsed_match = self.parse_espn_match(event)
-                if parsed_match:
-                    self.parsed_matches.append(parsed_match)
-                    file_matches += 1
-                    self.stats['completed_matches'] += 1
-                    
-                    # Update statistics
-                    if parsed_match.get('season'):
-                        self.stats['seasons_found'].add(parsed_match['season'])
-                    
-                    # Track date range
-                    match_date = parsed_match.get('date')
-                    if match_date:
-                        if not self.stats['date_range']['earliest'] or match_date < self.stats['date_range']['earliest']:
-                            self.stats['date_range']['earliest'] = match_date
-                        if not self.stats['date_range']['latest'] or match_date > self.stats['date_range']['latest']:
-                            self.stats['date_range']['latest'] = match_date
-            
-            self.stats['total_matches'] += len(events)
-            print(f"✓ {os.path.basename(file_path)}: {file_matches} completed matches")
-            return file_matches
+            file_matches = self.parse_events(events)
+            self._record_file(file_path, len(events), file_matches)
+            return len(file_matches)
             
         except Exception as e:
             print(f"✗ Error parsing {file_path}: {e}")
             return 0
     
-    def parse_directory(self, directory_path, pattern="*.json"):
-        """Parse all ESPN JSON files in a directory"""
+    def parse_directory(self, directory_path, pattern="*.json", workers=None, exclude=()):
+        """Parse all ESPN JSON files in a directory
+
+        Args:
+            directory_path (str): folder of Schedule_*.json files
+            pattern (str, optional): glob for input files. Defaults to "*.json".
+            workers (int, optional): processes to parse with, 1 parses serially.
+                Defaults to one per CPU.
+            exclude (tuple, optional): paths to skip, e.g. the output file.
+        """
         input_dir = Path(directory_path)
-        json_files = list(input_dir.glob(pattern))
+        excluded = {Path(p).resolve() for p in exclude}
+        json_files = sorted(f for f in input_dir.glob(pattern) if f.resolve() not in excluded)
         
         if not json_files:
             print(f"No JSON files found matching pattern '{pattern}' in {directory_path}")
             return
         
+        if self.manifest is not None:
+            changed = [f for f in json_files if not self.manifest.is_unchanged(str(f))]
+            self.stats['skipped_files'] = len(json_files) - len(changed)
+            json_files = changed
+            print(f"{self.stats['skipped_files']} files unchanged since last ingest")
+        
         print(f"Found {len(json_files)} JSON files to parse")
         print("=" * 50)
         
-        for json_file in sorted(json_files):
-            self.parse_json_file(str(json_file))
+        paths = [str(f) for f in json_files]
+        if workers == 1 or len(paths) < 2:
+            for path in paths:
+                self.parse_json_file(path)
+        else:
+            # Results come back in submission order, so merging stays in
+            # file (date) order however the work was split across processes
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(paths) // (4 * workers))
+                for path, result in zip(paths, pool.map(_parse_file_worker, paths, chunksize=chunksize)):
+                    if result is not None:
+                        self._record_file(path, *result)
         
         self._print_summary()
     
@@ -208,86 +331,179 @@ class ESPNJSONParser:
             print(f"Date range: {self.stats['date_range']['earliest'][:10]} to {self.stats['date_range']['latest'][:10]}")
         
         # Basic outcome statistics
-        if self.parsed_matches:
-            home_wins = sum(1 for m in self.parsed_matches if m['score']['winner'] == 'HOME_TEAM')
-            away_wins = sum(1 for m in self.parsed_matches if m['score']['winner'] == 'AWAY_TEAM')
-            draws = sum(1 for m in self.parsed_matches if m['score']['winner'] == 'DRAW')
-            total = len(self.parsed_matches)
+        if self.stats['completed_matches']:
+            home_wins = self.stats['outcomes']['HOME_TEAM']
+            away_wins = self.stats['outcomes']['AWAY_TEAM']
+            draws = self.stats['outcomes']['DRAW']
+            total = self.stats['completed_matches']
             
             print(f"\nOutcome Distribution:")
             print(f"Home wins: {home_wins} ({home_wins/total:.1%})")
             print(f"Away wins: {away_wins} ({away_wins/total:.1%})")
             print(f"Draws: {draws} ({draws/total:.1%})")
     
-    def save_parsed_data(self, output_file="historical_fixtures.json"):
-        """Save parsed matches in format expected by ProbabilityAnalyzer"""
+    def save_parsed_data(self, output_file="historical_fixtures.json", merge=False):
+        """Save parsed matches in format expected by ProbabilityAnalyzer
+
+        With merge=True the newly parsed matches are merged into an existing
+        output file, replacing earlier versions of reparsed matches, and the
+        ingest manifest is saved once the output is written.
+        """
+        matches = self.parsed_matches
+        if merge and os.path.exists(output_file):
+            with open(output_file, 'r', encoding='utf-8') as f:
+                existing = json.load(f).get('matches', [])
+            replaced = {m['_original_id'] for m in self.parsed_matches}
+            if self.manifest is not None:
+                replaced |= self.manifest.replaced_ids
+            matches = [m for m in existing if m['_original_id'] not in replaced] + self.parsed_matches
+            matches.sort(key=lambda m: m['date'])
+        
+        dates = [m['date'] for m in matches if m.get('date')]
+        parsing_stats = dict(self.stats, seasons_found=sorted(self.stats['seasons_found']))
         output_data = {
-            'matches': self.parsed_matches,
+            'matches': matches,
             'metadata': {
-                'total_matches': len(self.parsed_matches),
-                'seasons': sorted(list(self.stats['seasons_found'])),
-                'date_range': self.stats['date_range'],
-                'parsing_stats': self.stats
+                'total_matches': len(matches),
+                'seasons': sorted({m['season'] for m in matches if m.get('season')}),
+                'date_range': {'earliest': min(dates, default=None), 'latest': max(dates, default=None)},
+                'parsing_stats': parsing_stats
             }
         }
         
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(output_data, f, indent=2, ensure_ascii=False)
+        if self.manifest is not None:
+            self.manifest.save()
         
         print(f"\n✓ Parsed data saved to {output_file}")
         print(f"Format compatible with ProbabilityAnalyzer")
         return output_file
     
+    def parse_directory_to_jsonl(self, directory_path, output_file, workers=None, merge=False,
+                                 pattern="*.json"):
+        """Parse a directory straight into a JSON Lines file
+
+        Matches are written as each file is parsed instead of being held in
+        memory. With merge=True they are added to an existing output file:
+        appended when they all come after its last match, otherwise the two
+        date-ordered streams are merged (dropping reparsed matches) into a
+        rewritten file.
+        """
+        tmp_file = os.path.splitext(output_file)[0] + '.tmp.jsonl'
+        exclude = [output_file, tmp_file]
+        if self.manifest is not None:
+            exclude.append(self.manifest.manifest_file)
+        
+        with open(tmp_file, 'w', encoding='utf-8') as self.stream:
+            self.parse_directory(directory_path, pattern, workers, exclude=exclude)
+        self.stream = None
+        
+        if not (merge and os.path.exists(output_file)):
+            os.replace(tmp_file, output_file)
+        elif not self.stats['completed_matches'] and not (self.manifest and self.manifest.replaced_ids):
+            os.remove(tmp_file)
+        else:
+            replaced = self.manifest.replaced_ids if self.manifest is not None else set()
+            previous = last_match(output_file)
+            earliest_new = self.stats['date_range']['earliest']
+            if not replaced and (previous is None or earliest_new >= previous['date']):
+                with open(tmp_file, 'rb') as new, open(output_file, 'ab') as out:
+                    shutil.copyfileobj(new, out)
+            else:
+                kept = (m for m in iter_matches(output_file, slim=False)
+                        if m['_original_id'] not in replaced)
+                merged = heapq.merge(kept, iter_matches(tmp_file, slim=False), key=lambda m: m['date'])
+                merged_file = os.path.splitext(output_file)[0] + '.merge.jsonl'
+                write_matches(merged_file, merged)
+                os.replace(merged_file, output_file)
+            os.remove(tmp_file)
+        
+        if self.manifest is not None:
+            self.manifest.save()
+        print(f"\n✓ Parsed data saved to {output_file}")
+        return output_file
+    
     def get_matches_for_analyzer(self):
         """Return matches in the exact format expected by ProbabilityAnalyzer"""
         return self.parsed_matches
 
 # Usage example and integration with ProbabilityAnalyzer
-def create_historical_dataset(espn_json_directory, output_file="historical_fixtures.json"):
-    """Complete pipeline to create historical dataset from ESPN JSON files"""
+def create_historical_dataset(espn_json_directory, output_file="historical_fixtures.json",
+                              workers=None, incremental=False):
+    """Complete pipeline to create historical dataset from ESPN JSON files
+
+    With incremental=True only files that are new or changed since the last
+    run (per the <output>.manifest.json next to the output) are parsed and
+    merged into the existing output. A .jsonl output_file is written as JSON
+    Lines while parsing. Returns the newly parsed matches (none for .jsonl).
+    """
     print("ESPN JSON Parser - Creating Historical Dataset")
     print("=" * 60)
     
+    manifest_file = os.path.splitext(output_file)[0] + '.manifest.json' if incremental else None
+    
+    if output_file.endswith('.jsonl'):
+        # Stream matches to disk as they are parsed
+        parser = ESPNJSONParser(manifest_file, keep_matches=False)
+        parser.parse_directory_to_jsonl(espn_json_directory, output_file, workers=workers, merge=incremental)
+        return parser.get_matches_for_analyzer()
+    
     # Parse all ESPN JSON files
-    parser = ESPNJSONParser()
-    parser.parse_directory(espn_json_directory)
+    parser = ESPNJSONParser(manifest_file)
+    parser.parse_directory(espn_json_directory, workers=workers,
+                           exclude=[f for f in (output_file, manifest_file) if f])
+    
+    if incremental and os.path.exists(output_file) and not parser.stats['total_files']:
+        print(f"\n{output_file} is already up to date")
+        return parser.get_matches_for_analyzer()
     
     # Save in ProbabilityAnalyzer format
-    parser.save_parsed_data(output_file)
+    parser.save_parsed_data(output_file, merge=incremental)
     
     return parser.get_matches_for_analyzer()
 
 # Modified ProbabilityAnalyzer to work with historical data
 class HistoricalProbabilityAnalyzer:
-    def __init__(self, historical_data_file="historical_fixtures.json"):
+    def __init__(self, historical_data_file="historical_fixtures.json", stream=False):
         self.cache_calc = None  # You'd need to adapt this for historical data
-        self.matches = self.load_historical_data(historical_data_file)
+        self.data_file = historical_data_file
+        # Streaming re-reads the file for each analysis instead of holding it
+        self.matches = None if stream else self.load_historical_data(historical_data_file)
     
     def load_historical_data(self, data_file):
-        """Load historical match data"""
+        """Load historical match data as Match records"""
         try:
-            with open(data_file, 'r') as f:
-                data = json.load(f)
-            # Return just the matches array
-            return data.get('matches', data) if isinstance(data, dict) else data
+            return read_matches(data_file)
         except FileNotFoundError:
             print(f"Historical data file {data_file} not found. Run the parser first.")
             return []
     
+    def iter_matches(self):
+        """Matches from memory, or streamed from the data file"""
+        if self.matches is not None:
+            return iter(self.matches)
+        if not os.path.exists(self.data_file):
+            print(f"Historical data file {self.data_file} not found. Run the parser first.")
+            return iter(())
+        return (Match.from_dict(m) for m in iter_matches(self.data_file, slim=False))
+    
     def calculate_basic_probabilities(self):
         """Calculate base home/away/draw rates from historical data"""
-        if not self.matches:
+        outcomes = {'HOME_TEAM': 0, 'AWAY_TEAM': 0, 'DRAW': 0}
+        for m in self.iter_matches():
+            # Unplayed and postponed matches have no winner
+            if m.winner in outcomes:
+                outcomes[m.winner] += 1
+        
+        total_matches = sum(outcomes.values())
+        if not total_matches:
             return None
-            
-        total_matches = len(self.matches)
-        home_wins = sum(1 for m in self.matches if m['score']['winner'] == 'HOME_TEAM')
-        away_wins = sum(1 for m in self.matches if m['score']['winner'] == 'AWAY_TEAM') 
-        draws = sum(1 for m in self.matches if m['score']['winner'] == 'DRAW')
         
         return {
-            'home_win_rate': home_wins / total_matches,
-            'away_win_rate': away_wins / total_matches,
-            'draw_rate': draws / total_matches,
+            'home_win_rate': outcomes['HOME_TEAM'] / total_matches,
+            'away_win_rate': outcomes['AWAY_TEAM'] / total_matches,
+            'draw_rate': outcomes['DRAW'] / total_matches,
             'total_matches': total_matches
         }
     
@@ -295,15 +511,15 @@ class HistoricalProbabilityAnalyzer:
         """Analyze trends by season"""
         season_stats = {}
         
-        for match in self.matches:
-            season = match.get('season')
-            if not season:
+        for match in self.iter_matches():
+            season = match.season
+            if not season or match.winner not in OUTCOME_CODES:
                 continue
                 
             if season not in season_stats:
                 season_stats[season] = {'HOME_TEAM': 0, 'AWAY_TEAM': 0, 'DRAW': 0, 'total': 0}
             
-            winner = match['score']['winner']
+            winner = match.winner
             season_stats[season][winner] += 1
             season_stats[season]['total'] += 1
         
@@ -316,15 +532,28 @@ class HistoricalProbabilityAnalyzer:
                 stats['draw_rate'] = stats['DRAW'] / total
         
         return season_stats
+    
+    def fit_goals_model(self, decay=None, as_of=None):
+        """Fit a Dixon-Coles scoreline model to the homeScore / awayScore of every match"""
+        # Imported here so parsing, and every parser worker process, doesn't load scipy
+        from models.goals_model import DixonColesModel
+
+        goals_model = DixonColesModel() if decay is None else DixonColesModel(decay=decay)
+        return goals_model.fit(self.iter_matches(), as_of=as_of)
 
 if __name__ == "__main__":
-    import sys
+    import argparse
     
-    # Get directory from command line or use current directory
-    if len(sys.argv) > 1:
-        json_directory = sys.argv[1]
-    else:
-        json_directory = "."  # Current directory
+    arg_parser = argparse.ArgumentParser(description="Build the historical match dataset from ESPN JSON files")
+    arg_parser.add_argument('directory', nargs='?', default='.', help="folder of ESPN JSON files")
+    arg_parser.add_argument('--workers', type=int, default=None, help="parser processes, 1 for serial")
+    arg_parser.add_argument('--incremental', action='store_true',
+                            help="only parse files that are new or changed since the last run")
+    arg_parser.add_argument('--output', default="premier_league_historical.jsonl",
+                            help="output file, .jsonl for JSON Lines or .json for one document")
+    args = arg_parser.parse_args()
+    json_directory = args.directory
+    output_file = args.output
     
     # Check if directory exists and has JSON files
     input_dir = Path(json_directory)
@@ -349,16 +578,17 @@ if __name__ == "__main__":
     
     # Step 1: Parse ESPN JSON files
     print("Step 1: Parsing ESPN JSON files...")
-    matches = create_historical_dataset(json_directory, "premier_league_historical.json")
+    matches = create_historical_dataset(json_directory, output_file,
+                                        workers=args.workers, incremental=args.incremental)
     
     # Only proceed if we found matches
-    if not matches:
+    if not matches and not os.path.exists(output_file):
         print("No matches found. Check your JSON file format.")
         sys.exit(1)
     
     # Step 2: Run probability analysis
     print("\nStep 2: Running probability analysis...")
-    analyzer = HistoricalProbabilityAnalyzer("premier_league_historical.json")
+    analyzer = HistoricalProbabilityAnalyzer(output_file, stream=output_file.endswith('.jsonl'))
     
     basic_probs = analyzer.calculate_basic_probabilities()
     if basic_probs:
@@ -375,5 +605,16 @@ if __name__ == "__main__":
             for season, stats in sorted(season_analysis.items()):
                 print(f"{season}: {stats['total']} matches - "
                       f"H:{stats['home_win_rate']:.1%} A:{stats['away_win_rate']:.1%} D:{stats['draw_rate']:.1%}")
+        
+        # Step 3: Scoreline model
+        print("\nStep 3: Fitting the goals model...")
+        goals_model = analyzer.fit_goals_model()
+        print(f"Fitted {goals_model.metadata['matches']} matches, "
+              f"home advantage {goals_model.home_advantage:.3f}, rho {goals_model.rho:.3f}")
+        # models/goals_model.json, where DixonColesModel.load() looks for it
+        from models.goals_model import DEFAULT_GOALS_MODEL_FILE
+
+        goals_model.save()
+        print(f"Goals model saved to {DEFAULT_GOALS_MODEL_FILE}")
     else:
         print("No probability analysis possible - no valid matches found.")
\ No newline at end of file
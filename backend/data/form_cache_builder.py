@@ -1,47 +1,76 @@
 import json
+import sys
 from collections import defaultdict
+from datetime import date
+from pathlib import Path
 from api_client import FootballDataAPI
+from database import FOOTBALL_DATA, stored_matches
+from form_engine import FormEngine
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.columnar_store import load_match_columns
+from utils.match_record import MatchTable
+
+
+def representative_form(timeline):
+    """Average form from matches 10-30 (mid-season, when form is stable)"""
+    mid_season_forms = [t['form_score'] for t in timeline[10:30] if t['matches_used'] >= 5]
+    return sum(mid_season_forms) / len(mid_season_forms) if mid_season_forms else 0
+
+
+def season_stats(total_matches, wins, draws, losses):
+    """season_stats entry of a team in the form cache"""
+    return {
+        'matches': total_matches,
+        'wins': wins,
+        'draws': draws,
+        'losses': losses,
+        'win_rate': wins / total_matches if total_matches > 0 else 0,
+        'points_per_game': (wins * 3 + draws) / total_matches if total_matches > 0 else 0
+    }
 
 class FormCacheBuilder:
-    def __init__(self):
+    def __init__(self, matches=None):
         self.api = FootballDataAPI()
-        self.matches = self.load_historical_data()
-        self.teams = self.get_all_teams()
+        self.matches = matches if matches is not None else self.load_historical_data()
+        self.engine = FormEngine(self.matches)
+        self.teams = self.engine.teams
     
     def load_historical_data(self):
         """Load your collected match data"""
         try:
-            with open('23-24_PLData.json', 'r') as f:
-                return json.load(f)
+            # FormEngine reads a MatchTable's columns directly, memory-mapped from a store
+            return stored_matches(FOOTBALL_DATA) or load_match_columns('23-24_PLData.json')
         except FileNotFoundError:
             print("Historical data not found! Run data_collector.py first.")
             return []
     
+    def match_records(self):
+        """self.matches as Match records, copied out of a MatchTable if need be"""
+        return self.matches.records() if isinstance(self.matches, MatchTable) else self.matches
+
     def get_all_teams(self):
         """Get unique teams from historical data"""
         teams = set()
-        for match in self.matches:
-            teams.add(match['homeTeam']['name'])
-            teams.add(match['awayTeam']['name'])
+        for match in self.match_records():
+            teams.add(match.home_team)
+            teams.add(match.away_team)
         return sorted(list(teams))
     
     def get_team_matches_chronological(self, team_name):
         """Get all matches for a team in chronological order"""
         team_matches = []
         
-        for match in self.matches:
-            home_team = match['homeTeam']['name']
-            away_team = match['awayTeam']['name']
-            
-            if team_name == home_team or team_name == away_team:
+        for match in self.match_records():
+            if match.involves(team_name):
                 team_matches.append({
-                    'date': match['utcDate'],
-                    'home_team': home_team,
-                    'away_team': away_team,
-                    'home_goals': match['score']['fullTime']['home'],
-                    'away_goals': match['score']['fullTime']['away'],
-                    'winner': match['score']['winner'],
-                    'is_home': team_name == home_team
+                    'date': match.date,
+                    'home_team': match.home_team,
+                    'away_team': match.away_team,
+                    'home_goals': match.home_goals,
+                    'away_goals': match.away_goals,
+                    'winner': match.winner,
+                    'is_home': match.is_home(team_name)
                 })
 
         team_matches.sort(key=lambda x: x['date'])
@@ -49,39 +78,7 @@ class FormCacheBuilder:
     
     def calculate_rolling_form(self, team_name, window=5):
         """Calculate form at different points in the season - FIXED VERSION"""
-        matches = self.get_team_matches_chronological(team_name)
-        form_timeline = []
-        
-        for i in range(len(matches)):
-            # Calculate form BEFORE this match (using previous matches only)
-            if i < window:
-                # Not enough previous matches, use what we have
-                recent_matches = matches[:i]
-            else:
-                # Use last 'window' matches before this one
-                recent_matches = matches[i-window:i]
-            
-            if not recent_matches:
-                form_score = 0.0
-            else:
-                points = 0
-                for match in recent_matches:
-                    result = self.get_match_result(match, team_name)
-                    if result == 'WIN':
-                        points += 3
-                    elif result == 'DRAW':
-                        points += 1
-                
-                form_score = points / len(recent_matches)
-            
-            form_timeline.append({
-                'after_match': i + 1,
-                'date': matches[i]['date'],
-                'form_score': form_score,
-                'matches_used': len(recent_matches)
-            })
-        
-        return form_timeline
+        return self.engine.form_timelines(window).get(team_name, [])
     
     def get_match_result(self, match, team_name):
         """Determine if team won, drew, or lost"""
@@ -103,7 +100,7 @@ class FormCacheBuilder:
         
         cache = {
             'metadata': {
-                'created_date': '2024-12-31',  # Update this
+                'created_date': date.today().isoformat(),
                 'season': '2023-24',
                 'total_teams': len(self.teams),
                 'total_matches': len(self.matches)
@@ -111,35 +108,17 @@ class FormCacheBuilder:
             'teams': {}
         }
         
+        stats = self.engine.season_stats()
+        timelines = self.engine.form_timelines()
+
         for i, team in enumerate(self.teams):
             print(f"Processing {team} ({i+1}/{len(self.teams)})...")
 
-            team_matches = self.get_team_matches_chronological(team)
-
-            total_matches = len(team_matches)
-            wins = sum(1 for m in team_matches if self.get_match_result(m, team) == 'WIN')
-            draws = sum(1 for m in team_matches if self.get_match_result(m, team) == 'DRAW')
-            losses = sum(1 for m in team_matches if self.get_match_result(m, team) == 'LOSS')
-            
-            timeline = self.calculate_rolling_form(team)
-            if timeline:
-                # Use form from matches 10-30 (mid-season, when form is stable)
-                mid_season_forms = [t['form_score'] for t in timeline[10:30] if t['matches_used'] >= 5]
-                representative_form = sum(mid_season_forms) / len(mid_season_forms) if mid_season_forms else 0
-            else:
-                representative_form = 0
-
+            timeline = timelines[team]
             cache['teams'][team] = {
-                'season_stats': {
-                    'matches': total_matches,
-                    'wins': wins,
-                    'draws': draws,
-                    'losses': losses,
-                    'win_rate': wins / total_matches if total_matches > 0 else 0,
-                    'points_per_game': (wins * 3 + draws) / total_matches if total_matches > 0 else 0
-                },
+                'season_stats': season_stats(*(int(stats[key][i]) for key in ('matches', 'wins', 'draws', 'losses'))),
                 'representative_form': {
-                    'score': representative_form,
+                    'score': representative_form(timeline),
                     'description': 'Average form from mid-season period'
                 },
                 'form_timeline': timeline
@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from form_cache_builder import representative_form, season_stats
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.columnar_store import FormCacheColumns, columnar_path
+from utils.form_cache_log import append_entries, apply_entry, log_path, read_entries
+from utils.match_record import Match
+from utils.match_stream import iter_matches
+
+POINTS = {'WIN': 3, 'DRAW': 1, 'LOSS': 0}
+# Matches after this one no longer move the representative form window
+REPRESENTATIVE_END = 30
+
+
+def recent_points(timeline, stats, window=5):
+    """Points from a team's last `window` matches, rebuilt from its cache entry
+
+    form_timeline stores the points total of the window before each match,
+    so consecutive entries give each match's points one by one; the last
+    match's points come from the season totals.
+    """
+    totals = [round(t['form_score'] * t['matches_used']) for t in timeline]
+    points = []
+    for k in range(1, len(timeline)):
+        dropped = points[k - 1 - window] if k - 1 >= window else 0
+        points.append(totals[k] - totals[k - 1] + dropped)
+    if timeline:
+        season_points = 3 * stats.get('wins', 0) + stats.get('draws', 0)
+        points.append(season_points - sum(points))
+    return points[-window:]
+
+
+class FormCacheUpdater:
+    """Applies newly finished matches to an existing form cache
+
+    Keeps running win/draw/loss counts and a rolling points window per team,
+    so each match only touches its two teams. Every applied match is
+    appended to the log next to the cache (form_cache.log.jsonl), where
+    CachedFormCalculator and ModelServer pick it up without rereading the
+    cache; compact() folds the log back into form_cache.json.
+    """
+    def __init__(self, cache_file='form_cache.json', window=5):
+        self.cache_file = cache_file
+        self.log_file = log_path(cache_file)
+        self.window = window
+        with open(cache_file, 'r') as f:
+            self.cache = json.load(f)
+
+        # Ids of logged matches; matches without one are only deduplicated by date
+        self.applied_ids = set()
+        entries, _ = read_entries(self.log_file)
+        for entry in entries:
+            apply_entry(self.cache, entry)
+            if entry.get('match_id') is not None:
+                self.applied_ids.add(entry['match_id'])
+
+        self.windows = {
+            name: deque(recent_points(team['form_timeline'], team['season_stats'], window), maxlen=window)
+            for name, team in self.cache.get('teams', {}).items()
+        }
+
+    def is_new(self, match):
+        """Finished and later than anything either team already has"""
+        if match.winner is None:
+            return False
+        if match.match_id is not None and match.match_id in self.applied_ids:
+            return False
+        teams = self.cache.get('teams', {})
+        for name in (match.home_team, match.away_team):
+            timeline = teams.get(name, {}).get('form_timeline')
+            if timeline and timeline[-1]['date'] >= match.date:
+                return False
+        return True
+
+    def team_update(self, name, match):
+        """New cache values for one team after a match"""
+        team = self.cache.get('teams', {}).get(name, {})
+        timeline = team.get('form_timeline', [])
+        stats = team.get('season_stats', {})
+        window = self.windows.setdefault(name, deque(maxlen=self.window))
+
+        timeline_entry = {
+            'after_match': len(timeline) + 1,
+            'date': match.date,
+            'form_score': sum(window) / len(window) if window else 0.0,
+            'matches_used': len(window)
+        }
+        result = match.result_for(name)
+        window.append(POINTS[result])
+
+        if len(timeline) < REPRESENTATIVE_END:
+            score = representative_form(timeline + [timeline_entry])
+        else:
+            score = team['representative_form']['score']
+
+        return {
+            'season_stats': season_stats(
+                stats.get('matches', 0) + 1,
+                stats.get('wins', 0) + (result == 'WIN'),
+                stats.get('draws', 0) + (result == 'DRAW'),
+                stats.get('losses', 0) + (result == 'LOSS')),
+            'representative_form': {'score': score, 'description': 'Average form from mid-season period'},
+            'timeline_entry': timeline_entry
+        }
+
+    def apply_match(self, match):
+        """Apply one match in memory
+
+        Returns:
+            dict: the log entry, or None if the match is unfinished or already in the cache
+        """
+        if not self.is_new(match):
+            return None
+
+        teams = dict.fromkeys((match.home_team, match.away_team))
+        entry = {
+            'match_id': match.match_id,
+            'date': match.date,
+            'teams': {name: self.team_update(name, match) for name in teams}
+        }
+        metadata = self.cache.get('metadata', {})
+        entry['metadata'] = {
+            'updated_date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'total_matches': metadata.get('total_matches', 0) + 1,
+            'total_teams': len(set(self.cache.get('teams', {})) | set(teams))
+        }
+        apply_entry(self.cache, entry)
+        if match.match_id is not None:
+            self.applied_ids.add(match.match_id)
+        return entry
+
+    def apply_matches(self, matches):
+        """Apply finished matches in date order and append them to the log
+
+        Args:
+            matches (iterable): Match records or football-data.org / ESPN match dicts
+
+        Returns:
+            int: number of matches applied
+        """
+        records = (m if isinstance(m, Match) else Match.from_dict(m) for m in matches)
+        entries = [entry for entry in map(self.apply_match, sorted(records, key=lambda m: m.date)) if entry]
+        append_entries(self.log_file, entries)
+        return len(entries)
+
+    def compact(self):
+        """Rewrite form_cache.json (and its columnar store) with every update and clear the log"""
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(self.cache, f, indent=2)
+        os.replace(tmp_file, self.cache_file)
+
+        store = columnar_path(self.cache_file)
+        if os.path.isdir(store):
+            FormCacheColumns.from_cache(self.cache).save(store)
+        if os.path.exists(self.log_file):
+            os.remove(self.log_file)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Apply newly finished matches to the form cache")
+    arg_parser.add_argument('matches', help="JSON or JSON Lines file of finished matches")
+    arg_parser.add_argument('--cache', default='../models/form_cache.json')
+    arg_parser.add_argument('--compact', action='store_true', help="fold the update log into the cache file")
+    args = arg_parser.parse_args()
+
+    updater = FormCacheUpdater(args.cache)
+    applied = updater.apply_matches(iter_matches(args.matches, slim=False))
+    print(f"Applied {applied} new matches to {args.cache}")
+    if args.compact:
+        updater.compact()
+        print("Update log compacted into the cache file")
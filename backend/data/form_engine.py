@@ -0,0 +1,114 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.match_record import AWAY_WIN, DRAW, HOME_WIN, MatchTable
+
+
+class FormEngine:
+    """Columnar form calculations over Match records or a MatchTable
+
+    Every match is loaded once into flat arrays with one row per team
+    appearance (two per match), sorted by team and then date. Season stats
+    and rolling form windows for all teams come from bincounts and a single
+    cumulative sum instead of per-team scans of the match list.
+    """
+    def __init__(self, matches):
+        self.teams = []
+        self.team_ids = {}
+        self.build(matches if isinstance(matches, MatchTable) else MatchTable.from_matches(matches))
+
+    def build(self, table):
+        """Load a MatchTable into per-appearance arrays"""
+        self.teams = sorted(table.teams)
+        self.team_ids = {name: i for i, name in enumerate(self.teams)}
+        # Table ids are in first-seen order, engine ids in name order
+        remap = np.array([self.team_ids[name] for name in table.teams], dtype=np.int32)
+
+        # Row order is match order with home before away, which is the order
+        # get_team_matches_chronological visits matches before sorting
+        n = len(table)
+        team = np.empty(2 * n, dtype=np.int32)
+        team[0::2] = remap[table.home]
+        team[1::2] = remap[table.away]
+        dates = np.repeat(table.date, 2)
+
+        wins = np.zeros(2 * n, dtype=np.int8)
+        draws = np.zeros(2 * n, dtype=np.int8)
+        losses = np.zeros(2 * n, dtype=np.int8)
+        draws[0::2] = draws[1::2] = table.outcome == DRAW
+        wins[0::2] = losses[1::2] = table.outcome == HOME_WIN
+        wins[1::2] = losses[0::2] = table.outcome == AWAY_WIN
+
+        # Drop the away row of a team playing itself so it is counted once
+        keep = np.ones(2 * n, dtype=bool)
+        keep[1::2] = team[0::2] != team[1::2]
+
+        # Stable sorts keep match order for equal dates, same as list.sort
+        order = np.flatnonzero(keep)
+        order = order[np.argsort(dates[order], kind='stable')]
+        order = order[np.argsort(team[order], kind='stable')]
+
+        self.team = team[order]
+        self.dates = dates[order]
+        self.wins = wins[order]
+        self.draws = draws[order]
+        self.losses = losses[order]
+        self.points = 3 * self.wins.astype(np.int64) + self.draws
+
+        counts = np.bincount(self.team, minlength=len(self.teams))
+        self.team_start = np.zeros(len(self.teams) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.team_start[1:])
+        # Position of each row within its own team's chronological list
+        self.match_number = np.arange(len(self.team)) - self.team_start[self.team]
+        self.cumulative_points = np.concatenate(([0], np.cumsum(self.points)))
+
+    def season_stats(self):
+        """Matches, wins, draws and losses per team id"""
+        size = len(self.teams)
+        return {
+            'matches': np.diff(self.team_start),
+            'wins': np.bincount(self.team, weights=self.wins, minlength=size).astype(np.int64),
+            'draws': np.bincount(self.team, weights=self.draws, minlength=size).astype(np.int64),
+            'losses': np.bincount(self.team, weights=self.losses, minlength=size).astype(np.int64),
+        }
+
+    def rolling_form(self, window=5):
+        """Form before every appearance from the previous `window` matches
+
+        Returns (form_score, matches_used) arrays aligned with self.team.
+        """
+        rows = np.arange(len(self.team))
+        matches_used = np.minimum(self.match_number, window)
+        points = self.cumulative_points[rows] - self.cumulative_points[rows - matches_used]
+        form_score = np.zeros(len(rows), dtype=np.float64)
+        np.divide(points, matches_used, out=form_score, where=matches_used > 0)
+        return form_score, matches_used
+
+    def team_rows(self, team_name):
+        """Slice of rows belonging to a team"""
+        team_id = self.team_ids.get(team_name)
+        if team_id is None:
+            return slice(0, 0)
+        return slice(int(self.team_start[team_id]), int(self.team_start[team_id + 1]))
+
+    def form_timelines(self, window=5):
+        """Form timeline entries for every team, keyed by team name"""
+        form_score, matches_used = self.rolling_form(window)
+        form_score = form_score.tolist()
+        matches_used = matches_used.tolist()
+        match_number = self.match_number.tolist()
+        dates = self.dates.tolist()
+
+        timelines = {}
+        for team_name in self.teams:
+            rows = range(*self.team_rows(team_name).indices(len(dates)))
+            timelines[team_name] = [{
+                'after_match': match_number[row] + 1,
+                'date': dates[row],
+                'form_score': form_score[row],
+                'matches_used': matches_used[row]
+            } for row in rows]
+        return timelines
@@ -0,0 +1,64 @@
+"""Production serving with gunicorn: gunicorn -c backend/gunicorn.conf.py app:app
+
+The master process imports the app and builds the prediction model,
+form cache snapshot and match database before forking workers, so every
+worker starts serving at once and shares those pages copy-on-write
+instead of loading its own copy. gc.freeze() moves everything loaded so
+far out of the collector's reach, otherwise the first collection in
+each worker would write to (and so copy) every shared object.
+
+Signals:
+    HUP    graceful reload: new workers are forked from the master and
+           old ones finish their requests first. Model, form cache, Elo,
+           matchup and outcome model files are reloaded by each worker's
+           watcher when they change, no signal needed.
+    USR2   start a new master on new code, then TERM the old one, for a
+           deploy without dropped connections.
+    TERM   graceful shutdown within graceful_timeout.
+
+Metrics from GET /metrics are per worker, for whichever one answers.
+"""
+import gc
+import multiprocessing
+import os
+
+# Runs from backend/ wherever gunicorn is started, so app:app and the model paths resolve
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+# /api/predict is CPU bound in-process, /api/teams waits on football-data.org,
+# so one process per core plus one, each with a few threads for the waits
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+preload_app = True
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then, staggered so they never restart together
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG')
+errorlog = '-'
+
+
+def when_ready(server):
+    """Master, app loaded: build the services and freeze the heap before the first fork"""
+    from app import app
+
+    app.extensions['services'].warm_up()
+    gc.collect()
+    gc.freeze()
+    server.log.info("Services loaded in the master, %d objects frozen for copy-on-write", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    """Worker: restart threads and drop connections inherited from the master"""
+    from app import app
+
+    app.extensions['services'].after_fork()
+    profiler = app.extensions.get('profiler')
+    if profiler is not None:
+        profiler.start()
@@ -0,0 +1,341 @@
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from elo_ratings import EloRatings
+from goals_model import DixonColesModel
+from match_index import TeamMatchIndex
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.columnar_store import load_matches
+from utils.match_record import OUTCOME_CODES
+
+OUTCOME_NAMES = ('HOME_WIN', 'DRAW', 'AWAY_WIN')
+# Probabilities are clipped before taking logs so one impossible outcome doesn't give inf
+LOG_EPSILON = 1e-15
+
+DEFAULT_GRIDS = {
+    'base': {},
+    'form': {'window': [3, 5, 8], 'bucket': [0.25, 0.5]},
+    'elo': {'k_factor': [20.0, 30.0], 'bucket': [25.0, 50.0]},
+    'goals': {'decay': [0.0019, 0.005]},
+}
+
+
+def param_grid(model, **params):
+    """Every combination of the given parameter lists as backtest configs
+
+    param_grid('form', window=[3, 5], bucket=[0.25]) ->
+    [{'model': 'form', 'window': 3, 'bucket': 0.25}, {'model': 'form', 'window': 5, ...}]
+    """
+    names = sorted(params)
+    return [dict(zip(names, values), model=model) for values in itertools.product(*(params[n] for n in names))]
+
+
+def matchweeks(dates):
+    """Matchweek number per ISO date, weeks running Tuesday to Monday
+
+    Keeps a Friday-to-Monday round of fixtures in one matchweek.
+    """
+    days = np.array([date[:10] for date in dates], dtype='datetime64[D]').astype(np.int64)
+    # 1970-01-01 was a Thursday, so +2 moves the week boundary to Tuesday
+    return (days + 2) // 7
+
+
+def score_predictions(probs, outcomes, bins=10):
+    """Log loss, Brier score, accuracy and calibration curves
+
+    Args:
+        probs (array): (n, 3) home/draw/away probabilities
+        outcomes (array): outcome codes 0 home win, 1 draw, 2 away win
+        bins (int, optional): calibration bins over [0, 1]. Defaults to 10.
+    """
+    n = len(outcomes)
+    if not n:
+        return {'matches': 0}
+    actual = np.zeros_like(probs)
+    actual[np.arange(n), outcomes] = 1
+    p_true = np.clip(probs[np.arange(n), outcomes], LOG_EPSILON, 1.0)
+
+    calibration = {}
+    edges = np.linspace(0, 1, bins + 1)
+    for code, name in enumerate(OUTCOME_NAMES):
+        index = np.clip(np.digitize(probs[:, code], edges) - 1, 0, bins - 1)
+        counts = np.bincount(index, minlength=bins)
+        predicted = np.bincount(index, weights=probs[:, code], minlength=bins)
+        observed = np.bincount(index, weights=actual[:, code], minlength=bins)
+        calibration[name] = [
+            {'bin': f"{edges[b]:.1f}-{edges[b + 1]:.1f}", 'predicted': predicted[b] / counts[b],
+             'observed': observed[b] / counts[b], 'count': int(counts[b])}
+            for b in range(bins) if counts[b]
+        ]
+
+    return {
+        'matches': n,
+        'log_loss': float(-np.log(p_true).mean()),
+        'brier': float(((probs - actual) ** 2).sum(axis=1).mean()),
+        'accuracy': float((probs.argmax(axis=1) == outcomes).mean()),
+        'calibration': calibration,
+    }
+
+
+class Backtester:
+    """Walk-forward replay of the match history for one model config
+
+    Matches are replayed chronologically one matchweek at a time. Every
+    match is predicted from what was known before its matchweek (bucket
+    tables, goals model fit) plus team features as of kick-off (form from
+    TeamMatchIndex, pre-match Elo ratings); the week's results are then
+    added and the model updated. Nothing from a match's own week or later
+    is used for its prediction.
+
+    Bucket models (form, elo) are the 0.25-bucket model from
+    ProbabilityAnalyzer.analyze_form_impact generalised to any feature:
+    outcome counts per rounded feature difference, base rates for buckets
+    with fewer than min_samples matches.
+    """
+    def __init__(self, matches, min_samples=5):
+        self.matches = sorted(matches, key=lambda m: m.date)
+        self.min_samples = min_samples
+        self.outcomes = np.array([OUTCOME_CODES.get(m.winner, -1) for m in self.matches], dtype=np.int64)
+        self.seasons = np.array([str(m.season) for m in self.matches], dtype=object)
+        self.weeks = matchweeks([m.date for m in self.matches])
+        self.week_starts = np.flatnonzero(np.diff(self.weeks, prepend=self.weeks[0] - 1))
+        self.match_index = None
+        self.features = {}
+
+    def form_difference(self, window):
+        """Home minus away form going into every match, NaN with under 3 games"""
+        key = ('form', window)
+        if key not in self.features:
+            if self.match_index is None:
+                self.match_index = TeamMatchIndex(self.matches)
+            form_before = self.match_index.form_before
+            diffs = []
+            for m in self.matches:
+                home_form = form_before(m.home_team, m.date, window, min_games=3)
+                away_form = form_before(m.away_team, m.date, window, min_games=3)
+                diffs.append(np.nan if home_form is None or away_form is None else home_form - away_form)
+            # Rounded like analyze_form_impact so float noise doesn't move buckets
+            self.features[key] = np.round(np.array(diffs, dtype=np.float64), 2)
+        return self.features[key]
+
+    def rating_difference(self, k_factor):
+        """Home minus away Elo rating going into every match, from one online pass"""
+        key = ('elo', k_factor)
+        if key not in self.features:
+            elo = EloRatings(k_factor=k_factor)
+            diffs = []
+            for m in self.matches:
+                before = elo.update(m)
+                diffs.append(np.nan if before is None else before[0] - before[1])
+            self.features[key] = np.array(diffs, dtype=np.float64)
+        return self.features[key]
+
+    def feature(self, config):
+        if config['model'] == 'form':
+            return self.form_difference(config['window'])
+        if config['model'] == 'elo':
+            return self.rating_difference(config['k_factor'])
+        return None
+
+    def weeks_to_predict(self, season=None):
+        """(start, end) row ranges of the matchweeks to score"""
+        ends = np.append(self.week_starts[1:], len(self.matches))
+        for start, end in zip(self.week_starts.tolist(), ends.tolist()):
+            if season is None or season in self.seasons[start:end]:
+                yield start, end
+
+    def run(self, config, season=None):
+        """Walk forward and predict every scored match
+
+        Args:
+            config (dict): 'model' plus its parameters, see param_grid()
+            season (str, optional): only score this season's matches (one
+                fold); earlier matches still train the model.
+
+        Returns:
+            (probs, outcomes): (n, 3) predictions and outcome codes of the
+            scored matches with a result
+        """
+        if config['model'] == 'goals':
+            return self.run_goals(config, season)
+
+        feature = self.feature(config)
+        totals = np.zeros(3)
+        counts = bucket_ids = None
+        if feature is not None:
+            buckets = np.rint(feature / config['bucket'])
+            has_bucket = ~np.isnan(buckets)
+            lowest = np.nanmin(buckets) if has_bucket.any() else 0.0
+            bucket_ids = np.where(has_bucket, buckets - lowest, -1).astype(np.int64)
+            counts = np.zeros((bucket_ids.max() + 1, 3))
+
+        scored_probs, scored_outcomes = [], []
+        trained = 0
+        for start, end in self.weeks_to_predict(season):
+            # Results from before this matchweek go into the running counts
+            train = np.arange(trained, start)
+            train = train[self.outcomes[train] >= 0]
+            np.add.at(totals, self.outcomes[train], 1)
+            if counts is not None:
+                train = train[bucket_ids[train] >= 0]
+                np.add.at(counts, (bucket_ids[train], self.outcomes[train]), 1)
+            trained = start
+
+            rows = self.scored_rows(start, end, season)
+            probs = np.tile(totals / totals.sum() if totals.sum() else np.full(3, 1 / 3), (len(rows), 1))
+            if counts is not None:
+                ids = bucket_ids[rows]
+                bucket_counts = counts[np.maximum(ids, 0)]
+                sizes = bucket_counts.sum(axis=1)
+                use = (ids >= 0) & (sizes >= self.min_samples)
+                probs[use] = bucket_counts[use] / sizes[use, None]
+            scored_probs.append(probs)
+            scored_outcomes.append(self.outcomes[rows])
+
+        if not scored_probs:
+            return np.empty((0, 3)), np.empty(0, dtype=np.int64)
+        return np.concatenate(scored_probs), np.concatenate(scored_outcomes)
+
+    def scored_rows(self, start, end, season=None):
+        """Rows of a matchweek with a result, from `season` only when given"""
+        rows = np.arange(start, end)
+        keep = self.outcomes[rows] >= 0
+        if season is not None:
+            keep &= self.seasons[rows] == season
+        return rows[keep]
+
+    def run_goals(self, config, season=None):
+        """Walk forward with the Dixon-Coles model refitted before each matchweek
+
+        Each refit starts from the previous week's parameters.
+        """
+        scored_probs, scored_outcomes = [], []
+        model = DixonColesModel(decay=config['decay'])
+        for start, end in self.weeks_to_predict(season):
+            rows = self.scored_rows(start, end, season)
+            history = self.outcomes[:start]
+            if not len(rows) or not (history >= 0).any():
+                continue
+            model.fit(self.matches[:start], warm_start=True)
+            counts = np.bincount(history[history >= 0], minlength=3)
+            base = counts / counts.sum()
+            arrays = model.predict_arrays([self.matches[r].home_team for r in rows],
+                                          [self.matches[r].away_team for r in rows])
+            probs = np.column_stack([arrays['home_win'], arrays['draw'], arrays['away_win']])
+            unknown = np.isnan(probs).any(axis=1)
+            probs[unknown] = base
+            scored_probs.append(probs / probs.sum(axis=1, keepdims=True))
+            scored_outcomes.append(self.outcomes[rows])
+
+        if not scored_probs:
+            return np.empty((0, 3)), np.empty(0, dtype=np.int64)
+        return np.concatenate(scored_probs), np.concatenate(scored_outcomes)
+
+
+# Each worker process builds its Backtester once and reuses its feature cache
+_worker_backtester = None
+
+
+def _init_worker(matches, min_samples):
+    global _worker_backtester
+    _worker_backtester = Backtester(matches, min_samples)
+
+
+def _run_fold(config, season):
+    probs, outcomes = _worker_backtester.run(config, season)
+    return config, season, probs, outcomes
+
+
+def run_grid(matches, configs, test_seasons=None, warmup_seasons=1, workers=None, min_samples=5):
+    """Backtest every config on every test season (fold) over a process pool
+
+    Args:
+        matches (list): Match records
+        configs (list): backtest configs, see param_grid()
+        test_seasons (list, optional): seasons to score. Defaults to every
+            season after the first `warmup_seasons`.
+        workers (int, optional): processes, 1 to run in this process
+
+    Returns:
+        list: one dict per config with overall and per-fold scores, best log loss first
+    """
+    seasons = sorted({str(m.season) for m in matches})
+    if test_seasons is None:
+        test_seasons = seasons[warmup_seasons:]
+    tasks = [(config, season) for config in configs for season in test_seasons]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(matches, min_samples)
+        fold_results = [_run_fold(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker,
+                                 initargs=(matches, min_samples)) as executor:
+            fold_results = list(executor.map(_run_fold, *zip(*tasks)))
+
+    results = []
+    for i, config in enumerate(configs):
+        folds = fold_results[i * len(test_seasons):(i + 1) * len(test_seasons)]
+        probs = np.concatenate([f[2] for f in folds])
+        outcomes = np.concatenate([f[3] for f in folds])
+        scores = score_predictions(probs, outcomes)
+        scores['config'] = config
+        scores['folds'] = {season: {k: v for k, v in score_predictions(p, o).items() if k != 'calibration'}
+                           for _, season, p, o in folds}
+        results.append(scores)
+    return sorted(results, key=lambda r: r.get('log_loss', float('inf')))
+
+
+def describe_config(config):
+    params = ', '.join(f"{k}={v}" for k, v in sorted(config.items()) if k != 'model')
+    return f"{config['model']}({params})"
+
+
+def print_results(results):
+    print(f"{'Model':<36} | {'Log loss':>8} | {'Brier':>6} | {'Acc.':>6} | {'Matches':>7}")
+    print("-" * 76)
+    for result in results:
+        print(f"{describe_config(result['config']):<36} | {result['log_loss']:8.4f} | "
+              f"{result['brier']:6.4f} | {result['accuracy']:6.1%} | {result['matches']:7}")
+
+
+def print_calibration(result):
+    print(f"\nCalibration of {describe_config(result['config'])}:")
+    for name, curve in result['calibration'].items():
+        print(f"  {name}: " + ', '.join(f"{b['bin']}: {b['predicted']:.2f}->{b['observed']:.2f} ({b['count']})"
+                                        for b in curve))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Walk-forward backtest of the prediction models")
+    arg_parser.add_argument('data', nargs='?', default='premier_league_historical.json',
+                            help="historical match data, JSON or JSON Lines")
+    arg_parser.add_argument('--models', nargs='+', default=list(DEFAULT_GRIDS), choices=list(DEFAULT_GRIDS))
+    arg_parser.add_argument('--window', type=int, nargs='+', help="form windows to try")
+    arg_parser.add_argument('--bucket', type=float, nargs='+', help="form bucket widths to try")
+    arg_parser.add_argument('--warmup-seasons', type=int, default=1, help="seasons only used for training")
+    arg_parser.add_argument('--workers', type=int, default=None, help="processes, 1 for serial")
+    args = arg_parser.parse_args()
+
+    history = load_matches(args.data)
+    grid = []
+    for model_name in args.models:
+        params = dict(DEFAULT_GRIDS[model_name])
+        if model_name == 'form':
+            params['window'] = args.window or params['window']
+            params['bucket'] = args.bucket or params['bucket']
+        grid.extend(param_grid(model_name, **params))
+
+    started = time.perf_counter()
+    backtest_results = run_grid(history, grid, warmup_seasons=args.warmup_seasons, workers=args.workers)
+    print(f"Backtested {len(grid)} configs in {time.perf_counter() - started:.1f}s\n")
+    print_results(backtest_results)
+    print_calibration(backtest_results[0])
@@ -1,8 +1,62 @@
 import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.columnar_store import META_FILE, FormCacheColumns, columnar_path, fresh_store
+from utils.form_cache_log import apply_entry, log_path, read_entries
 
 class CachedFormCalculator:
     def __init__(self, cache_file='form_cache.json'):
-        self.cache = self.load_cache(cache_file)
+        self.cache_file = cache_file
+        self.log_file = log_path(cache_file)
+        self.load()
+    
+    def load(self):
+        """Load the cache file, then any updates in its log"""
+        # Prefer the memory-mapped columnar store built by utils/columnar_store.py
+        store = fresh_store(self.cache_file)
+        self.columns = FormCacheColumns.load(store) if store else None
+        self._cache = None if self.columns else self.load_cache(self.cache_file)
+        self.cache_version = self.file_version()
+        # Latest season_stats / representative_form per team from the update log
+        self.updates = {}
+        self.log_entries = []
+        self.log_offset = 0
+        self.read_log()
+    
+    def file_version(self):
+        paths = (self.cache_file, os.path.join(columnar_path(self.cache_file), META_FILE))
+        return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in paths)
+    
+    def read_log(self):
+        entries, self.log_offset = read_entries(self.log_file, self.log_offset)
+        for entry in entries:
+            self.updates.update(entry['teams'])
+            self.log_entries.append(entry)
+            if self._cache is not None:
+                apply_entry(self._cache, entry)
+    
+    def refresh(self):
+        """Pick up matches FormCacheUpdater appended since the last lookup
+
+        Only the new log lines are read. A rewritten cache file (after
+        FormCacheUpdater.compact or a rebuild) is loaded from scratch.
+        """
+        if self.file_version() != self.cache_version:
+            self.load()
+        elif os.path.exists(self.log_file) and os.path.getsize(self.log_file) != self.log_offset:
+            self.read_log()
+    
+    @property
+    def cache(self):
+        """Form cache dict, rebuilt from the columnar store on first use"""
+        if self._cache is None:
+            self._cache = self.columns.to_cache()
+            for entry in self.log_entries:
+                apply_entry(self._cache, entry)
+        return self._cache
     
     def load_cache(self, filename):
         """Load pre-built form cache"""
@@ -15,12 +69,23 @@ class CachedFormCalculator:
     
     def get_team_form(self, team_name):
         """Get team's representative form score"""
+        self.refresh()
+        if team_name in self.updates:
+            return self.updates[team_name]['representative_form']['score']
+        if self.columns is not None:
+            form = self.columns.team_form(team_name)
+            return 0.0 if form is None else form
         if team_name in self.cache.get('teams', {}):
             return self.cache['teams'][team_name]['representative_form']['score']
         return 0.0
     
     def get_team_season_stats(self, team_name):
         """Get full season statistics"""
+        self.refresh()
+        if team_name in self.updates:
+            return self.updates[team_name]['season_stats']
+        if self.columns is not None:
+            return self.columns.season_stats(team_name)
         if team_name in self.cache.get('teams', {}):
             return self.cache['teams'][team_name]['season_stats']
         return None
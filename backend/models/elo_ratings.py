@@ -0,0 +1,271 @@
+import argparse
+import json
+import os
+import sys
+from bisect import bisect_left
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.match_record import Match, team_key
+from utils.match_stream import iter_matches
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RATINGS_FILE = os.path.join(MODELS_DIR, 'elo_ratings.json')
+
+INITIAL_RATING = 1500.0
+SCORES = {'HOME_TEAM': 1.0, 'DRAW': 0.5, 'AWAY_TEAM': 0.0}
+
+
+def expected_score(rating_diff):
+    """Expected score (win = 1, draw = 0.5) for a side rated rating_diff above its opponent"""
+    return 1.0 / (1.0 + 10.0 ** (-rating_diff / 400.0))
+
+
+def goal_weight(home_goals, away_goals):
+    """K multiplier for the margin of victory (World Football Elo weighting)"""
+    if home_goals is None or away_goals is None:
+        return 1.0
+    margin = abs(home_goals - away_goals)
+    if margin <= 1:
+        return 1.0
+    if margin == 2:
+        return 1.5
+    return (11.0 + margin) / 8.0
+
+
+class EloRatings:
+    """Online Elo ratings with home advantage and goal difference weighting
+
+    Ratings live in a numpy array indexed by team id, so each match is an
+    O(1) update of two cells and a season is one pass over its matches.
+    Matches must arrive in date order, as espn_json_parser.py writes them.
+    At the start of each season ratings are pulled back towards the
+    league mean by season_carryover.
+
+    Every change is also recorded per team (date, rating after), which is
+    the snapshot index behind rating_as_of() point-in-time queries.
+    """
+    def __init__(self, k_factor=20.0, home_advantage=60.0, season_carryover=0.8,
+                 initial_rating=INITIAL_RATING):
+        self.k_factor = k_factor
+        self.home_advantage = home_advantage
+        self.season_carryover = season_carryover
+        self.initial_rating = initial_rating
+
+        self.teams = []
+        self.team_ids = {}
+        self.ratings = np.empty(0, dtype=np.float64)
+        self.matches_played = np.empty(0, dtype=np.int64)
+        self.history_dates = []
+        self.history_ratings = []
+
+        self.season = None
+        self.last_date = None
+        self.total_matches = 0
+
+    def team_id(self, team_name):
+        """Id of a team, None if it has never been rated"""
+        return self.team_ids.get(team_key(team_name))
+
+    def intern(self, team_name):
+        """Id for a team, giving it the initial rating on first sight"""
+        key = team_key(team_name)
+        team_id = self.team_ids.get(key)
+        if team_id is None:
+            team_id = self.team_ids[key] = len(self.teams)
+            self.teams.append(team_name)
+            if team_id == len(self.ratings):
+                # Grow the arrays by doubling so adding teams stays amortized O(1)
+                size = max(2 * len(self.ratings), 32)
+                self.ratings = np.resize(self.ratings, size)
+                self.matches_played = np.resize(self.matches_played, size)
+            self.ratings[team_id] = self.initial_rating
+            self.matches_played[team_id] = 0
+            self.history_dates.append([])
+            self.history_ratings.append([])
+        return team_id
+
+    def start_season(self, season, date):
+        """Regress every rating towards the mean at a season boundary"""
+        self.season = season
+        n_teams = len(self.teams)
+        if not n_teams or self.season_carryover == 1.0:
+            return
+        ratings = self.ratings[:n_teams]
+        ratings[:] = ratings.mean() + self.season_carryover * (ratings - ratings.mean())
+        # Date-only stamp sorts before every kick-off that day
+        day = date[:10]
+        for team_id, rating in enumerate(ratings.tolist()):
+            self.history_dates[team_id].append(day)
+            self.history_ratings[team_id].append(rating)
+
+    def update(self, match):
+        """Apply one finished match
+
+        Returns:
+            tuple: (home rating, away rating) before the match, None for a
+            match without a result
+        """
+        score = SCORES.get(match.winner)
+        if score is None:
+            return None
+        if self.last_date is not None and match.date < self.last_date:
+            raise ValueError(f"Match on {match.date} is older than the last rated match ({self.last_date})")
+        # ESPN seasons are ints, football-data.org ones strings
+        season = None if match.season is None else str(match.season)
+        if season is not None and season != self.season:
+            self.start_season(season, match.date)
+
+        home = self.intern(match.home_team)
+        away = self.intern(match.away_team)
+        home_rating = float(self.ratings[home])
+        away_rating = float(self.ratings[away])
+
+        expected = expected_score(home_rating + self.home_advantage - away_rating)
+        change = self.k_factor * goal_weight(match.home_goals, match.away_goals) * (score - expected)
+        self.ratings[home] += change
+        self.ratings[away] -= change
+        self.matches_played[home] += 1
+        self.matches_played[away] += 1
+
+        for team_id in (home, away):
+            self.history_dates[team_id].append(match.date)
+            self.history_ratings[team_id].append(float(self.ratings[team_id]))
+        self.last_date = match.date
+        self.total_matches += 1
+        return home_rating, away_rating
+
+    def process(self, matches):
+        """Apply an iterable of Match records or match dicts in one pass
+
+        Returns:
+            int: number of matches rated
+        """
+        rated = 0
+        for match in matches:
+            if not isinstance(match, Match):
+                match = Match.from_dict(match)
+            if self.update(match) is not None:
+                rated += 1
+        return rated
+
+    def rating(self, team_name):
+        """Current rating, None for an unrated team"""
+        team_id = self.team_id(team_name)
+        return None if team_id is None else float(self.ratings[team_id])
+
+    def rating_as_of(self, team_name, date):
+        """Rating going into `date`, from changes strictly before it
+
+        None if the team had not played by then.
+        """
+        team_id = self.team_id(team_name)
+        if team_id is None:
+            return None
+        position = bisect_left(self.history_dates[team_id], date)
+        return self.history_ratings[team_id][position - 1] if position else None
+
+    def ratings_as_of(self, date):
+        """Every team's rating going into `date`, keyed by team name"""
+        ratings = {}
+        for team_name in self.teams:
+            rating = self.rating_as_of(team_name, date)
+            if rating is not None:
+                ratings[team_name] = rating
+        return ratings
+
+    def win_expectancy(self, home_team, away_team):
+        """Home side's expected score from current ratings, None if either is unrated"""
+        home_rating, away_rating = self.rating(home_team), self.rating(away_team)
+        if home_rating is None or away_rating is None:
+            return None
+        return expected_score(home_rating + self.home_advantage - away_rating)
+
+    def to_dict(self):
+        """Current ratings and parameters, the elo_ratings.json format"""
+        return {
+            'parameters': {
+                'k_factor': self.k_factor,
+                'home_advantage': self.home_advantage,
+                'season_carryover': self.season_carryover,
+                'initial_rating': self.initial_rating
+            },
+            'metadata': {
+                'season': self.season,
+                'last_date': self.last_date,
+                'total_matches': self.total_matches
+            },
+            'teams': {
+                team_name: {
+                    'rating': float(self.ratings[team_id]),
+                    'matches': int(self.matches_played[team_id])
+                }
+                for team_id, team_name in enumerate(self.teams)
+            }
+        }
+
+    def save(self, path=DEFAULT_RATINGS_FILE):
+        tmp_file = path + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_file, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_RATINGS_FILE):
+        """Ratings saved by save(), ready to take further matches
+
+        The history behind rating_as_of() is not saved, so as-of queries
+        only cover matches processed after loading.
+        """
+        with open(path, 'r') as f:
+            data = json.load(f)
+        ratings = cls(**data.get('parameters', {}))
+        for team_name, team in data.get('teams', {}).items():
+            team_id = ratings.intern(team_name)
+            ratings.ratings[team_id] = team['rating']
+            ratings.matches_played[team_id] = team.get('matches', 0)
+        metadata = data.get('metadata', {})
+        ratings.season = metadata.get('season')
+        ratings.last_date = metadata.get('last_date')
+        ratings.total_matches = metadata.get('total_matches', 0)
+        return ratings
+
+
+def build_ratings(data_file, **params):
+    """Rate every match of a historical data file in one streaming pass"""
+    ratings = EloRatings(**params)
+    ratings.process(iter_matches(data_file))
+    return ratings
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Build Elo ratings from historical match data")
+    arg_parser.add_argument('data', nargs='?', default='premier_league_historical.json',
+                            help="espn_json_parser.py output, JSON or JSON Lines")
+    arg_parser.add_argument('--output', default=DEFAULT_RATINGS_FILE)
+    arg_parser.add_argument('--update', action='store_true',
+                            help="continue from the ratings in --output instead of starting over")
+    arg_parser.add_argument('--k-factor', type=float, default=20.0)
+    arg_parser.add_argument('--home-advantage', type=float, default=60.0)
+    arg_parser.add_argument('--season-carryover', type=float, default=0.8)
+    args = arg_parser.parse_args()
+
+    if args.update:
+        elo = EloRatings.load(args.output)
+        # Only matches after the saved ratings are new
+        new_matches = (m for m in map(Match.from_dict, iter_matches(args.data))
+                       if elo.last_date is None or m.date > elo.last_date)
+        print(f"Rated {elo.process(new_matches)} new matches")
+    else:
+        elo = build_ratings(args.data, k_factor=args.k_factor, home_advantage=args.home_advantage,
+                            season_carryover=args.season_carryover)
+        print(f"Rated {elo.total_matches} matches")
+    elo.save(args.output)
+
+    print(f"{'Team':<28} | {'Rating':>7} | {'Matches':>7}")
+    print("-" * 48)
+    for team_id in np.argsort(-elo.ratings[:len(elo.teams)]):
+        print(f"{elo.teams[team_id]:<28} | {elo.ratings[team_id]:7.1f} | {elo.matches_played[team_id]:7}")
+    print(f"\nRatings saved to {args.output}")
@@ -0,0 +1,309 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.match_record import team_key
+from utils.match_stream import iter_matches
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FEATURE_CACHE_DIR = os.path.join(MODELS_DIR, 'feature_cache')
+# Bump when match_rows() changes so old caches are not reused
+FEATURE_VERSION = 1
+
+# ESPN statistics (displayValue strings) -> per-team numeric columns
+STAT_COLUMNS = {
+    'possession': 'possessionPct',
+    'shots': 'totalShots',
+    'shots_on_target': 'shotsOnTarget',
+    'corners': 'wonCorners',
+    'fouls': 'foulsCommitted',
+}
+# Every column is from the row's team's point of view; missing values are NaN
+MATCH_COLUMNS = ('goals_for', 'goals_against', *STAT_COLUMNS, 'shots_against', 'shots_on_target_against',
+                 'yellow_cards', 'red_cards', 'penalty_goals', 'red_card', 'penalty_scored',
+                 'first_goal_minute')
+CLOCK = re.compile(r"(\d+)'?(?:\s*\+\s*(\d+))?")
+
+
+def parse_stat(value):
+    """ESPN displayValue ('46.3', '8', '46.3%') as a float, NaN if missing or not numeric"""
+    if value is None:
+        return np.nan
+    try:
+        return float(str(value).strip().rstrip('%'))
+    except ValueError:
+        return np.nan
+
+
+def parse_clock(clock):
+    """Event clock ("83'", "90'+2'") as a minute, stoppage time added, NaN if unreadable"""
+    found = CLOCK.match(clock or '')
+    if not found:
+        return np.nan
+    return float(int(found.group(1)) + int(found.group(2) or 0))
+
+
+def match_rows(match):
+    """(2, len(MATCH_COLUMNS)) home and away rows for one ESPN-derived match
+
+    Statistics and match_events come from espn_json_parser.py. Matches
+    without them (e.g. football-data.org) still get goal columns, with the
+    rest NaN so rolling means skip them.
+    """
+    rows = np.full((2, len(MATCH_COLUMNS)), np.nan)
+    score = match.get('score', {})
+    full_time = score.get('fullTime') or {}
+    goals = (parse_stat(score.get('homeScore', full_time.get('home'))),
+             parse_stat(score.get('awayScore', full_time.get('away'))))
+    statistics = match.get('statistics') or {}
+    team_ids = (match['homeTeam'].get('id'), match['awayTeam'].get('id'))
+
+    for side, (name, other) in enumerate((('home', 'away'), ('away', 'home'))):
+        row = dict(goals_for=goals[side], goals_against=goals[1 - side])
+        stats, other_stats = statistics.get(name, {}), statistics.get(other, {})
+        for column, stat in STAT_COLUMNS.items():
+            row[column] = parse_stat(stats.get(stat))
+        row['shots_against'] = parse_stat(other_stats.get('totalShots'))
+        row['shots_on_target_against'] = parse_stat(other_stats.get('shotsOnTarget'))
+
+        if 'match_events' in match:
+            events = [event for event in match['match_events'] if event.get('team_id') == team_ids[side]]
+            goal_minutes = [parse_clock(event.get('clock')) for event in events if event.get('scoring_play')]
+            row['yellow_cards'] = sum(1 for event in events if event.get('yellow_card'))
+            row['red_cards'] = sum(1 for event in events if event.get('red_card'))
+            row['penalty_goals'] = sum(1 for event in events if event.get('scoring_play') and event.get('penalty'))
+            row['red_card'] = float(row['red_cards'] > 0)
+            row['penalty_scored'] = float(row['penalty_goals'] > 0)
+            row['first_goal_minute'] = min(goal_minutes, default=np.nan)
+        rows[side] = [row.get(column, np.nan) for column in MATCH_COLUMNS]
+    return rows
+
+
+def match_date(match):
+    return match.get('date') or match.get('utcDate', '')
+
+
+def match_digest(match):
+    """Hash of every field of a match
+
+    repr() of the parsed dict is nearly twice as fast as json.dumps and as
+    stable for JSON data; a file saved with its keys reordered just hashes
+    differently and rebuilds.
+    """
+    return hashlib.sha256(repr(match).encode('utf-8')).digest()
+
+
+@dataclass(frozen=True)
+class FeatureConfig:
+    """Rolling window settings; every field is part of the cache key"""
+    window: int = 5
+    min_matches: int = 3
+
+    def cache_key(self):
+        config = dict(asdict(self), version=FEATURE_VERSION, columns=MATCH_COLUMNS)
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class FeatureMatrix:
+    """One row per match of both teams' rolling features going into it
+
+    values[i] holds the home team's mean of each MATCH_COLUMNS column over
+    its last `window` matches before match i, then the away team's; NaN
+    while a team has fewer than `min_matches`. raw keeps each match's own
+    (2, len(MATCH_COLUMNS)) home/away rows so a rebuild can carry on from it.
+    """
+    def __init__(self, values, raw, dates, match_ids, home_teams, away_teams):
+        self.columns = [f"{side}_{column}" for side in ('home', 'away') for column in MATCH_COLUMNS]
+        self.values = values
+        self.raw = raw
+        self.dates = dates
+        self.match_ids = match_ids
+        self.home_teams = home_teams
+        self.away_teams = away_teams
+
+    def __len__(self):
+        return len(self.dates)
+
+    def column(self, name):
+        return self.values[:, self.columns.index(name)]
+
+    def team_features(self, team_name):
+        """(dates, (n, len(MATCH_COLUMNS)) rolling features) of one team going into each of its matches"""
+        key = team_key(team_name)
+        home = np.array([team == key for team in self.home_teams], dtype=bool)
+        away = np.array([team == key for team in self.away_teams], dtype=bool)
+        width = len(MATCH_COLUMNS)
+        rows = np.where(home[:, None], self.values[:, :width], self.values[:, width:])[home | away]
+        return [date for date, keep in zip(self.dates, home | away) if keep], rows
+
+
+class FeaturePipeline:
+    """Builds FeatureMatrix objects and caches them on disk
+
+    Cache files are named by the FeatureConfig hash and a hash of the
+    input matches (every field, statistics and events included), so a
+    changed config or changed data never returns stale features. When
+    the data only grew, e.g. a new matchweek appended, the cached file of
+    the same config whose matches are a prefix of the new ones is
+    extended: its raw rows replay the per-team windows and only the new
+    matches are parsed. Any other change rebuilds from scratch.
+    """
+    def __init__(self, config=None, cache_dir=DEFAULT_FEATURE_CACHE_DIR):
+        self.config = config or FeatureConfig()
+        self.cache_dir = cache_dir
+        self.config_key = self.config.cache_key()[:16]
+        self.last_build = {}
+
+    def cache_file(self, data_hash):
+        return os.path.join(self.cache_dir, f"features_{self.config_key}_{data_hash[:16]}.npz")
+
+    def cached_files(self):
+        return glob.glob(os.path.join(self.cache_dir, f"features_{self.config_key}_*.npz"))
+
+    def build(self, matches):
+        """Rolling features for ESPN-derived match dicts, from the cache where possible
+
+        Args:
+            matches (iterable): full (not slim) match dicts, in any order
+
+        Returns:
+            FeatureMatrix: rows in date order
+        """
+        matches = sorted(matches, key=match_date)
+        digest = hashlib.sha256()
+        prefix_hashes = {}
+        for i, match in enumerate(matches):
+            prefix_hashes[i] = digest.hexdigest()
+            digest.update(match_digest(match))
+        data_hash = digest.hexdigest()
+        prefix_hashes[len(matches)] = data_hash
+
+        path = self.cache_file(data_hash)
+        if os.path.exists(path):
+            self.last_build = {'cached': len(matches), 'computed': 0, 'file': path}
+            return self.load(path)
+
+        # Longest cached build that is a prefix of these matches
+        base = None
+        for cached_path in self.cached_files():
+            with np.load(cached_path) as cached:
+                count, cached_hash = int(cached['count']), str(cached['data_hash'])
+            if prefix_hashes.get(count) == cached_hash and (base is None or count > len(base)):
+                base = self.load(cached_path)
+
+        features = self.extend(base, matches[len(base) if base is not None else 0:])
+        self.save(features, path, data_hash)
+        for cached_path in self.cached_files():
+            if cached_path != path:
+                os.remove(cached_path)
+        self.last_build = {'cached': len(base) if base is not None else 0,
+                           'computed': len(matches) - (len(base) if base is not None else 0), 'file': path}
+        return features
+
+    def extend(self, base, new_matches):
+        """FeatureMatrix of base's matches plus new_matches, which must all come later"""
+        width = len(MATCH_COLUMNS)
+        history = {}
+
+        def window(team):
+            if team not in history:
+                history[team] = deque(maxlen=self.config.window)
+            return history[team]
+
+        def rolling(team):
+            recent = history.get(team)
+            if recent is None or len(recent) < self.config.min_matches:
+                return np.full(width, np.nan)
+            stacked = np.array(recent)
+            counts = np.sum(~np.isnan(stacked), axis=0)
+            totals = np.nansum(stacked, axis=0)
+            return np.divide(totals, counts, out=np.full(width, np.nan), where=counts > 0)
+
+        if base is not None:
+            for raw, home, away in zip(base.raw, base.home_teams, base.away_teams):
+                window(home).append(raw[0])
+                window(away).append(raw[1])
+
+        values = np.empty((len(new_matches), 2 * width))
+        raw_rows = np.empty((len(new_matches), 2, width))
+        home_teams, away_teams, dates, match_ids = [], [], [], []
+        for i, match in enumerate(new_matches):
+            home, away = team_key(match['homeTeam']['name']), team_key(match['awayTeam']['name'])
+            values[i, :width] = rolling(home)
+            values[i, width:] = rolling(away)
+            raw_rows[i] = match_rows(match)
+            window(home).append(raw_rows[i, 0])
+            window(away).append(raw_rows[i, 1])
+            home_teams.append(home)
+            away_teams.append(away)
+            dates.append(match_date(match))
+            match_ids.append(str(match.get('_original_id') or match.get('id') or ''))
+
+        if base is None:
+            return FeatureMatrix(values, raw_rows, dates, match_ids, home_teams, away_teams)
+        return FeatureMatrix(np.concatenate([base.values, values]), np.concatenate([base.raw, raw_rows]),
+                             base.dates + dates, base.match_ids + match_ids,
+                             base.home_teams + home_teams, base.away_teams + away_teams)
+
+    def save(self, features, path, data_hash):
+        """Write through a temporary file so an interrupted write never leaves half a cache"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            np.savez(f, values=features.values, raw=features.raw, dates=np.array(features.dates, dtype=str),
+                     match_ids=np.array(features.match_ids, dtype=str),
+                     home_teams=np.array(features.home_teams, dtype=str),
+                     away_teams=np.array(features.away_teams, dtype=str),
+                     count=len(features), data_hash=data_hash)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def load(path):
+        with np.load(path) as cached:
+            return FeatureMatrix(cached['values'], cached['raw'], cached['dates'].tolist(),
+                                 cached['match_ids'].tolist(), cached['home_teams'].tolist(),
+                                 cached['away_teams'].tolist())
+
+
+def build_features(data_file, config=None, cache_dir=DEFAULT_FEATURE_CACHE_DIR):
+    """FeatureMatrix for a historical data file, statistics and events included"""
+    pipeline = FeaturePipeline(config, cache_dir)
+    return pipeline.build(iter_matches(data_file, slim=False)), pipeline
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Build rolling team features from ESPN match statistics")
+    arg_parser.add_argument('data', nargs='?', default='premier_league_historical.json',
+                            help="ESPN-derived JSON or JSON Lines file from espn_json_parser.py")
+    arg_parser.add_argument('--window', type=int, default=5, help="matches per rolling window")
+    arg_parser.add_argument('--min-matches', type=int, default=3)
+    arg_parser.add_argument('--cache-dir', default=DEFAULT_FEATURE_CACHE_DIR)
+    arg_parser.add_argument('--team', help="print this team's latest rolling features")
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    features, pipeline = build_features(args.data, FeatureConfig(args.window, args.min_matches), args.cache_dir)
+    elapsed = time.perf_counter() - start
+    print(f"{len(features)} matches x {len(features.columns)} features in {elapsed:.2f}s "
+          f"({pipeline.last_build['cached']} from cache, {pipeline.last_build['computed']} computed)")
+    print(f"Cache: {pipeline.last_build['file']}")
+
+    if args.team:
+        dates, rows = features.team_features(args.team)
+        if not dates:
+            print(f"No matches for {args.team}")
+        else:
+            print(f"\n{args.team} going into {dates[-1]}:")
+            for column, value in zip(MATCH_COLUMNS, rows[-1]):
+                print(f"  {column:<24} {value:8.2f}")
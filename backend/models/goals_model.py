@@ -0,0 +1,333 @@
+import argparse
+import json
+import math
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+from scipy.optimize import minimize
+from scipy.special import gammaln
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.match_record import Match, team_key
+from utils.match_stream import iter_matches
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_GOALS_MODEL_FILE = os.path.join(MODELS_DIR, 'goals_model.json')
+
+# Scorelines above this are folded into the last row / column
+MAX_GOALS = 10
+# Weight halves roughly every year (Dixon & Coles 1997)
+DEFAULT_DECAY = 0.0019
+RHO_BOUNDS = (-0.2, 0.2)
+
+
+def dixon_coles_tau(home_goals, away_goals, home_rate, away_rate, rho):
+    """Low-score correction factor for arrays of scorelines"""
+    tau = np.ones(np.broadcast(home_goals, away_goals, home_rate).shape)
+    tau = np.where((home_goals == 0) & (away_goals == 0), 1 - home_rate * away_rate * rho, tau)
+    tau = np.where((home_goals == 0) & (away_goals == 1), 1 + home_rate * rho, tau)
+    tau = np.where((home_goals == 1) & (away_goals == 0), 1 + away_rate * rho, tau)
+    return np.where((home_goals == 1) & (away_goals == 1), 1 - rho, tau)
+
+
+class DixonColesModel:
+    """Poisson goals model with the Dixon-Coles low-score correction
+
+    Home goals ~ Poisson(exp(attack[home] + defence[away] + home_advantage))
+    and away goals ~ Poisson(exp(attack[away] + defence[home])), with the
+    0-0, 1-0, 0-1 and 1-1 probabilities adjusted by rho. Attack strengths
+    are centred on zero. Fitting maximises the time-weighted likelihood
+    of every match with an analytic gradient, all matches in one array pass.
+    """
+    def __init__(self, decay=DEFAULT_DECAY, max_goals=MAX_GOALS):
+        self.decay = decay
+        self.max_goals = max_goals
+        self.teams = []
+        self.team_ids = {}
+        self.attack = np.empty(0)
+        self.defence = np.empty(0)
+        self.home_advantage = 0.0
+        self.rho = 0.0
+        self.metadata = {}
+        self._goals = np.arange(max_goals + 1)
+        self._log_factorial = gammaln(self._goals + 1)
+        self._total_goals = np.add.outer(self._goals, self._goals)
+        # outcome_probabilities() results per (home id, away id, lines)
+        self._outcomes = {}
+
+    def fit(self, matches, as_of=None, warm_start=False):
+        """Fit to Match records with goals, weighted by age relative to as_of
+
+        Args:
+            matches (iterable): Match records (or match dicts) of either schema
+            as_of (str, optional): ISO date to fit as of; later matches are
+                ignored. Defaults to the last match date.
+            warm_start (bool, optional): start from the current parameters,
+                which converges in fewer steps when refitting on a little
+                more data. Defaults to False.
+        """
+        matches = [m if isinstance(m, Match) else Match.from_dict(m) for m in matches]
+        matches = [m for m in matches if m.home_goals is not None and m.away_goals is not None
+                   and (as_of is None or m.date < as_of)]
+        if not matches:
+            raise ValueError("No matches with goals to fit")
+        reference = as_of or max(m.date for m in matches)
+
+        previous = {key: (self.attack[team_id], self.defence[team_id])
+                    for key, team_id in self.team_ids.items()} if warm_start else {}
+        self.teams = []
+        self.team_ids = {}
+        self._outcomes = {}
+        # Names are interned once each, then mapped to team ids in bulk
+        names = {}
+        home = np.array([names.setdefault(m.home_team, len(names)) for m in matches], dtype=np.int64)
+        away = np.array([names.setdefault(m.away_team, len(names)) for m in matches], dtype=np.int64)
+        name_ids = np.array([self.intern(name) for name in names], dtype=np.int64)
+        home, away = name_ids[home], name_ids[away]
+        home_goals = np.array([m.home_goals for m in matches], dtype=np.float64)
+        away_goals = np.array([m.away_goals for m in matches], dtype=np.float64)
+        days = np.array([m.date[:10] for m in matches], dtype='datetime64[D]')
+        age = (np.datetime64(reference[:10], 'D') - days).astype(np.float64)
+        weights = np.exp(-self.decay * age)
+
+        n_teams = len(self.teams)
+        # Scoreline masks and the constant log(x!) terms only depend on the data
+        cells = {
+            (0, 0): (home_goals == 0) & (away_goals == 0),
+            (0, 1): (home_goals == 0) & (away_goals == 1),
+            (1, 0): (home_goals == 1) & (away_goals == 0),
+            (1, 1): (home_goals == 1) & (away_goals == 1),
+        }
+        constant = np.sum(weights * (gammaln(home_goals + 1) + gammaln(away_goals + 1)))
+
+        def unpack(params):
+            attack = params[:n_teams] - params[:n_teams].mean()
+            return attack, params[n_teams:2 * n_teams], params[-2], params[-1]
+
+        def negative_log_likelihood(params):
+            attack, defence, home_advantage, rho = unpack(params)
+            log_home_rate = attack[home] + defence[away] + home_advantage
+            log_away_rate = attack[away] + defence[home]
+            home_rate, away_rate = np.exp(log_home_rate), np.exp(log_away_rate)
+
+            tau = np.ones(len(home))
+            tau[cells[0, 0]] = 1 - home_rate[cells[0, 0]] * away_rate[cells[0, 0]] * rho
+            tau[cells[0, 1]] = 1 + home_rate[cells[0, 1]] * rho
+            tau[cells[1, 0]] = 1 + away_rate[cells[1, 0]] * rho
+            tau[cells[1, 1]] = 1 - rho
+
+            # Line search can step where tau <= 0; treat it as (nearly) impossible
+            tau = np.maximum(tau, 1e-10)
+            log_likelihood = (np.log(tau) + home_goals * log_home_rate - home_rate +
+                              away_goals * log_away_rate - away_rate)
+            value = constant - np.dot(weights, log_likelihood)
+
+            # d/d log-rate of each match's log likelihood
+            grad_home = home_goals - home_rate
+            grad_away = away_goals - away_rate
+            grad_rho = np.zeros(len(home))
+            both = cells[0, 0]
+            grad_home[both] -= home_rate[both] * away_rate[both] * rho / tau[both]
+            grad_away[both] -= home_rate[both] * away_rate[both] * rho / tau[both]
+            grad_rho[both] = -home_rate[both] * away_rate[both] / tau[both]
+            grad_home[cells[0, 1]] += home_rate[cells[0, 1]] * rho / tau[cells[0, 1]]
+            grad_rho[cells[0, 1]] = home_rate[cells[0, 1]] / tau[cells[0, 1]]
+            grad_away[cells[1, 0]] += away_rate[cells[1, 0]] * rho / tau[cells[1, 0]]
+            grad_rho[cells[1, 0]] = away_rate[cells[1, 0]] / tau[cells[1, 0]]
+            grad_rho[cells[1, 1]] = -1 / tau[cells[1, 1]]
+            grad_home *= weights
+            grad_away *= weights
+
+            grad_attack = (np.bincount(home, grad_home, n_teams) +
+                           np.bincount(away, grad_away, n_teams))
+            grad_defence = (np.bincount(away, grad_home, n_teams) +
+                            np.bincount(home, grad_away, n_teams))
+            gradient = np.concatenate([grad_attack - grad_attack.mean(), grad_defence,
+                                       [grad_home.sum(), np.dot(weights, grad_rho)]])
+            return value, -gradient
+
+        start = np.zeros(2 * n_teams + 2)
+        start[-2] = 0.25
+        if previous:
+            for key, team_id in self.team_ids.items():
+                start[team_id], start[n_teams + team_id] = previous.get(key, (0.0, 0.0))
+            start[-2], start[-1] = self.home_advantage, self.rho
+        bounds = [(None, None)] * (2 * n_teams + 1) + [RHO_BOUNDS]
+        result = minimize(negative_log_likelihood, start, jac=True, method='L-BFGS-B', bounds=bounds)
+
+        self.attack, self.defence, self.home_advantage, self.rho = unpack(result.x)
+        self.home_advantage, self.rho = float(self.home_advantage), float(self.rho)
+        self.metadata = {
+            'as_of': reference,
+            'matches': len(matches),
+            'decay': self.decay,
+            'log_likelihood': float(-result.fun),
+            'converged': bool(result.success)
+        }
+        return self
+
+    def intern(self, team_name):
+        key = team_key(team_name)
+        team_id = self.team_ids.get(key)
+        if team_id is None:
+            team_id = self.team_ids[key] = len(self.teams)
+            self.teams.append(team_name)
+        return team_id
+
+    def team_id(self, team_name):
+        """Id of a fitted team, None if it has no parameters"""
+        return self.team_ids.get(team_key(team_name))
+
+    def expected_goals(self, home_team, away_team):
+        """(home, away) Poisson rates for a fixture
+
+        Raises:
+            KeyError: a team the model was not fitted on
+        """
+        home, away = self.team_id(home_team), self.team_id(away_team)
+        if home is None or away is None:
+            raise KeyError(f"No goals model parameters for {home_team if home is None else away_team}")
+        return (math.exp(self.attack[home] + self.defence[away] + self.home_advantage),
+                math.exp(self.attack[away] + self.defence[home]))
+
+    def goal_distribution(self, rate):
+        """P(0..max_goals) for a Poisson rate, the tail folded into the last cell"""
+        probs = np.exp(self._goals * math.log(rate) - rate - self._log_factorial)
+        probs[-1] += max(0.0, 1.0 - probs.sum())
+        return probs
+
+    def score_matrix(self, home_team, away_team):
+        """Scoreline probabilities, [home goals, away goals]"""
+        home_rate, away_rate = self.expected_goals(home_team, away_team)
+        matrix = np.outer(self.goal_distribution(home_rate), self.goal_distribution(away_rate))
+        matrix[0, 0] *= 1 - home_rate * away_rate * self.rho
+        matrix[0, 1] *= 1 + home_rate * self.rho
+        matrix[1, 0] *= 1 + away_rate * self.rho
+        matrix[1, 1] *= 1 - self.rho
+        return matrix
+
+    def score_matrices(self, home_teams, away_teams):
+        """Scoreline matrices for many fixtures at once, (n, goals, goals)
+
+        Fixtures with an unfitted team get NaN matrices.
+        """
+        home = np.array([-1 if i is None else i for i in map(self.team_id, home_teams)], dtype=np.int64)
+        away = np.array([-1 if i is None else i for i in map(self.team_id, away_teams)], dtype=np.int64)
+        known = (home >= 0) & (away >= 0)
+        home_rate = np.exp(self.attack[home] + self.defence[away] + self.home_advantage)
+        away_rate = np.exp(self.attack[away] + self.defence[home])
+        home_rate[~known] = away_rate[~known] = np.nan
+
+        goals = self._goals
+        home_probs = np.exp(goals * np.log(home_rate)[:, None] - home_rate[:, None] - self._log_factorial)
+        away_probs = np.exp(goals * np.log(away_rate)[:, None] - away_rate[:, None] - self._log_factorial)
+        home_probs[:, -1] += np.clip(1 - home_probs.sum(axis=1), 0, None)
+        away_probs[:, -1] += np.clip(1 - away_probs.sum(axis=1), 0, None)
+        matrices = home_probs[:, :, None] * away_probs[:, None, :]
+        matrices[:, :2, :2] *= dixon_coles_tau(goals[:2, None], goals[None, :2],
+                                               home_rate[:, None, None], away_rate[:, None, None], self.rho)
+        return matrices
+
+    def predict_arrays(self, home_teams, away_teams, line=2.5):
+        """Vectorized 1X2 and over/under probabilities for parallel lists of team names
+
+        Returns:
+            dict: home_win, draw, away_win, over, under arrays (NaN for unfitted teams)
+        """
+        matrices = self.score_matrices(home_teams, away_teams)
+        over = self._total_goals > line
+        return {
+            'home_win': np.tril(matrices, -1).sum(axis=(1, 2)),
+            'draw': np.trace(matrices, axis1=1, axis2=2),
+            'away_win': np.triu(matrices, 1).sum(axis=(1, 2)),
+            'over': matrices[:, over].sum(axis=1),
+            'under': matrices[:, self._total_goals < line].sum(axis=1),
+        }
+
+    def outcome_probabilities(self, home_team, away_team, lines=(1.5, 2.5, 3.5)):
+        """1X2, over/under and most likely score derived from the score matrix
+
+        Cached per fixture until the model is refitted.
+
+        Returns:
+            dict: None if either team is not in the model
+        """
+        key = (self.team_id(home_team), self.team_id(away_team), lines)
+        if key[0] is None or key[1] is None:
+            return None
+        cached = self._outcomes.get(key)
+        if cached is None:
+            cached = self._outcomes[key] = self._outcome_probabilities(home_team, away_team, lines)
+        return cached
+
+    def _outcome_probabilities(self, home_team, away_team, lines):
+        matrix = self.score_matrix(home_team, away_team)
+        home_rate, away_rate = self.expected_goals(home_team, away_team)
+        total = self._total_goals
+        home_goals, away_goals = np.unravel_index(np.argmax(matrix), matrix.shape)
+        return {
+            'home_win_prob': float(np.tril(matrix, -1).sum()),
+            'draw_prob': float(np.trace(matrix)),
+            'away_win_prob': float(np.triu(matrix, 1).sum()),
+            'expected_goals': {'home': home_rate, 'away': away_rate},
+            'over': {str(line): float(matrix[total > line].sum()) for line in lines},
+            'under': {str(line): float(matrix[total < line].sum()) for line in lines},
+            'both_teams_score': float(matrix[1:, 1:].sum()),
+            'most_likely_score': f"{home_goals}-{away_goals}"
+        }
+
+    def to_dict(self):
+        return {
+            'parameters': {'home_advantage': self.home_advantage, 'rho': self.rho,
+                           'decay': self.decay, 'max_goals': self.max_goals},
+            'metadata': self.metadata,
+            'teams': {
+                team_name: {'attack': float(self.attack[team_id]), 'defence': float(self.defence[team_id])}
+                for team_id, team_name in enumerate(self.teams)
+            }
+        }
+
+    def save(self, path=DEFAULT_GOALS_MODEL_FILE):
+        tmp_file = path + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_file, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_GOALS_MODEL_FILE):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        parameters = data['parameters']
+        model = cls(decay=parameters['decay'], max_goals=parameters['max_goals'])
+        model.home_advantage = parameters['home_advantage']
+        model.rho = parameters['rho']
+        model.metadata = data.get('metadata', {})
+        for team_name in data['teams']:
+            model.intern(team_name)
+        model.attack = np.array([team['attack'] for team in data['teams'].values()])
+        model.defence = np.array([team['defence'] for team in data['teams'].values()])
+        return model
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Fit the Dixon-Coles goals model to historical match data")
+    arg_parser.add_argument('data', nargs='?', default='premier_league_historical.json',
+                            help="espn_json_parser.py output or football-data.org matches")
+    arg_parser.add_argument('--output', default=DEFAULT_GOALS_MODEL_FILE)
+    arg_parser.add_argument('--as-of', help="fit on matches before this date, e.g. 2023-01-01")
+    arg_parser.add_argument('--decay', type=float, default=DEFAULT_DECAY, help="time decay per day")
+    args = arg_parser.parse_args()
+
+    goals_model = DixonColesModel(decay=args.decay).fit(iter_matches(args.data), as_of=args.as_of)
+    goals_model.save(args.output)
+
+    print(f"Fitted {goals_model.metadata['matches']} matches as of {goals_model.metadata['as_of']}")
+    print(f"Home advantage: {math.exp(goals_model.home_advantage):.3f}x goals, rho: {goals_model.rho:.3f}")
+    print(f"\n{'Team':<28} | {'Attack':>6} | {'Defence':>7}")
+    print("-" * 48)
+    for team_id in np.argsort(-goals_model.attack):
+        print(f"{goals_model.teams[team_id]:<28} | {math.exp(goals_model.attack[team_id]):6.2f} | "
+              f"{math.exp(goals_model.defence[team_id]):7.2f}")
+    print(f"\nGoals model saved to {args.output}")
@@ -0,0 +1,67 @@
+from bisect import bisect_left
+from collections import defaultdict
+
+
+class TeamMatchIndex:
+    """Per-team, date-sorted match index with rolling point sums
+
+    Built once over the full match history so "last N games before date"
+    lookups are a bisect instead of a scan over every match.
+    """
+    def __init__(self, matches):
+        self.dates = {}
+        self.matches = {}
+        self.cumulative_points = {}
+        self.build(matches)
+
+    def build(self, matches):
+        """Index every Match record under both of its teams"""
+        by_team = defaultdict(list)
+        for position, match in enumerate(matches):
+            by_team[match.home_team].append((position, match))
+            if match.away_team != match.home_team:
+                by_team[match.away_team].append((position, match))
+
+        for team_name, entries in by_team.items():
+            # Ties on date keep the later match first so the slice taken in
+            # last_n_before matches a stable newest-first sort of the history
+            entries.sort(key=lambda entry: (entry[1].date, -entry[0]))
+
+            team_matches = [match for _, match in entries]
+            cumulative = [0]
+            for match in team_matches:
+                cumulative.append(cumulative[-1] + match.points_for(team_name))
+
+            self.dates[team_name] = [match.date for match in team_matches]
+            self.matches[team_name] = team_matches
+            self.cumulative_points[team_name] = cumulative
+
+    def _window(self, team_name, match_date, num_games):
+        """Return (start, end) positions of the last N games before match_date"""
+        dates = self.dates.get(team_name)
+        if not dates:
+            return 0, 0
+        end = bisect_left(dates, match_date)
+        return max(0, end - num_games), end
+
+    def last_n_before(self, team_name, match_date, num_games=5):
+        """Last N matches strictly before match_date, most recent first"""
+        start, end = self._window(team_name, match_date, num_games)
+        if start == end:
+            return []
+        return self.matches[team_name][start:end][::-1]
+
+    def points_before(self, team_name, match_date, num_games=5):
+        """Return (points, games) over the last N games before match_date"""
+        start, end = self._window(team_name, match_date, num_games)
+        if start == end:
+            return 0, 0
+        cumulative = self.cumulative_points[team_name]
+        return cumulative[end] - cumulative[start], end - start
+
+    def form_before(self, team_name, match_date, num_games=5, min_games=3):
+        """Points per game over the last N games, None if fewer than min_games"""
+        points, games = self.points_before(team_name, match_date, num_games)
+        if games < min_games:
+            return None
+        return points / games
@@ -0,0 +1,264 @@
+import argparse
+import json
+import os
+import sys
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.match_record import Match, team_key
+from utils.match_stream import iter_matches
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MATCHUPS_FILE = os.path.join(MODELS_DIR, 'matchup_index.json')
+# ESPN and football-data.org histories, relative to the working directory
+DEFAULT_DATA_FILES = ('premier_league_historical.json', '23-24_PLData.json')
+
+VENUES = ('home', 'away')
+# Running totals kept per key, from the key team's point of view
+COLUMNS = ('played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against')
+# The same totals from the other team's point of view
+SWAPPED = [COLUMNS.index(column) for column in
+           ('played', 'losses', 'draws', 'wins', 'goals_against', 'goals_for')]
+
+
+def pair_key(team_a, team_b):
+    """Head-to-head key shared by both orders of a pair, and whether team_a is its first team"""
+    key_a, key_b = team_key(team_a), team_key(team_b)
+    return (f"{key_a}|{key_b}", True) if key_a <= key_b else (f"{key_b}|{key_a}", False)
+
+
+def venue_key(team_name, venue):
+    return f"{venue}:{team_key(team_name)}"
+
+
+def result_rows(goals_for, goals_against):
+    """(n, len(COLUMNS)) per-match rows from goals scored and conceded"""
+    goals_for = np.asarray(goals_for, dtype=np.int64)
+    goals_against = np.asarray(goals_against, dtype=np.int64)
+    wins = goals_for > goals_against
+    draws = goals_for == goals_against
+    return np.column_stack([np.ones_like(goals_for), wins, draws, ~(wins | draws),
+                            goals_for, goals_against])
+
+
+class MatchupIndex:
+    """Head-to-head and home/away records as running totals
+
+    Every finished match adds one entry to its team pair's head-to-head
+    key and one to each side's venue key, (home team, 'home') and
+    (away team, 'away'). Teams are keyed by team_key() so ESPN and
+    football-data.org histories land on the same keys, and a fixture seen
+    in both is only counted once.
+
+    finalize() turns each key's entries into date-sorted cumulative sums,
+    so the record before a date, or over the last N entries before it, is
+    the difference of two rows: a bisect for as_of queries and O(1) for
+    the latest record.
+    """
+    def __init__(self):
+        # key -> (dates, goals_for, goals_against) while building
+        self.entries = defaultdict(lambda: ([], [], []))
+        self.seen = set()
+        self.dates = {}
+        self.totals = {}
+        self.names = {}
+        self.match_count = 0
+
+    def add(self, match):
+        """Record one finished match, False for unfinished matches and repeats"""
+        if match.home_goals is None or match.away_goals is None or not match.date:
+            return False
+        fixture = (team_key(match.home_team), team_key(match.away_team), match.date[:10])
+        if fixture in self.seen:
+            return False
+        self.seen.add(fixture)
+        self.match_count += 1
+        self.names.setdefault(fixture[0], match.home_team)
+        self.names.setdefault(fixture[1], match.away_team)
+
+        key, home_first = pair_key(match.home_team, match.away_team)
+        first_goals, second_goals = ((match.home_goals, match.away_goals) if home_first
+                                     else (match.away_goals, match.home_goals))
+        for entry_key, goals_for, goals_against in (
+                (key, first_goals, second_goals),
+                (venue_key(match.home_team, 'home'), match.home_goals, match.away_goals),
+                (venue_key(match.away_team, 'away'), match.away_goals, match.home_goals)):
+            dates, scored, conceded = self.entries[entry_key]
+            dates.append(match.date)
+            scored.append(goals_for)
+            conceded.append(goals_against)
+        return True
+
+    def build(self, matches):
+        """Index Match records (or raw dicts) in one pass, then finalize"""
+        for match in matches:
+            self.add(match if isinstance(match, Match) else Match.from_dict(match))
+        return self.finalize()
+
+    def finalize(self):
+        """Sort each key's entries by date and compute its running totals"""
+        for key, (dates, goals_for, goals_against) in self.entries.items():
+            if key in self.dates:
+                # Entries added after an earlier finalize() join the existing ones
+                old_dates, old_for, old_against = self._raw(key)
+                dates, goals_for, goals_against = (old_dates + dates, old_for + goals_for,
+                                                   old_against + goals_against)
+            order = sorted(range(len(dates)), key=dates.__getitem__)
+            rows = result_rows([goals_for[i] for i in order], [goals_against[i] for i in order])
+            totals = np.zeros((len(order) + 1, len(COLUMNS)), dtype=np.int64)
+            np.cumsum(rows, axis=0, out=totals[1:])
+            self.dates[key] = [dates[i] for i in order]
+            self.totals[key] = totals
+        self.entries.clear()
+        return self
+
+    def _raw(self, key):
+        """A finalized key's entries back as (dates, goals_for, goals_against) lists"""
+        per_match = np.diff(self.totals[key], axis=0)
+        goals_for = per_match[:, COLUMNS.index('goals_for')].tolist()
+        goals_against = per_match[:, COLUMNS.index('goals_against')].tolist()
+        return list(self.dates[key]), goals_for, goals_against
+
+    def _record(self, key, as_of=None, last_n=None, swap=False):
+        totals = self.totals.get(key)
+        if totals is None:
+            row = np.zeros(len(COLUMNS), dtype=np.int64)
+        else:
+            end = len(totals) - 1 if as_of is None else bisect_left(self.dates[key], as_of)
+            start = 0 if last_n is None else max(0, end - last_n)
+            row = totals[end] - totals[start]
+        if swap:
+            row = row[SWAPPED]
+        record = dict(zip(COLUMNS, row.tolist()))
+        record['points'] = 3 * record['wins'] + record['draws']
+        record['points_per_game'] = record['points'] / record['played'] if record['played'] else None
+        return record
+
+    def head_to_head(self, team, opponent, as_of=None, last_n=None):
+        """team's record against opponent, at either venue
+
+        Args:
+            as_of (str, optional): only meetings strictly before this date
+            last_n (int, optional): only the last N of those meetings
+
+        Returns:
+            dict: played, wins, draws, losses, goals_for, goals_against,
+                points and points_per_game (None without a meeting)
+        """
+        key, team_first = pair_key(team, opponent)
+        return self._record(key, as_of, last_n, swap=not team_first)
+
+    def venue_record(self, team, venue, as_of=None, last_n=None):
+        """team's record in its 'home' or 'away' matches, see head_to_head()"""
+        if venue not in VENUES:
+            raise ValueError(f"venue must be one of {VENUES}, got {venue!r}")
+        return self._record(venue_key(team, venue), as_of, last_n)
+
+    def team_form(self, team, as_of=None, last_n=5, min_games=3):
+        """Points per game over team's last N matches at either venue, None if fewer than min_games
+
+        The last N home and last N away entries before as_of are merged by
+        date, so this is the same form ProbabilityAnalyzer.calculate_team_form
+        gives, read from the index.
+        """
+        recent = []
+        for venue in VENUES:
+            key = venue_key(team, venue)
+            totals = self.totals.get(key)
+            if totals is None:
+                continue
+            dates = self.dates[key]
+            end = len(dates) if as_of is None else bisect_left(dates, as_of)
+            start = max(0, end - last_n)
+            rows = np.diff(totals[start:end + 1], axis=0)
+            points = 3 * rows[:, COLUMNS.index('wins')] + rows[:, COLUMNS.index('draws')]
+            recent.extend(zip(dates[start:end], points.tolist()))
+        if len(recent) < min_games:
+            return None
+        recent = sorted(recent)[-last_n:]
+        return sum(points for _, points in recent) / len(recent)
+
+    def matchup(self, home_team, away_team, as_of=None, last_n=5):
+        """Everything the index knows about a fixture, from the home side's point of view"""
+        return {
+            'head_to_head': self.head_to_head(home_team, away_team, as_of),
+            'recent_head_to_head': self.head_to_head(home_team, away_team, as_of, last_n),
+            'home_at_home': self.venue_record(home_team, 'home', as_of, last_n),
+            'away_on_road': self.venue_record(away_team, 'away', as_of, last_n),
+        }
+
+    def to_dict(self):
+        keys = {}
+        for key in self.totals:
+            dates, goals_for, goals_against = self._raw(key)
+            keys[key] = {'dates': dates, 'goals_for': goals_for, 'goals_against': goals_against}
+        # Fixtures already counted, so add() after load() still skips them
+        seen = sorted(list(fixture) for fixture in self.seen)
+        return {'match_count': self.match_count, 'names': self.names, 'seen': seen, 'keys': keys}
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls()
+        index.match_count = data.get('match_count', 0)
+        index.names = dict(data.get('names', {}))
+        index.seen = {tuple(fixture) for fixture in data.get('seen', [])}
+        for key, entry in data['keys'].items():
+            index.entries[key] = (entry['dates'], entry['goals_for'], entry['goals_against'])
+        return index.finalize()
+
+    def save(self, path=DEFAULT_MATCHUPS_FILE):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path=DEFAULT_MATCHUPS_FILE):
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+
+def build_index(data_files):
+    """Index the matches of several historical data files in one streaming pass
+
+    ESPN and football-data.org files can be mixed; fixtures found in more
+    than one file are counted once.
+    """
+    index = MatchupIndex()
+    for data_file in data_files:
+        for match in iter_matches(data_file):
+            index.add(Match.from_dict(match))
+    return index.finalize()
+
+
+def print_record(label, record):
+    if not record['played']:
+        print(f"{label:<24} no matches")
+        return
+    print(f"{label:<24} P{record['played']:>3}  W{record['wins']:>3} D{record['draws']:>3} L{record['losses']:>3}"
+          f"  {record['goals_for']}-{record['goals_against']}  {record['points_per_game']:.2f} ppg")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Build the head-to-head and home/away index")
+    arg_parser.add_argument('data', nargs='*', default=list(DEFAULT_DATA_FILES),
+                            help="ESPN and football-data.org match files, JSON or JSON Lines")
+    arg_parser.add_argument('--output', default=DEFAULT_MATCHUPS_FILE)
+    arg_parser.add_argument('--fixture', nargs=2, metavar=('HOME', 'AWAY'),
+                            help="print a fixture's matchup from the saved index instead of building")
+    arg_parser.add_argument('--as-of', help="only matches before this date, with --fixture")
+    args = arg_parser.parse_args()
+
+    if args.fixture:
+        home_team, away_team = args.fixture
+        matchup = MatchupIndex.load(args.output).matchup(home_team, away_team, args.as_of)
+        print_record(f"{home_team} v {away_team}", matchup['head_to_head'])
+        print_record("  last 5 meetings", matchup['recent_head_to_head'])
+        print_record(f"{home_team} at home", matchup['home_at_home'])
+        print_record(f"{away_team} away", matchup['away_on_road'])
+    else:
+        index = build_index([path for path in args.data if os.path.exists(path)])
+        index.save(args.output)
+        print(f"Indexed {index.match_count} matches under {len(index.totals)} keys -> {args.output}")
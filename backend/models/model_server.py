@@ -0,0 +1,356 @@
+import copy
+import json
+import math
+import os
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.columnar_store import META_FILE, FormCacheColumns, columnar_path, fresh_store
+from utils.form_cache_log import log_path, read_entries
+from utils.match_record import team_key
+from models.elo_ratings import DEFAULT_RATINGS_FILE, expected_score
+from models.matchup_index import DEFAULT_MATCHUPS_FILE, MatchupIndex
+from models.prediction_model import DEFAULT_OUTCOME_MODEL_FILE, OUTCOMES as MODEL_OUTCOMES, form_features, \
+    load_outcome_model, matchup_features
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL_FILE = os.path.join(MODELS_DIR, 'prediction_model_18-24.json')
+DEFAULT_CACHE_FILE = os.path.join(MODELS_DIR, 'form_cache.json')
+
+# Form differences are bucketed to the nearest 0.25 by ProbabilityAnalyzer
+BUCKET_STEP = 0.25
+OUTCOMES = ('home_win_prob', 'draw_prob', 'away_win_prob')
+# Fixture fields copied onto batch predictions so callers can match them up
+PASSTHROUGH_FIELDS = ('id', 'utcDate', 'matchday')
+
+
+class ModelSnapshot:
+    """Immutable in-memory copy of the prediction model and form cache
+
+    form_probabilities become a dense (buckets, 3) array of home/draw/away
+    probabilities from the lowest to the highest form difference, so a
+    lookup is one index computation. Buckets missing from the model fall
+    back to the basic probabilities.
+
+    Elo ratings, when there are any, are keyed by team_key() so names
+    from either data source find them, and so is the MatchupIndex of
+    head-to-head and home/away records. A trained OutcomeModel, when
+    there is one, scores fixtures from the ratings and from the last-5
+    form and records in the MatchupIndex, the features it was trained on.
+    """
+    def __init__(self, model, form_columns, ratings=None, version=None, matchups=None, outcome_model=None):
+        self.version = version
+        self.matchups = matchups
+        self.outcome_model = outcome_model
+        self.metadata = model.get('metadata', {})
+
+        basic = model['basic_probabilities']
+        self.base_probs = np.array([basic['home_win_rate'], basic['draw_rate'], basic['away_win_rate']])
+
+        buckets = {float(diff): probs for diff, probs in model.get('form_probabilities', {}).items()}
+        self.bucket_min = min(buckets, default=0.0)
+        size = int(round((max(buckets, default=0.0) - self.bucket_min) / BUCKET_STEP)) + 1
+        self.bucket_probs = np.tile(self.base_probs, (size, 1))
+        self.bucket_samples = np.zeros(size, dtype=np.int64)
+        for diff, probs in buckets.items():
+            index = int(round((diff - self.bucket_min) / BUCKET_STEP))
+            self.bucket_probs[index] = [probs[outcome] for outcome in OUTCOMES]
+            self.bucket_samples[index] = probs.get('sample_size', 0)
+
+        self.teams = list(form_columns.teams)
+        self.team_ids = dict(form_columns.team_ids)
+        self.form = np.array(form_columns.columns['form'], dtype=np.float64)
+        self.points_per_game = np.array(form_columns.columns['points_per_game'], dtype=np.float64)
+
+        ratings = ratings or {}
+        self.home_advantage = ratings.get('parameters', {}).get('home_advantage', 0.0)
+        self.ratings = {team_key(name): team['rating'] for name, team in ratings.get('teams', {}).items()}
+
+    def with_form_updates(self, updates):
+        """Copy of the snapshot with teams' form replaced, from form cache log entries
+
+        Args:
+            updates (dict): team name -> {'season_stats', 'representative_form'}
+        """
+        snapshot = copy.copy(self)
+        snapshot.teams = list(self.teams)
+        snapshot.team_ids = dict(self.team_ids)
+        new_teams = [name for name in updates if name not in self.team_ids]
+        for name in new_teams:
+            snapshot.team_ids[name] = len(snapshot.teams)
+            snapshot.teams.append(name)
+        snapshot.form = np.concatenate([self.form, np.zeros(len(new_teams))])
+        snapshot.points_per_game = np.concatenate([self.points_per_game, np.zeros(len(new_teams))])
+        for name, update in updates.items():
+            team_id = snapshot.team_ids[name]
+            snapshot.form[team_id] = update['representative_form']['score']
+            snapshot.points_per_game[team_id] = update['season_stats']['points_per_game']
+        return snapshot
+
+    def bucket_index(self, form_diff):
+        """Dense bucket index for a form difference, clipped to the model's range"""
+        index = np.rint((np.asarray(form_diff) - self.bucket_min) / BUCKET_STEP).astype(np.int64)
+        return np.clip(index, 0, len(self.bucket_samples) - 1)
+
+    def team_form(self, team_name):
+        """Representative form, NaN for a team missing from the form cache"""
+        team_id = self.team_ids.get(team_name)
+        return np.nan if team_id is None else float(self.form[team_id])
+
+    def team_rating(self, team_name):
+        """Elo rating, NaN for an unrated team"""
+        return self.ratings.get(team_key(team_name), np.nan)
+
+
+def confidence_label(sample_size):
+    """How much history backs a prediction"""
+    if sample_size >= 100:
+        return "High"
+    if sample_size >= 30:
+        return "Medium"
+    return "Low"
+
+
+def fixture_teams(fixture):
+    """(home, away) team names of a fixture
+
+    Takes a football-data.org match (24-25_fixtures.json), an /api/predict
+    body, {"homeTeam": name, "awayTeam": name} or a [home, away] pair.
+    """
+    if isinstance(fixture, dict):
+        home, away = fixture['homeTeam'], fixture['awayTeam']
+        return (home['name'] if isinstance(home, dict) else home,
+                away['name'] if isinstance(away, dict) else away)
+    home, away = fixture
+    return home, away
+
+
+def load_form_columns(cache_file):
+    """Form cache columns from the columnar store if built, else from JSON"""
+    store = fresh_store(cache_file)
+    if store:
+        return FormCacheColumns.load(store, mmap=False)
+    with open(cache_file, 'r') as f:
+        return FormCacheColumns.from_cache(json.load(f))
+
+
+def load_ratings(ratings_file):
+    """Saved Elo ratings, None when elo_ratings.py has not been run"""
+    if not ratings_file or not os.path.exists(ratings_file):
+        return None
+    with open(ratings_file, 'r') as f:
+        return json.load(f)
+
+
+def load_matchups(matchups_file):
+    """Saved MatchupIndex, None when matchup_index.py has not been run"""
+    if not matchups_file or not os.path.exists(matchups_file):
+        return None
+    return MatchupIndex.load(matchups_file)
+
+
+class ModelServer:
+    """Serves predictions from an in-memory ModelSnapshot
+
+    Files are only read by load(), at startup and from the watcher thread
+    when the model or form cache changes on disk. A reload builds a new
+    snapshot and swaps it in with one assignment, so requests never wait
+    on it and never see a half-loaded model. A failed reload keeps the
+    current snapshot. Lines FormCacheUpdater appends to the form cache log
+    are applied to a copy of the current snapshot without a full reload.
+    """
+    def __init__(self, model_file=DEFAULT_MODEL_FILE, cache_file=DEFAULT_CACHE_FILE,
+                 ratings_file=DEFAULT_RATINGS_FILE, matchups_file=DEFAULT_MATCHUPS_FILE,
+                 outcome_model_file=DEFAULT_OUTCOME_MODEL_FILE, poll_interval=5.0):
+        self.model_file = model_file
+        self.cache_file = cache_file
+        self.ratings_file = ratings_file
+        self.matchups_file = matchups_file
+        self.outcome_model_file = outcome_model_file
+        self.log_file = log_path(cache_file)
+        self.log_offset = 0
+        self.poll_interval = poll_interval
+        self.snapshot = None
+        self.reloads = 0
+        self.last_error = None
+        # Files that failed to load are not retried until they change again
+        self.failed_version = None
+        self.stop_event = threading.Event()
+        self.watcher = None
+        if not self.load():
+            raise RuntimeError(f"Could not load prediction model: {self.last_error}")
+
+    def watched_files(self):
+        return [self.model_file, self.cache_file,
+                os.path.join(columnar_path(self.cache_file), META_FILE), self.ratings_file, self.matchups_file,
+                self.outcome_model_file]
+
+    def file_version(self):
+        """mtimes of the watched files, None for missing ones"""
+        return tuple(os.path.getmtime(path) if os.path.exists(path) else None
+                     for path in self.watched_files())
+
+    def load(self):
+        """Build a snapshot from the files on disk and swap it in
+
+        Returns:
+            bool: True if the new snapshot is live
+        """
+        version = self.file_version()
+        try:
+            with open(self.model_file, 'r') as f:
+                model = json.load(f)
+            snapshot = ModelSnapshot(model, load_form_columns(self.cache_file),
+                                     load_ratings(self.ratings_file), version, load_matchups(self.matchups_file),
+                                     load_outcome_model(self.outcome_model_file))
+            updates, log_offset = self.read_log(0)
+            if updates:
+                snapshot = snapshot.with_form_updates(updates)
+        except (OSError, ValueError, KeyError) as e:
+            self.last_error = str(e)
+            self.failed_version = version
+            print(f"Model load failed, keeping current model: {e}")
+            return False
+        self.snapshot = snapshot
+        self.log_offset = log_offset
+        self.reloads += 1
+        self.last_error = None
+        return True
+
+    def read_log(self, offset):
+        """Latest form per team from log entries after offset, and the new offset"""
+        updates = {}
+        entries, offset = read_entries(self.log_file, offset)
+        for entry in entries:
+            updates.update(entry['teams'])
+        return updates, offset
+
+    def reload_if_changed(self):
+        version = self.file_version()
+        current = self.snapshot.version if self.snapshot is not None else None
+        if version not in (current, self.failed_version):
+            return self.load()
+        if os.path.exists(self.log_file) and os.path.getsize(self.log_file) != self.log_offset:
+            updates, offset = self.read_log(self.log_offset)
+            self.snapshot = self.snapshot.with_form_updates(updates)
+            self.log_offset = offset
+        return False
+
+    def start(self):
+        """Watch the model and form cache files in a background thread"""
+        if self.watcher is None or not self.watcher.is_alive():
+            self.stop_event.clear()
+            self.watcher = threading.Thread(target=self._watch, name='model-watcher', daemon=True)
+            self.watcher.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _watch(self):
+        while not self.stop_event.wait(self.poll_interval):
+            self.reload_if_changed()
+
+    def predict_arrays(self, home_teams, away_teams):
+        """Vectorized probabilities for parallel lists of team names
+
+        Every distinct team name is looked up once, then all fixtures go
+        through one array pass. Teams missing from the form cache get NaN
+        form and the basic home/draw/away rates.
+
+        Returns:
+            dict: probs (n, 3) home/draw/away, sample_size, home_form,
+            away_form, home_rating, away_rating, the Elo home_expectancy
+            (NaN when a team is unrated) and the outcome model's
+            model_probs (n, 3), None without a trained model
+        """
+        snapshot = self.snapshot
+        names = {}
+        home = np.array([names.setdefault(name, len(names)) for name in home_teams], dtype=np.int64)
+        away = np.array([names.setdefault(name, len(names)) for name in away_teams], dtype=np.int64)
+        name_form = np.array([snapshot.team_form(name) for name in names], dtype=np.float64)
+        name_rating = np.array([snapshot.team_rating(name) for name in names], dtype=np.float64)
+
+        home_form, away_form = name_form[home], name_form[away]
+        known = ~(np.isnan(home_form) | np.isnan(away_form))
+        index = snapshot.bucket_index(np.where(known, np.round(home_form - away_form, 2), 0.0))
+        home_expectancy = expected_score(name_rating[home] + snapshot.home_advantage - name_rating[away])
+        model_probs = None
+        if snapshot.outcome_model is not None:
+            # The model was trained on last-5 points per game, not the form cache's representative form
+            features = np.column_stack([form_features(snapshot.matchups, home_teams, away_teams),
+                                        name_rating[home], name_rating[away], home_expectancy,
+                                        matchup_features(snapshot.matchups, home_teams, away_teams)])
+            model_probs = snapshot.outcome_model.predict_proba(features)
+        return {
+            'probs': np.where(known[:, None], snapshot.bucket_probs[index], snapshot.base_probs),
+            'sample_size': np.where(known, snapshot.bucket_samples[index], 0),
+            'home_form': home_form,
+            'away_form': away_form,
+            'home_rating': name_rating[home],
+            'away_rating': name_rating[away],
+            'home_expectancy': home_expectancy,
+            'model_probs': model_probs,
+        }
+
+    def predict_many(self, home_teams, away_teams):
+        """Prediction dicts for parallel lists of team names, see predict()"""
+        matchups = self.snapshot.matchups
+        arrays = self.predict_arrays(home_teams, away_teams)
+        probs = arrays['probs'].tolist()
+        model_probs = (np.round(arrays['model_probs'] * 100, 1).tolist() if arrays['model_probs'] is not None
+                       else [None] * len(probs))
+        rows = zip(home_teams, away_teams, probs, arrays['sample_size'].tolist(),
+                   arrays['home_form'].tolist(), arrays['away_form'].tolist(),
+                   arrays['home_rating'].tolist(), arrays['away_rating'].tolist(),
+                   arrays['home_expectancy'].tolist(), model_probs)
+        results = []
+        for (home_team, away_team, (home_prob, draw_prob, away_prob), sample_size,
+             home_form, away_form, home_rating, away_rating, home_expectancy, model_prob) in rows:
+            known = not (math.isnan(home_form) or math.isnan(away_form))
+            results.append({
+                'home_team': home_team,
+                'away_team': away_team,
+                'home_win_prob': round(home_prob * 100, 1),
+                'draw_prob': round(draw_prob * 100, 1),
+                'away_win_prob': round(away_prob * 100, 1),
+                'confidence': confidence_label(sample_size),
+                'sample_size': sample_size,
+                'form': {
+                    'home': None if math.isnan(home_form) else home_form,
+                    'away': None if math.isnan(away_form) else away_form,
+                    'difference': round(home_form - away_form, 2) if known else None
+                },
+                'rating': {
+                    'home': None if math.isnan(home_rating) else round(home_rating, 1),
+                    'away': None if math.isnan(away_rating) else round(away_rating, 1),
+                    'home_expectancy': None if math.isnan(home_expectancy) else round(home_expectancy, 3)
+                },
+                'matchup': matchups.matchup(home_team, away_team) if matchups is not None else None,
+                'model': dict(zip(MODEL_OUTCOMES, model_prob)) if model_prob is not None else None,
+            })
+        return results
+
+    def predict_fixtures(self, fixtures):
+        """Predictions for a list of fixtures in one vectorized pass
+
+        Raises:
+            KeyError, TypeError, ValueError: a fixture without two team names
+        """
+        teams = [fixture_teams(fixture) for fixture in fixtures]
+        results = self.predict_many([home for home, _ in teams], [away for _, away in teams])
+        for fixture, result in zip(fixtures, results):
+            if isinstance(fixture, dict):
+                result.update((field, fixture[field]) for field in PASSTHROUGH_FIELDS if field in fixture)
+        return results
+
+    def predict(self, home_team, away_team):
+        """Outcome probabilities for one fixture from the current snapshot
+
+        Teams missing from the form cache get the basic home/draw/away rates.
+        """
+        return self.predict_many([home_team], [away_team])[0]
@@ -0,0 +1,254 @@
+import argparse
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.match_record import AWAY_WIN, DRAW, HOME_WIN, OUTCOME_CODES
+from models.elo_ratings import expected_score
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTCOME_MODEL_FILE = os.path.join(MODELS_DIR, 'outcome_model.joblib')
+# Bump when FEATURES or the artifact layout changes; older artifacts are refused
+ARTIFACT_VERSION = 1
+
+FEATURES = ('home_form', 'away_form', 'home_rating', 'away_rating', 'home_expectancy',
+            'head_to_head_ppg', 'home_venue_ppg', 'away_venue_ppg')
+# Classifier columns are the outcome codes, HOME_WIN, DRAW, AWAY_WIN
+OUTCOMES = ('home_win_prob', 'draw_prob', 'away_win_prob')
+ESTIMATORS = ('logistic', 'boosting')
+
+
+def form_features(matchups, home_teams, away_teams, as_of=None, last_n=5):
+    """(n, 2) home and away points per game over each team's last N matches
+
+    The home_form / away_form FEATURES, for training and serving alike.
+    NaN with fewer than 3 matches (or no MatchupIndex at all).
+    """
+    features = np.full((len(home_teams), 2), np.nan)
+    if matchups is None:
+        return features
+    for i, (home_team, away_team) in enumerate(zip(home_teams, away_teams)):
+        for j, team in enumerate((home_team, away_team)):
+            form = matchups.team_form(team, as_of, last_n)
+            if form is not None:
+                features[i, j] = form
+    return features
+
+
+def matchup_features(matchups, home_teams, away_teams, as_of=None, last_n=5):
+    """(n, 3) points per game: home side in the last N meetings, home team at home, away team away
+
+    NaN where there is no such match (or no MatchupIndex at all).
+    """
+    features = np.full((len(home_teams), 3), np.nan)
+    if matchups is None:
+        return features
+    for i, (home_team, away_team) in enumerate(zip(home_teams, away_teams)):
+        matchup = matchups.matchup(home_team, away_team, as_of, last_n)
+        for j, record in enumerate((matchup['recent_head_to_head'], matchup['home_at_home'],
+                                    matchup['away_on_road'])):
+            if record['played']:
+                features[i, j] = record['points_per_game']
+    return features
+
+
+def training_set(analyzer):
+    """Point-in-time FEATURES and outcome codes for every finished match of a ProbabilityAnalyzer
+
+    Form, Elo ratings and matchup records are all taken as they stood
+    before each match, so nothing a match decides leaks into its own row.
+
+    Returns:
+        tuple: (X (n, len(FEATURES)), y (n,) outcome codes, match dates)
+    """
+    matches = sorted((m for m in analyzer.matches if m.winner in OUTCOME_CODES), key=lambda m: m.date)
+    X = np.full((len(matches), len(FEATURES)), np.nan)
+    for i, match in enumerate(matches):
+        # Form comes from the MatchupIndex, the same way ModelServer computes it for a fixture
+        X[i, :2] = form_features(analyzer.matchups, [match.home_team], [match.away_team], match.date)[0]
+        home_rating = analyzer.calculate_team_rating(match.home_team, match.date)
+        away_rating = analyzer.calculate_team_rating(match.away_team, match.date)
+        X[i, 2:4] = [np.nan if value is None else value for value in (home_rating, away_rating)]
+        X[i, 5:] = matchup_features(analyzer.matchups, [match.home_team], [match.away_team], match.date)[0]
+    X[:, 4] = expected_score(X[:, 2] + analyzer.elo.home_advantage - X[:, 3])
+    y = np.array([OUTCOME_CODES[m.winner] for m in matches], dtype=np.int64)
+    return X, y, [m.date for m in matches]
+
+
+def make_estimator(kind='logistic'):
+    """Unfitted pipeline with its hyperparameter grid
+
+    Missing features (no form or rating yet, no previous meeting) are
+    filled with the training medians before scaling.
+    """
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from sklearn.impute import SimpleImputer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if kind == 'logistic':
+        # lbfgs fits the multinomial model for three classes
+        steps = [('impute', SimpleImputer(strategy='median')), ('scale', StandardScaler()),
+                 ('classifier', LogisticRegression(max_iter=1000))]
+        grid = {'classifier__C': [0.01, 0.03, 0.1, 0.3, 1.0, 3.0]}
+    elif kind == 'boosting':
+        # Histogram boosting takes NaN as is
+        steps = [('classifier', HistGradientBoostingClassifier(random_state=0))]
+        grid = {'classifier__learning_rate': [0.03, 0.1], 'classifier__max_depth': [2, 3],
+                'classifier__max_iter': [100, 200]}
+    else:
+        raise ValueError(f"estimator must be one of {ESTIMATORS}, got {kind!r}")
+    return Pipeline(steps), grid
+
+
+def train(X, y, kind='logistic', folds=5, n_jobs=-1):
+    """Grid search over walk-forward folds, then refit on everything
+
+    TimeSeriesSplit keeps each validation fold after its training data,
+    as in a real season. Folds and grid points are fitted in parallel
+    across n_jobs processes.
+
+    Returns:
+        tuple: (fitted pipeline, metrics dict)
+    """
+    from sklearn.model_selection import GridSearchCV, TimeSeriesSplit
+
+    pipeline, grid = make_estimator(kind)
+    search = GridSearchCV(pipeline, grid, cv=TimeSeriesSplit(n_splits=folds), n_jobs=n_jobs,
+                          scoring={'log_loss': 'neg_log_loss', 'accuracy': 'accuracy'}, refit='log_loss')
+    search.fit(X, y)
+    best = search.best_index_
+    metrics = {
+        'cv_log_loss': float(-search.cv_results_['mean_test_log_loss'][best]),
+        'cv_accuracy': float(search.cv_results_['mean_test_accuracy'][best]),
+        'best_params': {name.split('__', 1)[1]: value for name, value in search.best_params_.items()},
+        'folds': folds,
+        'samples': int(len(y)),
+    }
+    return search.best_estimator_, metrics
+
+
+class OutcomeModel:
+    """A fitted outcome classifier and its preprocessing, as one versioned artifact
+
+    For the logistic pipeline, imputation, scaling and the linear layer
+    are folded into numpy arrays at load time, so predict_proba() over a
+    whole fixture list is two array operations and a softmax with no
+    per-call scikit-learn overhead. Other estimators go through the
+    pipeline's own predict_proba().
+    """
+    def __init__(self, pipeline, kind, metrics=None, trained_at=None):
+        self.pipeline = pipeline
+        self.kind = kind
+        self.metrics = metrics or {}
+        self.trained_at = trained_at
+        self.linear = kind == 'logistic'
+        if self.linear:
+            steps = pipeline.named_steps
+            classifier, scaler = steps['classifier'], steps['scale']
+            # Softmax columns follow classifier.classes_, laid out as outcome codes here
+            order = np.searchsorted(classifier.classes_, [HOME_WIN, DRAW, AWAY_WIN])
+            self.fill = steps['impute'].statistics_
+            self.weights = (classifier.coef_[order] / scaler.scale_).T
+            self.bias = classifier.intercept_[order] - scaler.mean_ @ self.weights
+
+    def predict_proba(self, X):
+        """(n, 3) home/draw/away probabilities for an (n, len(FEATURES)) array, NaN for missing"""
+        X = np.asarray(X, dtype=np.float64)
+        if not self.linear:
+            return self.pipeline.predict_proba(X)
+        logits = np.where(np.isnan(X), self.fill, X) @ self.weights + self.bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def save(self, path=DEFAULT_OUTCOME_MODEL_FILE):
+        import joblib
+        import sklearn
+
+        artifact = {
+            'version': ARTIFACT_VERSION,
+            'sklearn_version': sklearn.__version__,
+            'features': list(FEATURES),
+            'kind': self.kind,
+            'metrics': self.metrics,
+            'trained_at': self.trained_at,
+            'pipeline': self.pipeline,
+        }
+        temp_path = path + '.tmp'
+        joblib.dump(artifact, temp_path)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_OUTCOME_MODEL_FILE):
+        """Load a saved artifact
+
+        Raises:
+            ValueError: the artifact was written for other features, another format
+                version or another scikit-learn version
+        """
+        import joblib
+        import sklearn
+
+        artifact = joblib.load(path)
+        if artifact.get('version') != ARTIFACT_VERSION or artifact.get('features') != list(FEATURES):
+            raise ValueError(f"{path} is outcome model version {artifact.get('version')}, "
+                             f"expected {ARTIFACT_VERSION}; retrain with prediction_model.py")
+        # Pickled estimators are only safe to use with the scikit-learn that wrote them
+        if artifact.get('sklearn_version') != sklearn.__version__:
+            raise ValueError(f"{path} was saved with scikit-learn {artifact.get('sklearn_version')}, "
+                             f"running {sklearn.__version__}; retrain with prediction_model.py")
+        return cls(artifact['pipeline'], artifact['kind'], artifact['metrics'], artifact['trained_at'])
+
+
+def load_outcome_model(model_file):
+    """Saved OutcomeModel, None when prediction_model.py has not been run or the artifact is unusable
+
+    A truncated or corrupt file, or one pickled against classes this
+    scikit-learn no longer has, is treated like a missing one so the
+    server keeps predicting without the classifier.
+    """
+    if not model_file or not os.path.exists(model_file):
+        return None
+    try:
+        return OutcomeModel.load(model_file)
+    except (OSError, EOFError, ValueError, KeyError, AttributeError, ImportError, pickle.UnpicklingError) as e:
+        print(f"Outcome model {model_file} not loaded, serving without it: {e!r}")
+        return None
+
+
+def train_outcome_model(analyzer, kind='logistic', folds=5, n_jobs=-1):
+    X, y, _ = training_set(analyzer)
+    pipeline, metrics = train(X, y, kind, folds, n_jobs)
+    return OutcomeModel(pipeline, kind, metrics, time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
+
+
+if __name__ == "__main__":
+    from probability_analyzer import ProbabilityAnalyzer
+    from utils.columnar_store import load_matches
+
+    arg_parser = argparse.ArgumentParser(description="Train the outcome classifier on historical matches")
+    arg_parser.add_argument('data', nargs='?', help="historical data file, the analyzer's data by default")
+    arg_parser.add_argument('--estimator', choices=ESTIMATORS, default='logistic')
+    arg_parser.add_argument('--folds', type=int, default=5, help="walk-forward cross-validation folds")
+    arg_parser.add_argument('--n-jobs', type=int, default=-1, help="parallel fits, -1 for every core")
+    arg_parser.add_argument('--output', default=DEFAULT_OUTCOME_MODEL_FILE)
+    args = arg_parser.parse_args()
+
+    analyzer = ProbabilityAnalyzer(load_matches(args.data) if args.data else None)
+    start = time.perf_counter()
+    model = train_outcome_model(analyzer, args.estimator, args.folds, args.n_jobs)
+    elapsed = time.perf_counter() - start
+    model.save(args.output)
+
+    metrics = model.metrics
+    print(f"Trained {args.estimator} on {metrics['samples']} matches in {elapsed:.1f}s, best {metrics['best_params']}")
+    print(f"Walk-forward CV ({metrics['folds']} folds): log loss {metrics['cv_log_loss']:.4f}, "
+          f"accuracy {metrics['cv_accuracy']:.1%}")
+    print(f"Outcome model saved to {args.output}")
@@ -1,55 +1,54 @@
 import json
+import os
+import sys
 from collections import defaultdict
+from pathlib import Path
 from cached_form_calculator import CachedFormCalculator
+from elo_ratings import EloRatings
+from match_index import TeamMatchIndex
+from matchup_index import DEFAULT_DATA_FILES, DEFAULT_MATCHUPS_FILE, MatchupIndex, build_index
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from data.database import ESPN, stored_matches
+from utils.columnar_store import load_matches
 
 class ProbabilityAnalyzer:
-    def __init__(self):
+    def __init__(self, matches=None):
         self.cache_calc = CachedFormCalculator()
-        self.matches = self.load_historical_data()
+        self.matches = matches if matches is not None else self.load_historical_data()
+        self.match_index = TeamMatchIndex(self.matches)
+        self.elo = EloRatings()
+        self.elo.process(sorted(self.matches, key=lambda x: x.date))
+        self.matchups = MatchupIndex().build(self.matches)
     
     def load_historical_data(self):
-        """Load match data"""
-        with open('premier_league_historical.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data['matches']  # Access the 'matches' key instead of returning the whole object
+        """Load match data as Match records, from the match database if it has been loaded
+
+        Falls back to the columnar store or .jsonl version if present.
+        """
+        return stored_matches(ESPN) or load_matches('premier_league_historical.json')
     
     def calculate_team_form(self, team_name, match_date, num_games=5):
         """Calculate team form based on last N games before the given date"""
-        team_matches = []
-        
-        # Get all matches for this team before the current match date
-        for match in self.matches:
-            if match['date'] < match_date:  # Only look at previous matches
-                if match['homeTeam']['name'] == team_name or match['awayTeam']['name'] == team_name:
-                    team_matches.append(match)
-        
-        # Sort by date (most recent first) and take last N games
-        team_matches.sort(key=lambda x: x['date'], reverse=True)
-        recent_matches = team_matches[:num_games]
-        
-        if len(recent_matches) < 3:  # Need minimum matches for reliable form
-            return None
-            
-        # Calculate points from recent matches (3 for win, 1 for draw, 0 for loss)
-        points = 0
-        for match in recent_matches:
-            winner = match['score']['winner']
-            if winner == 'DRAW':
-                points += 1
-            elif (winner == 'HOME_TEAM' and match['homeTeam']['name'] == team_name) or \
-                 (winner == 'AWAY_TEAM' and match['awayTeam']['name'] == team_name):
-                points += 3
-            # Loss = 0 points
-        
-        # Return form as points per game
-        return points / len(recent_matches)
+        # Need minimum of 3 matches for reliable form, points per game otherwise
+        return self.match_index.form_before(team_name, match_date, num_games, min_games=3)
+    
+    def calculate_team_rating(self, team_name, match_date):
+        """Elo rating going into the given date, None before the team's first match"""
+        return self.elo.rating_as_of(team_name, match_date)
+    
+    def calculate_head_to_head(self, home_team, away_team, match_date, num_games=5):
+        """Home team's points per game over the last N meetings before the given date"""
+        # Need minimum of 3 meetings, None otherwise
+        record = self.matchups.head_to_head(home_team, away_team, match_date, num_games)
+        return record['points_per_game'] if record['played'] >= 3 else None
     
     def calculate_basic_probabilities(self):
         """Calculate base home/away/draw rates"""
         total_matches = len(self.matches)
-        home_wins = sum(1 for m in self.matches if m['score']['winner'] == 'HOME_TEAM')
-        away_wins = sum(1 for m in self.matches if m['score']['winner'] == 'AWAY_TEAM') 
-        draws = sum(1 for m in self.matches if m['score']['winner'] == 'DRAW')
+        home_wins = sum(1 for m in self.matches if m.winner == 'HOME_TEAM')
+        away_wins = sum(1 for m in self.matches if m.winner == 'AWAY_TEAM') 
+        draws = sum(1 for m in self.matches if m.winner == 'DRAW')
         
         return {
             'home_win_rate': home_wins / total_matches,
@@ -64,13 +63,13 @@ class ProbabilityAnalyzer:
         processed_matches = 0
         
         # Sort matches by date to ensure chronological order
-        sorted_matches = sorted(self.matches, key=lambda x: x['date'])
+        sorted_matches = sorted(self.matches, key=lambda x: x.date)
         
         for i, match in enumerate(sorted_matches):
-            home_team = match['homeTeam']['name']
-            away_team = match['awayTeam']['name']
-            winner = match['score']['winner']
-            match_date = match['date']
+            home_team = match.home_team
+            away_team = match.away_team
+            winner = match.winner
+            match_date = match.date
 
             # Calculate form based on historical data up to this match
             home_form = self.calculate_team_form(home_team, match_date)
@@ -110,6 +109,57 @@ class ProbabilityAnalyzer:
         
         return form_probabilities
     
+    def analyze_rating_impact(self, bucket_size=50):
+        """Analyze how the Elo rating difference going into a match affects results"""
+        rating_outcomes = defaultdict(list)
+        
+        for match in sorted(self.matches, key=lambda x: x.date):
+            home_rating = self.calculate_team_rating(match.home_team, match.date)
+            away_rating = self.calculate_team_rating(match.away_team, match.date)
+            if home_rating is None or away_rating is None or match.winner is None:
+                continue
+            
+            rating_diff = round((home_rating - away_rating) / bucket_size) * bucket_size
+            rating_outcomes[rating_diff].append(match.winner)
+        
+        rating_probabilities = {}
+        for rating_diff, outcomes in rating_outcomes.items():
+            total = len(outcomes)
+            if total >= 5:  # Only include rating differences with enough samples
+                rating_probabilities[rating_diff] = {
+                    'home_win_prob': outcomes.count('HOME_TEAM') / total,
+                    'away_win_prob': outcomes.count('AWAY_TEAM') / total,
+                    'draw_prob': outcomes.count('DRAW') / total,
+                    'sample_size': total
+                }
+        
+        return rating_probabilities
+    
+    def analyze_head_to_head_impact(self, bucket_size=0.5):
+        """Analyze how the home team's record in recent meetings affects results"""
+        h2h_outcomes = defaultdict(list)
+        
+        for match in sorted(self.matches, key=lambda x: x.date):
+            h2h_ppg = self.calculate_head_to_head(match.home_team, match.away_team, match.date)
+            if h2h_ppg is None or match.winner is None:
+                continue
+            
+            h2h_bucket = round(h2h_ppg / bucket_size) * bucket_size
+            h2h_outcomes[h2h_bucket].append(match.winner)
+        
+        h2h_probabilities = {}
+        for h2h_ppg, outcomes in h2h_outcomes.items():
+            total = len(outcomes)
+            if total >= 5:  # Only include buckets with enough samples
+                h2h_probabilities[h2h_ppg] = {
+                    'home_win_prob': outcomes.count('HOME_TEAM') / total,
+                    'away_win_prob': outcomes.count('AWAY_TEAM') / total,
+                    'draw_prob': outcomes.count('DRAW') / total,
+                    'sample_size': total
+                }
+        
+        return h2h_probabilities
+    
     def generate_prediction_model(self):
         """Create the complete prediction model"""
         print("Analyzing 4 season Premier League data...")
@@ -132,9 +182,29 @@ class ProbabilityAnalyzer:
                       f"{probs['away_win_prob']:4.1%} | {probs['draw_prob']:4.1%} | "
                       f"{probs['sample_size']:7}")
 
+        rating_analysis = self.analyze_rating_impact()
+        print(f"\nElo rating impact analysis:")
+        print("Rating Diff | Home% | Away% | Draw% | Samples")
+        print("-" * 47)
+        for rating_diff, probs in sorted(rating_analysis.items()):
+            print(f"{rating_diff:11.0f} | {probs['home_win_prob']:4.1%} | "
+                  f"{probs['away_win_prob']:4.1%} | {probs['draw_prob']:4.1%} | "
+                  f"{probs['sample_size']:7}")
+
+        h2h_analysis = self.analyze_head_to_head_impact()
+        print(f"\nHead-to-head impact analysis (home PPG over the last 5 meetings):")
+        print("H2H PPG | Home% | Away% | Draw% | Samples")
+        print("-" * 43)
+        for h2h_ppg, probs in sorted(h2h_analysis.items()):
+            print(f"{h2h_ppg:7.1f} | {probs['home_win_prob']:4.1%} | "
+                  f"{probs['away_win_prob']:4.1%} | {probs['draw_prob']:4.1%} | "
+                  f"{probs['sample_size']:7}")
+
         model = {
             'basic_probabilities': basic_probs,
             'form_probabilities': form_analysis,
+            'rating_probabilities': rating_analysis,
+            'head_to_head_probabilities': h2h_analysis,
             'metadata': {
                 'season': '2028-2023',
                 'total_matches': basic_probs['total_matches']
@@ -145,6 +215,14 @@ class ProbabilityAnalyzer:
             json.dump(model, f, indent=2)
         
         print(f"\nPrediction model saved to prediction_model_18-23")
+
+        self.elo.save('elo_ratings.json')
+        print("Elo ratings saved to elo_ratings.json")
+
+        # The server's index covers both sources, not just the ESPN matches analysed here
+        matchups = build_index([path for path in DEFAULT_DATA_FILES if os.path.exists(path)])
+        matchups.save()
+        print(f"Head-to-head and venue records of {matchups.match_count} matches saved to {DEFAULT_MATCHUPS_FILE}")
         return model
 
 if __name__ == "__main__":
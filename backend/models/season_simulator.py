@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from model_server import ModelServer, fixture_teams
+
+# Outcome codes match utils/match_record.py: home win, draw, away win
+HOME_WIN, DRAW, AWAY_WIN = 0, 1, 2
+OUTCOME_CODES = {'HOME_TEAM': HOME_WIN, 'DRAW': DRAW, 'AWAY_TEAM': AWAY_WIN}
+HOME_POINTS = np.array([3, 1, 0], dtype=np.int16)
+AWAY_POINTS = np.array([0, 1, 3], dtype=np.int16)
+
+TOP_SPOTS = 4
+RELEGATION_SPOTS = 3
+
+
+def _simulate_chunk(cum_probs, home, away, n_teams, size, seed):
+    """Sample `size` seasons of the remaining fixtures
+
+    Runs in a worker process. Returns (outcomes, points, tiebreak):
+    outcome codes (size, fixtures), points from the sampled fixtures
+    (size, teams) and a random tiebreak per team per season.
+    """
+    rng = np.random.default_rng(seed)
+    draws = rng.random((size, len(home)))
+    outcomes = ((draws >= cum_probs[:, 0]).astype(np.int8) + (draws >= cum_probs[:, 1])).astype(np.int8)
+
+    # One-hot fixture -> team matrices turn the per-team sums into two matmuls
+    home_onehot = np.zeros((len(home), n_teams), dtype=np.float32)
+    away_onehot = np.zeros((len(away), n_teams), dtype=np.float32)
+    home_onehot[np.arange(len(home)), home] = 1
+    away_onehot[np.arange(len(away)), away] = 1
+    points = (HOME_POINTS[outcomes].astype(np.float32) @ home_onehot +
+              AWAY_POINTS[outcomes].astype(np.float32) @ away_onehot)
+    return outcomes, points.astype(np.int16), rng.random((size, n_teams), dtype=np.float32)
+
+
+class SeasonSimulator:
+    """Monte Carlo simulation of the rest of a season
+
+    Finished fixtures count as played; every other fixture is sampled
+    from the ModelServer's home/draw/away probabilities. Simulations run
+    in fixed-size chunks, each with its own child seed of `seed`, so the
+    result depends only on the seed and never on the number of workers.
+
+    Every sampled outcome is kept, so add_result() can condition the
+    existing simulations on a real result instead of starting over:
+    fixtures are sampled independently, so overwriting one fixture's
+    column leaves the rest of each simulated season valid.
+
+    Ties on points are broken by goal difference from played fixtures,
+    then at random, since goals are not simulated.
+    """
+    def __init__(self, fixtures, model_server=None, num_simulations=100000, seed=0,
+                 workers=None, chunk_size=10000, as_of=None):
+        self.model_server = model_server or ModelServer()
+        self.num_simulations = num_simulations
+        self.seed = seed
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+        names = sorted({name for fixture in fixtures for name in fixture_teams(fixture)})
+        self.teams = names
+        self.team_ids = {name: i for i, name in enumerate(names)}
+        self.base_points = np.zeros(len(names), dtype=np.int16)
+        self.goal_difference = np.zeros(len(names), dtype=np.int32)
+        self.played = 0
+
+        remaining = []
+        for fixture in fixtures:
+            if self.is_finished(fixture, as_of):
+                self.apply_result(fixture)
+            else:
+                remaining.append(fixture)
+        self.set_remaining(remaining)
+
+        self.outcomes = None
+        self.points = None
+        self.tiebreak = None
+
+    def set_remaining(self, fixtures):
+        """Fixtures to simulate; their order is the column order of self.outcomes"""
+        self.remaining = fixtures
+        self.remaining_index = {self.fixture_key(fixture): i for i, fixture in enumerate(fixtures)}
+
+    @staticmethod
+    def is_finished(fixture, as_of=None):
+        """A fixture with a result, and before as_of when one is given"""
+        if not isinstance(fixture, dict) or (fixture.get('score') or {}).get('winner') is None:
+            return False
+        return as_of is None or fixture.get('utcDate', '') < as_of
+
+    def fixture_key(self, fixture):
+        """Fixture id when there is one, else (home, away)"""
+        if isinstance(fixture, dict) and fixture.get('id') is not None:
+            return fixture['id']
+        return fixture_teams(fixture)
+
+    def apply_result(self, fixture):
+        """Add a finished fixture's points and goal difference to the base table"""
+        home, away = (self.team_ids[name] for name in fixture_teams(fixture))
+        outcome = OUTCOME_CODES[fixture['score']['winner']]
+        self.base_points[home] += HOME_POINTS[outcome]
+        self.base_points[away] += AWAY_POINTS[outcome]
+        full_time = fixture['score'].get('fullTime') or {}
+        if full_time.get('home') is not None and full_time.get('away') is not None:
+            self.goal_difference[home] += full_time['home'] - full_time['away']
+            self.goal_difference[away] += full_time['away'] - full_time['home']
+        self.played += 1
+        return home, away, outcome
+
+    def fixture_probabilities(self):
+        """Cumulative (home, home + draw) probabilities for the remaining fixtures"""
+        teams = [fixture_teams(fixture) for fixture in self.remaining]
+        probs = self.model_server.predict_arrays([h for h, _ in teams], [a for _, a in teams])['probs']
+        probs = probs / probs.sum(axis=1, keepdims=True)
+        return np.cumsum(probs, axis=1)[:, :2]
+
+    def run(self):
+        """Simulate every season from scratch and return summary()"""
+        # Drop fixtures that add_result() has since filled in
+        self.set_remaining([fixture for fixture in self.remaining
+                            if self.fixture_key(fixture) in self.remaining_index])
+        teams = [fixture_teams(fixture) for fixture in self.remaining]
+        home = np.array([self.team_ids[h] for h, _ in teams], dtype=np.int64)
+        away = np.array([self.team_ids[a] for _, a in teams], dtype=np.int64)
+        cum_probs = self.fixture_probabilities()
+
+        sizes = [min(self.chunk_size, self.num_simulations - start)
+                 for start in range(0, self.num_simulations, self.chunk_size)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        args = [(cum_probs, home, away, len(self.teams), size, seed) for size, seed in zip(sizes, seeds)]
+
+        workers = self.workers or os.cpu_count() or 1
+        if workers == 1 or len(args) < 2:
+            chunks = [_simulate_chunk(*arg) for arg in args]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(args))) as executor:
+                chunks = list(executor.map(_simulate_chunk, *zip(*args)))
+
+        self.outcomes = np.concatenate([c[0] for c in chunks])
+        self.points = np.concatenate([c[1] for c in chunks])
+        self.tiebreak = np.concatenate([c[2] for c in chunks])
+        return self.summary()
+
+    def add_result(self, fixture):
+        """Condition the stored simulations on one real result
+
+        The fixture must be one of the remaining ones and carry a score.
+        Only its column of sampled outcomes and its two teams' points are
+        touched; everything else from the last run() is reused.
+        """
+        index = self.remaining_index.pop(self.fixture_key(fixture), None)
+        if index is None:
+            raise ValueError(f"{fixture_teams(fixture)} is not a remaining fixture")
+
+        home, away, _ = self.apply_result(fixture)
+        if self.outcomes is not None:
+            sampled = self.outcomes[:, index]
+            # Points from played fixtures live in base_points, so drop the sampled ones
+            self.points[:, home] -= HOME_POINTS[sampled]
+            self.points[:, away] -= AWAY_POINTS[sampled]
+            # Column stays in place so the other indices remain valid
+            self.outcomes[:, index] = -1
+        return self.summary() if self.outcomes is not None else None
+
+    def final_points(self):
+        """Final points for every simulated season, (simulations, teams)"""
+        return self.points + self.base_points
+
+    def positions(self, points):
+        """League position (0 = champion) of every team in every simulation"""
+        key = points + 1e-3 * self.goal_difference + 1e-6 * self.tiebreak
+        order = np.argsort(-key, axis=1)
+        positions = np.empty_like(order)
+        np.put_along_axis(positions, order, np.arange(len(self.teams)), axis=1)
+        return positions
+
+    def summary(self):
+        """Title, top-4 and relegation odds and points distribution per team
+
+        Returns:
+            dict: team name -> odds, expected points, points percentiles and
+            the probability of finishing in each position
+        """
+        points = self.final_points()
+        positions = self.positions(points)
+        n_teams = len(self.teams)
+        position_counts = np.stack([np.bincount(positions[:, t], minlength=n_teams) for t in range(n_teams)])
+        position_probs = position_counts / len(points)
+        percentiles = np.percentile(points, [5, 50, 95], axis=0)
+
+        table = {}
+        for t, team in enumerate(self.teams):
+            table[team] = {
+                'title': float(position_probs[t, 0]),
+                'top4': float(position_probs[t, :TOP_SPOTS].sum()),
+                'relegation': float(position_probs[t, n_teams - RELEGATION_SPOTS:].sum()),
+                'expected_points': float(points[:, t].mean()),
+                'points_std': float(points[:, t].std()),
+                'points_p5': float(percentiles[0, t]),
+                'points_p50': float(percentiles[1, t]),
+                'points_p95': float(percentiles[2, t]),
+                'current_points': int(self.base_points[t]),
+                'positions': position_probs[t].tolist(),
+            }
+        return table
+
+
+def print_table(table):
+    print(f"{'Team':<28} | {'Pts':>3} | {'xPts':>5} | {'p5-p95':>7} | {'Title':>6} | {'Top 4':>6} | {'Rel.':>6}")
+    print("-" * 80)
+    for team, row in sorted(table.items(), key=lambda item: -item[1]['expected_points']):
+        print(f"{team:<28} | {row['current_points']:>3} | {row['expected_points']:5.1f} | "
+              f"{row['points_p5']:3.0f}-{row['points_p95']:<3.0f} | {row['title']:6.1%} | "
+              f"{row['top4']:6.1%} | {row['relegation']:6.1%}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Simulate the rest of a season from the prediction model")
+    arg_parser.add_argument('--fixtures', default='../data/24-25_fixtures.json',
+                            help="football-data.org matches for the season")
+    arg_parser.add_argument('--as-of', help="treat fixtures from this date on as unplayed, e.g. 2025-01-01")
+    arg_parser.add_argument('--simulations', type=int, default=100000)
+    arg_parser.add_argument('--workers', type=int, default=None, help="processes, 1 for serial")
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    with open(args.fixtures, 'r') as f:
+        season_fixtures = json.load(f)
+
+    simulator = SeasonSimulator(season_fixtures, num_simulations=args.simulations, seed=args.seed,
+                                workers=args.workers, as_of=args.as_of)
+    print(f"{simulator.played} fixtures played, simulating the other {len(simulator.remaining)} "
+          f"{args.simulations} times...")
+    print_table(simulator.run())
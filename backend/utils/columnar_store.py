@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from utils.match_record import MatchTable, read_matches
+from utils.match_stream import CHUNK_SIZE, MATCHES_ARRAY, historical_data_path
+
+# A store is a directory of .npy columns plus meta.json with the string
+# table of team names, so every column can be memory-mapped as-is
+STORE_SUFFIX = '.columns'
+STORE_VERSION = 1
+META_FILE = 'meta.json'
+
+
+def columnar_path(path):
+    """Store directory that sits next to a JSON data file"""
+    return os.path.splitext(path)[0] + STORE_SUFFIX
+
+
+def fresh_store(path):
+    """Store directory for path if it is built and newer than the JSON it came from
+
+    A store older than path (or its .jsonl sibling) is ignored so a rebuilt
+    JSON file is never shadowed by stale columns.
+    """
+    store = columnar_path(path)
+    meta_file = os.path.join(store, META_FILE)
+    if not os.path.exists(meta_file):
+        return None
+    built = os.path.getmtime(meta_file)
+    sources = [p for p in (path, os.path.splitext(path)[0] + '.jsonl') if os.path.exists(p)]
+    if any(os.path.getmtime(source) > built for source in sources):
+        return None
+    return store
+
+
+def _write_store(directory, kind, columns, meta):
+    """Write columns and meta.json to a temp directory, then swap it in"""
+    tmp_dir = directory + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, column in columns.items():
+        np.save(os.path.join(tmp_dir, name + '.npy'), np.ascontiguousarray(column))
+    meta = dict(meta, format=kind, version=STORE_VERSION, columns=sorted(columns))
+    with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+
+
+def _read_store(directory, kind, mmap=True):
+    """Return (meta, columns) with columns memory-mapped read-only"""
+    with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('format') != kind or meta.get('version') != STORE_VERSION:
+        raise ValueError(f"{directory} is not a version {STORE_VERSION} {kind} store")
+    columns = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r' if mmap else None)
+               for name in meta['columns']}
+    return meta, columns
+
+
+def _id_column(values):
+    """int64 column when every value is an int (-1 for missing), else strings ('' for missing)"""
+    if all(value is None or isinstance(value, int) for value in values):
+        return np.array([-1 if value is None else value for value in values], dtype=np.int64)
+    return np.array(['' if value is None else str(value) for value in values], dtype=str)
+
+
+def save_match_table(table, directory):
+    """Write a MatchTable as a columnar store"""
+    columns = {
+        'match_id': _id_column(table.match_id.tolist()),
+        'date': table.date,
+        'season': _id_column(table.season.tolist()),
+        'home': table.home,
+        'away': table.away,
+        'home_goals': table.home_goals,
+        'away_goals': table.away_goals,
+        'outcome': table.outcome,
+    }
+    _write_store(directory, 'matches', columns, {'rows': len(table), 'teams': table.teams})
+
+
+def load_match_table(directory, mmap=True):
+    """MatchTable whose columns are memory-mapped from a store"""
+    meta, columns = _read_store(directory, 'matches', mmap)
+    table = MatchTable()
+    table.teams = list(meta['teams'])
+    table.team_ids = {name: i for i, name in enumerate(table.teams)}
+    for name, column in columns.items():
+        setattr(table, name, column)
+    return table
+
+
+def load_match_columns(path):
+    """MatchTable for a historical data file, memory-mapped from its store if one is built
+
+    Nothing is copied out of an up to date store, so callers that work on
+    columns (FormEngine, bulk scans) should prefer this to load_matches().
+    Falls back to building the table from the .jsonl or JSON file.
+    """
+    store = fresh_store(path)
+    if store:
+        return load_match_table(store)
+    return MatchTable.from_matches(read_matches(historical_data_path(path)))
+
+
+def load_matches(path):
+    """Match records from the columnar store next to path if one is built
+
+    For callers that need one object per match; every row is copied out
+    of the store, see load_match_columns(). Falls back to the .jsonl or
+    JSON file when there is no up to date store.
+    """
+    store = fresh_store(path)
+    if store:
+        return load_match_table(store).records()
+    return read_matches(historical_data_path(path))
+
+
+class FormCacheColumns:
+    """form_cache.json as per-team and per-timeline-entry columns
+
+    Team i's timeline is rows timeline_start[i]:timeline_start[i + 1] of
+    the after_match / date / form_score / matches_used columns.
+    """
+    STAT_COLUMNS = ('matches', 'wins', 'draws', 'losses', 'win_rate', 'points_per_game')
+    TIMELINE_COLUMNS = ('after_match', 'date', 'form_score', 'matches_used')
+
+    def __init__(self, metadata, teams, descriptions, columns):
+        self.metadata = metadata
+        self.teams = teams
+        self.team_ids = {name: i for i, name in enumerate(teams)}
+        self.descriptions = descriptions
+        self.columns = columns
+
+    @classmethod
+    def from_cache(cls, cache):
+        """Columns from a form cache dict as built by FormCacheBuilder"""
+        teams = list(cache.get('teams', {}))
+        entries = [cache['teams'][name] for name in teams]
+        columns = {}
+        for stat in cls.STAT_COLUMNS:
+            dtype = np.float64 if stat in ('win_rate', 'points_per_game') else np.int32
+            columns[stat] = np.array([e['season_stats'][stat] for e in entries], dtype=dtype)
+        columns['form'] = np.array([e['representative_form']['score'] for e in entries], dtype=np.float64)
+
+        timelines = [e['form_timeline'] for e in entries]
+        columns['timeline_start'] = np.zeros(len(teams) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in timelines], out=columns['timeline_start'][1:])
+        rows = [row for timeline in timelines for row in timeline]
+        columns['after_match'] = np.array([r['after_match'] for r in rows], dtype=np.int32)
+        columns['date'] = np.array([r['date'] for r in rows], dtype=str)
+        columns['form_score'] = np.array([r['form_score'] for r in rows], dtype=np.float64)
+        columns['matches_used'] = np.array([r['matches_used'] for r in rows], dtype=np.int32)
+
+        descriptions = [e['representative_form']['description'] for e in entries]
+        return cls(cache.get('metadata', {}), teams, descriptions, columns)
+
+    def save(self, directory):
+        _write_store(directory, 'form_cache', self.columns, {
+            'metadata': self.metadata, 'teams': self.teams, 'descriptions': self.descriptions})
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        meta, columns = _read_store(directory, 'form_cache', mmap)
+        return cls(meta['metadata'], meta['teams'], meta['descriptions'], columns)
+
+    def team_form(self, team_name):
+        """Representative form score, None for an unknown team"""
+        team_id = self.team_ids.get(team_name)
+        if team_id is None:
+            return None
+        return float(self.columns['form'][team_id])
+
+    def season_stats(self, team_name):
+        """season_stats dict as in form_cache.json, None for an unknown team"""
+        team_id = self.team_ids.get(team_name)
+        if team_id is None:
+            return None
+        return {stat: self.columns[stat][team_id].item() for stat in self.STAT_COLUMNS}
+
+    def timeline(self, team_name):
+        """form_timeline entries for a team"""
+        team_id = self.team_ids.get(team_name)
+        if team_id is None:
+            return []
+        start, end = self.columns['timeline_start'][team_id:team_id + 2].tolist()
+        values = [self.columns[name][start:end].tolist() for name in self.TIMELINE_COLUMNS]
+        return [dict(zip(self.TIMELINE_COLUMNS, row)) for row in zip(*values)]
+
+    def to_cache(self):
+        """Rebuild the form_cache.json dict"""
+        return {
+            'metadata': self.metadata,
+            'teams': {name: {
+                'season_stats': self.season_stats(name),
+                'representative_form': {'score': self.team_form(name), 'description': self.descriptions[i]},
+                'form_timeline': self.timeline(name)
+            } for i, name in enumerate(self.teams)}
+        }
+
+
+def is_match_file(path):
+    """True for a match list, False for a form cache document"""
+    path = os.fspath(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        head = f.read(CHUNK_SIZE)
+    return path.endswith('.jsonl') or head.lstrip().startswith('[') or bool(MATCHES_ARRAY.search(head))
+
+
+def convert(path, output=None):
+    """Build the columnar store for a match file or form cache, returns its directory"""
+    output = output or columnar_path(path)
+    if is_match_file(path):
+        table = MatchTable.from_matches(read_matches(path))
+        save_match_table(table, output)
+        print(f"{path}: {len(table)} matches, {len(table.teams)} teams -> {output}")
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            columns = FormCacheColumns.from_cache(json.load(f))
+        columns.save(output)
+        print(f"{path}: form cache for {len(columns.teams)} teams -> {output}")
+    return output
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Convert match history and form cache JSON to columnar stores")
+    arg_parser.add_argument('files', nargs='+',
+                            help="premier_league_historical.json, 23-24_PLData.json, form_cache.json, ...")
+    arg_parser.add_argument('--output', help="store directory, only with a single input file")
+    args = arg_parser.parse_args()
+    if args.output and len(args.files) > 1:
+        arg_parser.error("--output takes a single input file")
+
+    for file in args.files:
+        convert(file, args.output)
@@ -0,0 +1,58 @@
+import json
+import os
+
+# Each line of a form cache log is one applied match:
+#   {"match_id": ..., "date": ..., "metadata": {...},
+#    "teams": {name: {"season_stats": {...}, "representative_form": {...},
+#                     "timeline_entry": {...}}}}
+# Team fields replace the cached values; timeline_entry is appended.
+
+
+def log_path(cache_file):
+    """Update log that sits next to a form cache file"""
+    return os.path.splitext(cache_file)[0] + '.log.jsonl'
+
+
+def append_entries(path, entries):
+    """Append entries and flush them to disk in one write"""
+    if not entries:
+        return
+    lines = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_entries(path, offset=0):
+    """Entries appended since byte offset
+
+    A partially written last line is left for the next call.
+
+    Returns:
+        (entries, offset): new entries and the offset to resume from
+    """
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    complete = data[:data.rfind(b'\n') + 1]
+    entries = [json.loads(line) for line in complete.splitlines() if line.strip()]
+    return entries, offset + len(complete)
+
+
+def apply_entry(cache, entry):
+    """Apply one log entry to a form cache dict in place
+
+    Safe to repeat: a timeline entry that is already present is skipped.
+    """
+    cache.setdefault('metadata', {}).update(entry.get('metadata', {}))
+    teams = cache.setdefault('teams', {})
+    for name, update in entry['teams'].items():
+        team = teams.setdefault(name, {'season_stats': {}, 'representative_form': {}, 'form_timeline': []})
+        team['season_stats'] = update['season_stats']
+        team['representative_form'] = update['representative_form']
+        timeline = team['form_timeline']
+        if not timeline or timeline[-1]['after_match'] < update['timeline_entry']['after_match']:
+            timeline.append(update['timeline_entry'])
@@ -0,0 +1,202 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.match_stream import iter_matches
+
+# Outcome codes used by MatchTable
+HOME_WIN, DRAW, AWAY_WIN, UNKNOWN = 0, 1, 2, -1
+OUTCOME_CODES = {'HOME_TEAM': HOME_WIN, 'DRAW': DRAW, 'AWAY_TEAM': AWAY_WIN}
+WINNERS = {code: winner for winner, code in OUTCOME_CODES.items()}
+
+
+def team_key(team_name):
+    """Team name both data sources agree on ('Arsenal FC' and 'Arsenal' -> 'arsenal')"""
+    key = team_name.casefold().strip()
+    return key[:-3] if key.endswith(' fc') else key
+
+
+@dataclass
+class Match:
+    """One finished (or scheduled) match in a single shared format
+
+    Built from either source schema with from_espn / from_football_data.
+    `date` is the source's ISO string, kept as-is so ordering and output
+    match the raw data; `winner` uses the HOME_TEAM / AWAY_TEAM / DRAW codes.
+    """
+    __slots__ = ('match_id', 'date', 'season', 'home_team', 'away_team', 'home_id', 'away_id',
+                 'home_goals', 'away_goals', 'winner')
+    match_id: object
+    date: str
+    season: object
+    home_team: str
+    away_team: str
+    home_id: object
+    away_id: object
+    home_goals: object
+    away_goals: object
+    winner: object
+
+    @classmethod
+    def from_espn(cls, match):
+        """Adapter for espn_json_parser.py output"""
+        score = match['score']
+        return cls(
+            match_id=match.get('_original_id'),
+            date=match['date'],
+            season=match.get('season'),
+            home_team=match['homeTeam']['name'],
+            away_team=match['awayTeam']['name'],
+            home_id=match['homeTeam'].get('id'),
+            away_id=match['awayTeam'].get('id'),
+            home_goals=score.get('homeScore'),
+            away_goals=score.get('awayScore'),
+            winner=score.get('winner')
+        )
+
+    @classmethod
+    def from_football_data(cls, match):
+        """Adapter for football-data.org v4 matches"""
+        score = match['score']
+        full_time = score.get('fullTime') or {}
+        season = match.get('season')
+        if isinstance(season, dict):
+            season = season.get('startDate', '')[:4] or None
+        return cls(
+            match_id=match.get('id'),
+            date=match['utcDate'],
+            season=season,
+            home_team=match['homeTeam']['name'],
+            away_team=match['awayTeam']['name'],
+            home_id=match['homeTeam'].get('id'),
+            away_id=match['awayTeam'].get('id'),
+            home_goals=full_time.get('home'),
+            away_goals=full_time.get('away'),
+            winner=score.get('winner')
+        )
+
+    @classmethod
+    def from_dict(cls, match):
+        """Pick the adapter from the dict's schema"""
+        if 'utcDate' in match:
+            return cls.from_football_data(match)
+        return cls.from_espn(match)
+
+    def is_home(self, team_name):
+        return team_name == self.home_team
+
+    def involves(self, team_name):
+        return team_name == self.home_team or team_name == self.away_team
+
+    def result_for(self, team_name):
+        """'WIN', 'DRAW', 'LOSS' for the team, 'UNKNOWN' without a result"""
+        if self.winner == 'DRAW':
+            return 'DRAW'
+        if self.winner == 'HOME_TEAM':
+            return 'WIN' if team_name == self.home_team else 'LOSS'
+        if self.winner == 'AWAY_TEAM':
+            return 'WIN' if team_name == self.away_team else 'LOSS'
+        return 'UNKNOWN'
+
+    def points_for(self, team_name):
+        """League points the team took from the match"""
+        if self.winner == 'DRAW':
+            return 1
+        if (self.winner == 'HOME_TEAM' and team_name == self.home_team) or \
+           (self.winner == 'AWAY_TEAM' and team_name == self.away_team):
+            return 3
+        return 0
+
+
+def read_matches(path):
+    """Load a historical data file (JSON, JSON Lines, either schema) as Match records"""
+    return [Match.from_dict(match) for match in iter_matches(path, slim=False)]
+
+
+def _cell(value):
+    """Plain Python value of a table cell, None for the -1 / '' missing markers"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    return None if value == -1 or value == '' else value
+
+
+class MatchTable:
+    """Struct-of-arrays match store with interned team ids for bulk work
+
+    Team names are stored once in `teams`; each match row holds int ids into
+    it. Goals are -1 and outcome UNKNOWN when a match has no result. Columns
+    may be memory-mapped, see utils/columnar_store.py.
+    """
+    def __init__(self):
+        self.teams = []
+        self.team_ids = {}
+        self.match_id = np.empty(0, dtype=object)
+        self.date = np.empty(0, dtype=str)
+        self.season = np.empty(0, dtype=object)
+        self.home = np.empty(0, dtype=np.int32)
+        self.away = np.empty(0, dtype=np.int32)
+        self.home_goals = np.empty(0, dtype=np.int16)
+        self.away_goals = np.empty(0, dtype=np.int16)
+        self.outcome = np.empty(0, dtype=np.int8)
+
+    def intern(self, team_name):
+        """Id for a team name, adding it on first sight"""
+        team_id = self.team_ids.get(team_name)
+        if team_id is None:
+            team_id = self.team_ids[team_name] = len(self.teams)
+            self.teams.append(team_name)
+        return team_id
+
+    @classmethod
+    def from_matches(cls, matches):
+        """Build from Match records"""
+        table = cls()
+        matches = list(matches)
+        intern = table.intern
+        table.match_id = np.array([m.match_id for m in matches] or [], dtype=object)
+        table.date = np.array([m.date for m in matches], dtype=str)
+        table.season = np.array([m.season for m in matches] or [], dtype=object)
+        table.home = np.array([intern(m.home_team) for m in matches], dtype=np.int32)
+        table.away = np.array([intern(m.away_team) for m in matches], dtype=np.int32)
+        table.home_goals = np.array([-1 if m.home_goals is None else m.home_goals for m in matches],
+                                    dtype=np.int16)
+        table.away_goals = np.array([-1 if m.away_goals is None else m.away_goals for m in matches],
+                                    dtype=np.int16)
+        table.outcome = np.array([OUTCOME_CODES.get(m.winner, UNKNOWN) for m in matches], dtype=np.int8)
+        return table
+
+    def __len__(self):
+        return len(self.home)
+
+    def match(self, row):
+        """Row as a Match record"""
+        return Match(
+            match_id=_cell(self.match_id[row]),
+            date=str(self.date[row]),
+            season=_cell(self.season[row]),
+            home_team=self.teams[self.home[row]],
+            away_team=self.teams[self.away[row]],
+            home_id=None,
+            away_id=None,
+            home_goals=_cell(self.home_goals[row]),
+            away_goals=_cell(self.away_goals[row]),
+            winner=WINNERS.get(int(self.outcome[row]))
+        )
+
+    def records(self):
+        """Every row as a Match record, column by column"""
+        teams = self.teams
+        rows = zip(self.match_id.tolist(), self.date.tolist(), self.season.tolist(),
+                   self.home.tolist(), self.away.tolist(), self.home_goals.tolist(),
+                   self.away_goals.tolist(), self.outcome.tolist())
+        return [Match(_cell(match_id), date, _cell(season), teams[home], teams[away], None, None,
+                      _cell(home_goals), _cell(away_goals), WINNERS.get(outcome))
+                for match_id, date, season, home, away, home_goals, away_goals, outcome in rows]
+
+    def home_points(self):
+        """Points the home side took in every match"""
+        return np.select([self.outcome == HOME_WIN, self.outcome == DRAW], [3, 1], 0).astype(np.int8)
+
+    def away_points(self):
+        """Points the away side took in every match"""
+        return np.select([self.outcome == AWAY_WIN, self.outcome == DRAW], [3, 1], 0).astype(np.int8)
@@ -0,0 +1,148 @@
+import json
+import os
+import re
+
+# Only the fields the analyzers read are kept in slim match records
+MATCH_FIELDS = {'id', '_original_id', 'date', 'utcDate', 'season', 'status', 'matchday',
+                'homeTeam', 'awayTeam', 'score'}
+TEAM_FIELDS = {'id', 'name', 'shortName', 'tla', 'abbreviation'}
+SCORE_FIELDS = {'winner', 'homeScore', 'awayScore', 'fullTime'}
+
+CHUNK_SIZE = 1 << 16
+MATCHES_ARRAY = re.compile(r'"matches"\s*:\s*\[')
+
+
+def slim_match(match):
+    """Copy of a match with only teams, score, date and ids
+
+    Works for both the ESPN-derived format and football-data.org matches,
+    dropping statistics, match_events, referees, odds and the like.
+    """
+    slim = {key: value for key, value in match.items() if key in MATCH_FIELDS}
+    for side in ('homeTeam', 'awayTeam'):
+        if side in slim:
+            slim[side] = {k: v for k, v in slim[side].items() if k in TEAM_FIELDS}
+    if 'score' in slim:
+        slim['score'] = {k: v for k, v in slim['score'].items() if k in SCORE_FIELDS}
+    return slim
+
+
+def _iter_json_array(f):
+    """Decode the objects of a JSON match array one at a time
+
+    Handles both a top-level list (23-24_PLData.json) and an object with a
+    "matches" list (premier_league_historical.json) without loading the
+    whole document.
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(CHUNK_SIZE)
+    eof = not buffer
+
+    # Find where the array of matches starts
+    while True:
+        stripped = buffer.lstrip()
+        if stripped.startswith('['):
+            pos = len(buffer) - len(stripped) + 1
+            break
+        found = MATCHES_ARRAY.search(buffer)
+        if found:
+            pos = found.end()
+            break
+        if eof:
+            return
+        chunk = f.read(CHUNK_SIZE)
+        eof = not chunk
+        buffer += chunk
+
+    while True:
+        # Skip separators between items
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = f.read(CHUNK_SIZE), 0
+            eof = not buffer
+
+        if pos >= len(buffer) or buffer[pos] == ']':
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Item runs past the buffer, read more and retry
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        yield item
+        pos = end
+        if pos > CHUNK_SIZE:
+            buffer, pos = buffer[pos:], 0
+
+
+def iter_matches(path, slim=True):
+    """Yield matches from a .jsonl file or a JSON match array, one at a time
+
+    Args:
+        path (str or Path): JSON Lines file or JSON file of matches
+        slim (bool, optional): yield slim_match records. Defaults to True.
+    """
+    path = os.fspath(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            items = (json.loads(line) for line in f if line.strip())
+        else:
+            items = _iter_json_array(f)
+        for match in items:
+            yield slim_match(match) if slim else match
+
+
+def write_matches(path, matches, append=False):
+    """Write matches as JSON Lines, one compact object per line
+
+    Args:
+        path (str, Path or file): output path, or an already open text file
+        matches (iterable): match dicts
+        append (bool, optional): append to an existing file. Defaults to False.
+
+    Returns:
+        int: number of matches written
+    """
+    if not isinstance(path, (str, os.PathLike)):
+        return _write_lines(path, matches)
+    with open(path, 'a' if append else 'w', encoding='utf-8') as f:
+        return _write_lines(f, matches)
+
+
+def _write_lines(f, matches):
+    count = 0
+    for match in matches:
+        f.write(json.dumps(match, ensure_ascii=False, separators=(',', ':')))
+        f.write('\n')
+        count += 1
+    return count
+
+
+def last_match(path):
+    """Last match of a JSON Lines file without reading the whole file"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        block = min(end, CHUNK_SIZE)
+        while True:
+            f.seek(end - block)
+            lines = f.read(block).rstrip(b'\n').split(b'\n')
+            if len(lines) > 1 or block == end:
+                return json.loads(lines[-1]) if lines[-1].strip() else None
+            block = min(end, block * 2)
+
+
+def historical_data_path(path):
+    """Prefer the .jsonl version of a historical data file when it exists"""
+    jsonl_path = os.path.splitext(path)[0] + '.jsonl'
+    return jsonl_path if os.path.exists(jsonl_path) else path
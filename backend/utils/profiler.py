@@ -0,0 +1,116 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from utils.metrics import REGISTRY
+
+SLOW_REQUESTS = REGISTRY.counter(
+    'profiler_slow_requests_total', "Requests over the profiler's threshold, stacks written", ['route'])
+
+
+class SlowRequestProfiler:
+    """Samples the Python stacks of in-flight requests and keeps the slow ones
+
+    A daemon thread wakes every interval and records the current stack of
+    each thread that is serving a request. When a request finishes over
+    slow_ms its samples are appended to output as folded stacks, one
+    "route;frame;frame count" line per distinct stack, ready for
+    flamegraph.pl or speedscope. Faster requests' samples are dropped.
+    """
+    def __init__(self, output, slow_ms=250.0, interval_ms=5.0):
+        self.output = output
+        self.slow_ms = slow_ms
+        self.interval = interval_ms / 1000
+        # thread id -> (start time, stack counts) for requests in flight
+        self.active = {}
+        self.frame_names = {}
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.sampler = None
+
+    def start(self):
+        if self.sampler is None or not self.sampler.is_alive():
+            self.stop_event.clear()
+            self.sampler = threading.Thread(target=self._sample_loop, name='request-profiler', daemon=True)
+            self.sampler.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.sampler is not None:
+            self.sampler.join()
+
+    def begin(self):
+        """Start sampling the calling thread"""
+        with self.lock:
+            self.active[threading.get_ident()] = (time.perf_counter(), Counter())
+
+    def end(self, label):
+        """Stop sampling the calling thread and write its stacks if the request was slow
+
+        Returns:
+            float: request duration in milliseconds, None if begin() wasn't called
+        """
+        with self.lock:
+            state = self.active.pop(threading.get_ident(), None)
+        if state is None:
+            return None
+        started, stacks = state
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= self.slow_ms and stacks:
+            SLOW_REQUESTS.inc(route=label)
+            self.write(label, stacks)
+        return duration_ms
+
+    def write(self, label, stacks):
+        root = label.replace(';', ':').replace(' ', '_')
+        lines = ''.join(f"{root};{stack} {count}\n" for stack, count in stacks.items())
+        with self.write_lock:
+            with open(self.output, 'a') as f:
+                f.write(lines)
+
+    def _frame_name(self, code):
+        name = self.frame_names.get(code)
+        if name is None:
+            name = self.frame_names[code] = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+        return name
+
+    def _folded(self, frame):
+        names = []
+        while frame is not None:
+            names.append(self._frame_name(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def _sample_loop(self):
+        while not self.stop_event.wait(self.interval):
+            with self.lock:
+                if not self.active:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, (_, stacks) in self.active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[self._folded(frame)] += 1
+
+
+def profile_slow_requests(app, output, slow_ms=250.0, interval_ms=5.0):
+    """Attach a SlowRequestProfiler to app's requests; nothing is hooked unless this is called"""
+    from flask import request
+
+    profiler = SlowRequestProfiler(output, slow_ms, interval_ms).start()
+
+    @app.before_request
+    def begin_sampling():
+        profiler.begin()
+
+    @app.teardown_request
+    def end_sampling(error=None):
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        profiler.end(f"{request.method} {route}")
+
+    app.extensions['profiler'] = profiler
+    return profiler
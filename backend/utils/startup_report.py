@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+REQUEST_MARKER = '--- first request'
+
+# Runs in a fresh interpreter: import the app, then serve one request.
+# The marker splits -X importtime output into startup and first-request imports.
+COLD_START = f'''
+import json, sys, time
+start = time.perf_counter()
+from app import app
+started = time.perf_counter()
+print({REQUEST_MARKER!r}, file=sys.stderr)
+response = app.test_client().get(sys.argv[1])
+done = time.perf_counter()
+print(json.dumps({{'status': response.status_code, 'startup': started - start, 'first_request': done - started}}))
+'''
+
+
+def parse_import_times(stderr):
+    """-X importtime output as (module, self us, cumulative us, depth), split at the request
+
+    Returns:
+        tuple: (imports during startup, imports during the first request)
+    """
+    phases = [[], []]
+    phase = 0
+    for line in stderr.splitlines():
+        if line == REQUEST_MARKER:
+            phase = 1
+        elif line.startswith('import time:') and 'self [us]' not in line:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            phases[phase].append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return tuple(phases)
+
+
+def package_times(imports):
+    """Total self import time per top-level package, slowest first"""
+    totals = defaultdict(int)
+    for name, self_us, _, _ in imports:
+        totals[name.split('.')[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def cold_start(path='/api/teams', import_times=False, env=None):
+    """Start a fresh interpreter in backend/, serve one request and time it
+
+    Args:
+        path (str, optional): GET request to serve. Defaults to '/api/teams'.
+        import_times (bool, optional): run with -X importtime, which slows
+            imports down, and add 'startup_imports' / 'request_imports'
+        env (dict, optional): environment for the process, os.environ by default
+
+    Returns:
+        dict: 'status', 'startup' and 'first_request' seconds measured inside
+            the process, 'total' seconds including interpreter start
+    """
+    command = [sys.executable] + (['-X', 'importtime'] if import_times else []) + ['-c', COLD_START, path]
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=env or os.environ.copy(),
+                            capture_output=True, text=True)
+    total = time.perf_counter() - start
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError(f"Cold start failed: {errors[-1] if errors else result.returncode}")
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['total'] = total
+    if import_times:
+        timings['startup_imports'], timings['request_imports'] = parse_import_times(result.stderr)
+    return timings
+
+
+def print_report(path='/api/teams', top=15, env=None):
+    """Cold start timings plus the slowest packages imported before and during the first request"""
+    timings = cold_start(path, import_times=True, env=env)
+    print(f"Cold start to first {path} response (HTTP {timings['status']}), with -X importtime overhead:")
+    print(f"  process total:  {timings['total'] * 1000:8.1f} ms")
+    print(f"  app import:     {timings['startup'] * 1000:8.1f} ms")
+    print(f"  first request:  {timings['first_request'] * 1000:8.1f} ms")
+
+    for title, imports in (("Imported at startup", timings['startup_imports']),
+                           ("Imported by the first request", timings['request_imports'])):
+        total_us = sum(self_us for _, self_us, _, _ in imports)
+        print(f"\n{title}: {len(imports)} modules, {total_us / 1000:.1f} ms")
+        print(f"{'Package':>24} | {'Self (ms)':>10}")
+        print("-" * 37)
+        for package, self_us in package_times(imports)[:top]:
+            print(f"{package:>24} | {self_us / 1000:10.1f}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Import-time breakdown of a cold backend start")
+    arg_parser.add_argument('--path', default='/api/teams', help="request timed after startup")
+    arg_parser.add_argument('--top', type=int, default=15, help="packages to list")
+    args = arg_parser.parse_args()
+
+    print_report(args.path, args.top)
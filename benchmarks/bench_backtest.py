@@ -0,0 +1,79 @@
+"""Walk-forward backtest timings: serial vs process pool vs naive refits
+
+Runs the default backtest grid over the parsed ESPN history (or synthetic
+seasons) with one worker and with --workers, then estimates a naive
+walk-forward of the form model that rebuilds the match index and bucket
+counts from scratch every matchweek.
+
+Usage: python benchmarks/bench_backtest.py [--file premier_league_historical.json] [--seasons 10] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+MODELS_DIR = Path(__file__).resolve().parent.parent / 'backend' / 'models'
+sys.path.insert(0, str(MODELS_DIR))
+
+from backtest import DEFAULT_GRIDS, Backtester, param_grid, run_grid  # noqa: E402
+from match_index import TeamMatchIndex  # noqa: E402
+from utils.match_record import Match, read_matches  # noqa: E402
+from synthetic import espn_seasons  # noqa: E402
+
+
+def naive_week(matches, start):
+    """Refit the form bucket model on matches[:start] the way analyze_form_impact does"""
+    history = matches[:start]
+    index = TeamMatchIndex(history)
+    counts = Counter()
+    for match in history:
+        home_form = index.form_before(match.home_team, match.date)
+        away_form = index.form_before(match.away_team, match.date)
+        if home_form is not None and away_form is not None:
+            counts[round(4 * (home_form - away_form)) / 4, match.winner] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--file', help='historical data file, synthetic seasons otherwise')
+    parser.add_argument('--seasons', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if args.file:
+        matches = read_matches(args.file)
+    else:
+        matches = [Match.from_dict(m) for m in espn_seasons(args.seasons)]
+    configs = [config for model, params in DEFAULT_GRIDS.items() for config in param_grid(model, **params)]
+
+    timings = {}
+    for workers in sorted({1, args.workers}):
+        start = time.perf_counter()
+        run_grid(matches, configs, workers=workers)
+        timings[f'grid, {workers} workers'] = time.perf_counter() - start
+
+    backtester = Backtester(matches)
+    start = time.perf_counter()
+    backtester.run({'model': 'form', 'window': 5, 'bucket': 0.25})
+    timings['form model, indexed'] = time.perf_counter() - start
+
+    # Rebuilding every week is slow, so time a few weeks near the end and scale up
+    week_starts = backtester.week_starts.tolist()
+    sample = week_starts[-5:]
+    start = time.perf_counter()
+    for week_start in sample:
+        naive_week(backtester.matches, week_start)
+    timings['form model, naive refits'] = (time.perf_counter() - start) / len(sample) * len(week_starts)
+
+    print(f"{len(matches)} matches, {len(week_starts)} matchweeks, {len(configs)} configs")
+    print(f"{'Mode':>26} | {'Time (s)':>8}")
+    print("-" * 39)
+    for label, seconds in timings.items():
+        print(f"{label:>26} | {seconds:8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Bulk season collection against the mock API, sequential vs concurrent, with a resume
+
+Serves --competitions synthetic competitions of --seasons seasons each
+from the local mock football-data.org server, then collects all of them
+three ways: one season at a time, concurrently but cancelled half way
+through (as if interrupted), and the same concurrent run resumed from
+its checkpoint. tests/test_bulk_collector.py checks that a resumed run
+writes the same files as a sequential one.
+
+Usage: python benchmarks/bench_bulk_collector.py [--competitions 4] [--seasons 10] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / 'data'))
+
+from api_client import FootballDataAPI, RateLimiter, ResponseCache  # noqa: E402
+from bulk_collector import BulkCollector  # noqa: E402
+from mock_football_api import MockFootballAPI  # noqa: E402
+from synthetic import football_data_seasons  # noqa: E402
+
+FIRST_YEAR = 2000
+
+
+def make_api(base_url):
+    api = FootballDataAPI(cache=ResponseCache(max_entries=0))
+    api.base_url = base_url
+    api.rate_limiter = RateLimiter(requests_per_minute=10 ** 6)
+    return api
+
+
+def season_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.jsonl'))
+
+
+async def interrupt(collector, codes, years, after):
+    """Run collect() and cancel it once `after` seasons are checkpointed"""
+    task = asyncio.create_task(collector.collect(codes, years))
+    while len(collector.checkpoint.completed) < after and not task.done():
+        await asyncio.sleep(0.001)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--competitions', type=int, default=4)
+    parser.add_argument('--seasons', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.05, help='mock API latency in seconds')
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    codes = [f"C{i}" for i in range(args.competitions)]
+    competitions = {code: football_data_seasons(args.seasons, FIRST_YEAR, seed=i) for i, code in enumerate(codes)}
+    years = list(range(FIRST_YEAR, FIRST_YEAR + args.seasons))
+    mock = MockFootballAPI(latency=args.latency, competitions=competitions).start()
+
+    with tempfile.TemporaryDirectory() as sequential_dir, tempfile.TemporaryDirectory() as concurrent_dir:
+        start = time.perf_counter()
+        sequential = BulkCollector(make_api(mock.base_url), sequential_dir, concurrency=1,
+                                   verbose=False).run(codes, years)
+        sequential_time = time.perf_counter() - start
+
+        # Cancel the concurrent run once half the seasons are in, like a Ctrl-C
+        collector = BulkCollector(make_api(mock.base_url), concurrent_dir, concurrency=args.concurrency,
+                                  verbose=False)
+        start = time.perf_counter()
+        asyncio.run(interrupt(collector, codes, years, len(codes) * len(years) // 2))
+        interrupted_time = time.perf_counter() - start
+        checkpointed = len(BulkCollector(make_api(mock.base_url), concurrent_dir).checkpoint.completed)
+
+        start = time.perf_counter()
+        resumed = BulkCollector(make_api(mock.base_url), concurrent_dir, concurrency=args.concurrency,
+                                verbose=False).run(codes, years)
+        resumed_time = time.perf_counter() - start
+        files = season_files(concurrent_dir)
+
+    mock.stop()
+    print(f"{len(codes)} competitions x {len(years)} seasons, {sequential['matches']} matches, "
+          f"{args.latency * 1000:.0f} ms mock latency")
+    print(f"{'Run':>32} | {'Seasons':>7} | {'Time (s)':>8}")
+    print("-" * 53)
+    print(f"{'sequential':>32} | {len(sequential['collected']):7} | {sequential_time:8.2f}")
+    print(f"{f'concurrency {args.concurrency}, interrupted':>32} | {checkpointed:7} | {interrupted_time:8.2f}")
+    print(f"{f'concurrency {args.concurrency}, resumed':>32} | {len(resumed['collected']):7} | {resumed_time:8.2f}")
+    print(f"{len(files)} season files, {len(sequential['failed']) + len(resumed['failed'])} failed")
+
+
+if __name__ == '__main__':
+    main()
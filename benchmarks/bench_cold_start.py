@@ -0,0 +1,66 @@
+"""Cold start to the first /api/teams response, lazy vs preloaded services
+
+Starts a fresh interpreter per run, with the football-data client pointed
+at the local mock API, and times the whole process from launch to its
+first /api/teams response. PRELOAD_SERVICES=1 builds the API client,
+prediction model and match database before the request, the way the
+backend started before the app factory.
+
+Pass --budget-ms to fail (exit 1) when the lazy median goes over it, so
+the benchmark can gate cold-start regressions.
+
+Usage: python benchmarks/bench_cold_start.py [--runs 7] [--budget-ms 800]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from mock_football_api import MockFootballAPI  # noqa: E402
+from utils.startup_report import cold_start  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--budget-ms', type=float, help='fail if the lazy median exceeds this')
+    args = parser.parse_args()
+
+    mock = MockFootballAPI().start()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = os.environ.copy()
+        env.update({
+            'FOOTBALL_DATA_BASE_URL': mock.base_url,
+            'API_CACHE_PATH': '',
+            'DATABASE_URL': 'sqlite:///' + os.path.join(tmp, 'matches.db'),
+        })
+        for label, preload in (('lazy', '0'), ('preloaded', '1')):
+            env['PRELOAD_SERVICES'] = preload
+            runs = [cold_start('/api/teams', env=env) for _ in range(args.runs)]
+            assert all(run['status'] == 200 for run in runs)
+            results[label] = runs
+    mock.stop()
+
+    print(f"{args.runs} cold starts each, milliseconds")
+    print(f"{'Mode':>10} | {'total p50':>9} | {'total min':>9} | {'app import':>10} | {'1st request':>11}")
+    print("-" * 62)
+    for label, runs in results.items():
+        totals = [run['total'] * 1000 for run in runs]
+        print(f"{label:>10} | {statistics.median(totals):9.1f} | {min(totals):9.1f} | "
+              f"{statistics.median(run['startup'] * 1000 for run in runs):10.1f} | "
+              f"{statistics.median(run['first_request'] * 1000 for run in runs):11.1f}")
+
+    lazy_median = statistics.median(run['total'] * 1000 for run in results['lazy'])
+    if args.budget_ms is not None and lazy_median > args.budget_ms:
+        print(f"Cold start regression: {lazy_median:.1f} ms > {args.budget_ms:.1f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
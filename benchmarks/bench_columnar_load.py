@@ -0,0 +1,115 @@
+"""Cold load time and memory: JSON files vs the memory-mapped columnar stores
+
+Writes the parsed ESPN seasons (repeated to span decades) as the pretty
+printed JSON document, as JSON Lines and as a columnar store, plus a form
+cache for as many synthetic seasons, then loads each one in a fresh
+process and reports time and the resident memory the loaded data holds
+(Linux only, read from /proc/self/statm).
+
+Usage: python benchmarks/bench_columnar_load.py [--copies 10]
+"""
+import argparse
+import contextlib
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path[:0] = [str(BACKEND_DIR), str(BACKEND_DIR / 'models'), str(BACKEND_DIR / 'data')]
+
+from bench_streaming_memory import build_dataset  # noqa: E402
+from cached_form_calculator import CachedFormCalculator  # noqa: E402
+from synthetic import football_data_seasons  # noqa: E402
+from utils.columnar_store import convert, load_match_columns, load_matches  # noqa: E402
+from utils.match_record import Match, read_matches  # noqa: E402
+
+
+def form_lookups(calc):
+    """Touch every team's form and season stats"""
+    teams = calc.columns.teams if calc.columns is not None else list(calc.cache.get('teams', {}))
+    for team in teams:
+        calc.get_team_form(team)
+        calc.get_team_season_stats(team)
+    return calc
+
+
+def table_scan(path):
+    """Map the store and read one full column"""
+    table = load_match_columns(path)
+    table.outcome.sum()
+    return table
+
+
+MODES = {
+    'history: JSON': lambda d: read_matches(str(d / 'historical.json')),
+    'history: JSON Lines': lambda d: read_matches(str(d / 'historical.jsonl')),
+    'history: store records': lambda d: load_matches(str(d / 'historical.json')),
+    'history: store table': lambda d: table_scan(str(d / 'historical.json')),
+    'form cache: JSON': lambda d: form_lookups(CachedFormCalculator(str(d / 'json' / 'form_cache.json'))),
+    'form cache: store': lambda d: form_lookups(CachedFormCalculator(str(d / 'form_cache.json'))),
+}
+
+
+def build_form_cache(directory, seasons):
+    from form_cache_builder import FormCacheBuilder
+    with contextlib.redirect_stdout(io.StringIO()):
+        builder = FormCacheBuilder(matches=[Match.from_football_data(m) for m in football_data_seasons(seasons)])
+        cache = builder.build_complete_cache()
+    (directory / 'json').mkdir()
+    for path in (directory / 'form_cache.json', directory / 'json' / 'form_cache.json'):
+        with open(path, 'w') as f:
+            json.dump(cache, f, indent=2)
+
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 1e6
+
+
+def run_mode(mode, directory):
+    """Child process: run one mode and print seconds and RSS held by the result in MB"""
+    baseline = rss_mb()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = MODES[mode](Path(directory))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'seconds': elapsed, 'added_mb': rss_mb() - baseline}))
+    del result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--copies', type=int, default=10, help='times to repeat the ESPN seasons')
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.dir)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        total, json_path, _ = build_dataset(directory, args.copies)
+        build_form_cache(directory, 4 * args.copies)
+        with contextlib.redirect_stdout(io.StringIO()):
+            convert(str(json_path))
+            convert(str(directory / 'form_cache.json'))
+
+        print(f"{total} matches, form cache for {4 * args.copies} seasons")
+        print(f"{'Mode':>24} | {'Time (s)':>8} | {'Held RSS (MB)':>14}")
+        print("-" * 52)
+        for mode in MODES:
+            output = subprocess.run([sys.executable, __file__, '--mode', mode, '--dir', str(directory)],
+                                    capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:>24} | {result['seconds']:8.3f} | {result['added_mb']:14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Match database ingest, load and last-N query timings over many synthetic seasons
+
+Writes --seasons synthetic seasons as JSON, bulk loads them into a
+temporary SQLite database, then compares loading every match from the
+database against parsing the JSON file, and prepared "last N matches
+before date" queries against the full file load and scan each query
+needed before.
+
+Usage: python benchmarks/bench_database.py [--seasons 25] [--queries 1000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from data.database import MatchDatabase  # noqa: E402
+from utils.match_record import read_matches  # noqa: E402
+from utils.match_stream import iter_matches  # noqa: E402
+from synthetic import espn_seasons  # noqa: E402
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - start
+
+
+def scan_last_n(data_file, team, date, num_games=5):
+    """Last N matches the way every caller did it: load the file, filter, sort"""
+    played = [m for m in read_matches(data_file)
+              if m.date < date and m.winner and team in (m.home_team, m.away_team)]
+    return sorted(played, key=lambda m: m.date, reverse=True)[:num_games]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seasons', type=int, default=25)
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    raw = espn_seasons(args.seasons)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, 'history.json')
+        with open(data_file, 'w') as f:
+            json.dump(raw, f)
+
+        database = MatchDatabase('sqlite:///' + os.path.join(tmp, 'matches.db'))
+        _, ingest_time = timed(lambda: database.insert_matches(iter_matches(data_file, slim=False)))
+        _, reingest_time = timed(lambda: database.insert_matches(iter_matches(data_file, slim=False)))
+        matches, db_load_time = timed(lambda: database.load_matches())
+        _, json_load_time = timed(lambda: read_matches(data_file))
+
+        rng = random.Random(0)
+        teams = sorted({m.home_team for m in matches})
+        queries = [(rng.choice(teams), rng.choice(matches).date) for _ in range(args.queries)]
+        _, query_time = timed(lambda: [database.last_n_before(team, date) for team, date in queries])
+        # Loading the file per query is slow, so time a few and scale up
+        sample = queries[:5]
+        _, scan_time = timed(lambda: [scan_last_n(data_file, team, date) for team, date in sample])
+        scan_time *= len(queries) / len(sample)
+        database.engine.dispose()
+
+    print(f"{len(matches)} matches over {args.seasons} seasons, {len(teams)} teams")
+    print(f"{'Mode':>32} | {'Time (ms)':>10}")
+    print("-" * 45)
+    print(f"{'bulk ingest':>32} | {ingest_time * 1000:10.1f}")
+    print(f"{'re-ingest (upsert)':>32} | {reingest_time * 1000:10.1f}")
+    print(f"{'load all, database':>32} | {db_load_time * 1000:10.1f}")
+    print(f"{'load all, JSON file':>32} | {json_load_time * 1000:10.1f}")
+    print(f"{f'{args.queries} last-5 queries, database':>32} | {query_time * 1000:10.1f}")
+    print(f"{f'{args.queries} last-5 queries, file scan':>32} | {scan_time * 1000:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Elo rating build and query timings over many synthetic seasons
+
+Writes --seasons synthetic seasons as JSON Lines, rates them in one
+streaming pass, then compares adding one more match online against
+rebuilding every rating, and rating_as_of() lookups against replaying
+the history up to each date.
+
+Usage: python benchmarks/bench_elo_ratings.py [--seasons 25] [--queries 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / 'models'))
+
+from elo_ratings import EloRatings, build_ratings  # noqa: E402
+from utils.match_record import Match  # noqa: E402
+from utils.match_stream import write_matches  # noqa: E402
+from synthetic import espn_seasons  # noqa: E402
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - start
+
+
+def replay_until(matches, date):
+    """Ratings as of date without the snapshot index"""
+    elo = EloRatings()
+    elo.process(m for m in matches if m.date < date)
+    return elo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seasons', type=int, default=25)
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    raw = espn_seasons(args.seasons)
+    matches = [Match.from_dict(m) for m in raw]
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, 'history.jsonl')
+        write_matches(data_file, raw)
+        elo, stream_time = timed(lambda: build_ratings(data_file))
+
+    # One more match at the end of the history
+    last = matches[-1]
+    extra = Match(None, last.date, last.season, last.away_team, last.home_team, None, None, 2, 1, 'HOME_TEAM')
+    _, online_time = timed(lambda: elo.update(extra))
+    _, rebuild_time = timed(lambda: EloRatings().process(matches + [extra]))
+
+    rng = random.Random(0)
+    queries = [(rng.choice(elo.teams), rng.choice(matches).date) for _ in range(args.queries)]
+    _, as_of_time = timed(lambda: [elo.rating_as_of(team, date) for team, date in queries])
+    # Replaying is slow, so time a few and scale up
+    sample = queries[:5]
+    _, replay_time = timed(lambda: [replay_until(matches, date).rating(team) for team, date in sample])
+    replay_time *= len(queries) / len(sample)
+
+    print(f"{len(matches)} matches over {args.seasons} seasons, {len(elo.teams)} teams")
+    print(f"{'Mode':>30} | {'Time (ms)':>10}")
+    print("-" * 43)
+    print(f"{'streaming build from JSONL':>30} | {stream_time * 1000:10.1f}")
+    print(f"{'add one match, online':>30} | {online_time * 1000:10.3f}")
+    print(f"{'add one match, full rebuild':>30} | {rebuild_time * 1000:10.1f}")
+    print(f"{f'{args.queries} as-of queries, index':>30} | {as_of_time * 1000:10.1f}")
+    print(f"{f'{args.queries} as-of queries, replay':>30} | {replay_time * 1000:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Rolling feature matrix builds: from scratch, from the cache, and extended by new matches
+
+Generates --seasons synthetic seasons with ESPN-style statistics and
+match events, builds the rolling feature matrix from scratch, again
+from an unchanged cache, and then with one more season appended, which
+extends the cached build instead of recomputing it. The extended matrix
+must match a from-scratch build of the same matches.
+
+Usage: python benchmarks/bench_feature_pipeline.py [--seasons 25] [--window 5]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from models.feature_pipeline import FeatureConfig, FeaturePipeline  # noqa: E402
+from synthetic import espn_seasons  # noqa: E402
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seasons', type=int, default=25)
+    parser.add_argument('--window', type=int, default=5)
+    args = parser.parse_args()
+
+    matches = espn_seasons(args.seasons + 1, details=True)
+    earlier = matches[:len(matches) * args.seasons // (args.seasons + 1)]
+    config = FeatureConfig(window=args.window)
+
+    with tempfile.TemporaryDirectory() as cache_dir, tempfile.TemporaryDirectory() as scratch_dir:
+        pipeline = FeaturePipeline(config, cache_dir)
+        _, cold_time = timed(lambda: pipeline.build(earlier))
+        _, cached_time = timed(lambda: pipeline.build(earlier))
+        assert pipeline.last_build['computed'] == 0
+        extended, extend_time = timed(lambda: pipeline.build(matches))
+        assert pipeline.last_build['computed'] == len(matches) - len(earlier)
+
+        scratch, full_time = timed(lambda: FeaturePipeline(config, scratch_dir).build(matches))
+        assert np.array_equal(extended.values, scratch.values, equal_nan=True)
+
+    print(f"{len(earlier)} matches + {len(matches) - len(earlier)} new, "
+          f"{len(scratch.columns)} features, window {args.window}")
+    print(f"{'Build':>32} | {'Time (ms)':>10}")
+    print("-" * 45)
+    print(f"{'from scratch':>32} | {cold_time * 1000:10.1f}")
+    print(f"{'unchanged, from cache':>32} | {cached_time * 1000:10.1f}")
+    print(f"{'one season added, extended':>32} | {extend_time * 1000:10.1f}")
+    print(f"{'one season added, from scratch':>32} | {full_time * 1000:10.1f}")
+    print("Extended matrix matches the from-scratch build")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Benchmark FormCacheBuilder.build_complete_cache on the columnar FormEngine
+
+Rebuilds the form cache for 1 to 20 synthetic seasons (and the real
+23-24_PLData.json) with both the FormEngine and the original per-team scans,
+and checks the serialized form_cache.json output is byte-identical.
+
+Usage: python benchmarks/bench_form_cache.py [--scan-max-seasons 10]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+DATA_DIR = BACKEND_DIR / 'data'
+sys.path[:0] = [str(DATA_DIR), str(BACKEND_DIR)]
+
+from form_cache_builder import FormCacheBuilder  # noqa: E402
+from utils.match_record import Match  # noqa: E402
+from synthetic import football_data_seasons  # noqa: E402
+
+
+def scan_build(builder, window=5):
+    """The pre-engine build: rescan the match list for every team"""
+    cache = {
+        'metadata': {
+            'created_date': date.today().isoformat(),
+            'season': '2023-24',
+            'total_teams': len(builder.teams),
+            'total_matches': len(builder.matches)
+        },
+        'teams': {}
+    }
+    for team in builder.teams:
+        team_matches = builder.get_team_matches_chronological(team)
+        total_matches = len(team_matches)
+        wins = sum(1 for m in team_matches if builder.get_match_result(m, team) == 'WIN')
+        draws = sum(1 for m in team_matches if builder.get_match_result(m, team) == 'DRAW')
+        losses = sum(1 for m in team_matches if builder.get_match_result(m, team) == 'LOSS')
+
+        # Original calculate_rolling_form fetched the team's matches again
+        rolling_matches = builder.get_team_matches_chronological(team)
+        timeline = []
+        for i in range(len(rolling_matches)):
+            recent = rolling_matches[max(0, i - window):i]
+            points = 0
+            for match in recent:
+                result = builder.get_match_result(match, team)
+                points += 3 if result == 'WIN' else 1 if result == 'DRAW' else 0
+            timeline.append({
+                'after_match': i + 1,
+                'date': rolling_matches[i]['date'],
+                'form_score': points / len(recent) if recent else 0.0,
+                'matches_used': len(recent)
+            })
+
+        mid_season_forms = [t['form_score'] for t in timeline[10:30] if t['matches_used'] >= 5]
+        representative_form = sum(mid_season_forms) / len(mid_season_forms) if mid_season_forms else 0
+
+        cache['teams'][team] = {
+            'season_stats': {
+                'matches': total_matches,
+                'wins': wins,
+                'draws': draws,
+                'losses': losses,
+                'win_rate': wins / total_matches if total_matches > 0 else 0,
+                'points_per_game': (wins * 3 + draws) / total_matches if total_matches > 0 else 0
+            },
+            'representative_form': {
+                'score': representative_form,
+                'description': 'Average form from mid-season period'
+            },
+            'form_timeline': timeline
+        }
+    return cache
+
+
+def run(label, matches, with_scan):
+    matches = [Match.from_football_data(match) for match in matches]
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        builder = FormCacheBuilder(matches=matches)
+        engine_cache = builder.build_complete_cache()
+        engine_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine_output = json.dumps(engine_cache, indent=2)
+    dump_time = time.perf_counter() - start
+
+    scan_cell = '-'
+    if with_scan:
+        start = time.perf_counter()
+        scan_cache = scan_build(builder)
+        scan_cell = f"{time.perf_counter() - start:9.3f}"
+        assert json.dumps(scan_cache, indent=2) == engine_output, \
+            f"{label}: engine output differs from the scan"
+
+    print(f"{label:>12} | {len(matches):>7} | {engine_time:10.3f} | {scan_cell:>9} | {dump_time:9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scan-max-seasons', type=int, default=10)
+    args = parser.parse_args()
+
+    # FormCacheBuilder looks for 23-24_PLData.json in the data folder
+    os.chdir(DATA_DIR)
+
+    print(f"{'Dataset':>12} | {'Matches':>7} | {'Engine (s)':>10} | {'Scan (s)':>9} | {'JSON (s)':>9}")
+    print("-" * 62)
+    with open('23-24_PLData.json', 'r') as f:
+        run('23-24', json.load(f), with_scan=True)
+    for seasons in [1, 5, 10, 20]:
+        run(f"{seasons} seasons", football_data_seasons(seasons), seasons <= args.scan_max_seasons)
+
+
+if __name__ == '__main__':
+    main()
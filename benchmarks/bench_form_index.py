@@ -0,0 +1,88 @@
+"""Benchmark ProbabilityAnalyzer.analyze_form_impact from 1 to 20 seasons
+
+Compares the per-team match index against the original full-history scan
+and checks both produce the same form probabilities.
+
+Usage: python benchmarks/bench_form_index.py [--max-seasons 20] [--scan-max-seasons 5]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+MODELS_DIR = BACKEND_DIR / 'models'
+sys.path[:0] = [str(MODELS_DIR), str(BACKEND_DIR)]
+
+from probability_analyzer import ProbabilityAnalyzer  # noqa: E402
+from utils.match_record import Match  # noqa: E402
+from synthetic import espn_seasons  # noqa: E402
+
+
+def scan_team_form(matches, team_name, match_date, num_games=5):
+    """The pre-index implementation: scan and sort the raw match dicts"""
+    team_matches = [m for m in matches if m['date'] < match_date and
+                    (m['homeTeam']['name'] == team_name or m['awayTeam']['name'] == team_name)]
+    team_matches.sort(key=lambda x: x['date'], reverse=True)
+    recent_matches = team_matches[:num_games]
+    if len(recent_matches) < 3:
+        return None
+    points = 0
+    for match in recent_matches:
+        winner = match['score']['winner']
+        if winner == 'DRAW':
+            points += 1
+        elif (winner == 'HOME_TEAM' and match['homeTeam']['name'] == team_name) or \
+             (winner == 'AWAY_TEAM' and match['awayTeam']['name'] == team_name):
+            points += 3
+    return points / len(recent_matches)
+
+
+def timed_form_impact(analyzer):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = analyzer.analyze_form_impact()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-seasons', type=int, default=20)
+    parser.add_argument('--scan-max-seasons', type=int, default=5,
+                        help='largest history to run the quadratic scan on')
+    args = parser.parse_args()
+
+    # CachedFormCalculator reads form_cache.json relative to the models folder
+    os.chdir(MODELS_DIR)
+
+    print(f"{'Seasons':>7} | {'Matches':>7} | {'Build (s)':>9} | {'Index (s)':>9} | {'Scan (s)':>9} | Speedup")
+    print("-" * 66)
+    for seasons in [1, 2, 5, 10, 15, 20]:
+        if seasons > args.max_seasons:
+            break
+        matches = espn_seasons(seasons)
+        records = [Match.from_espn(match) for match in matches]
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer = ProbabilityAnalyzer(matches=records)
+        build_time = time.perf_counter() - start
+        indexed, index_time = timed_form_impact(analyzer)
+
+        scan_cell, speedup_cell = '-', '-'
+        if seasons <= args.scan_max_seasons:
+            analyzer.calculate_team_form = lambda team, date, num_games=5: \
+                scan_team_form(matches, team, date, num_games)
+            scanned, scan_time = timed_form_impact(analyzer)
+            assert scanned == indexed, "indexed form probabilities differ from the scan"
+            scan_cell = f"{scan_time:9.3f}"
+            speedup_cell = f"{scan_time / index_time:6.0f}x"
+
+        print(f"{seasons:>7} | {len(matches):>7} | {build_time:9.3f} | {index_time:9.3f} | {scan_cell:>9} | {speedup_cell}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Dixon-Coles goals model fit and scoring timings
+
+Fits the model to --seasons synthetic seasons (or a historical data
+file), then times scoring one fixture from cached team parameters, a
+repeated fixture from the outcome cache, and a season of fixtures
+through the vectorized score_matrices path.
+
+Usage: python benchmarks/bench_goals_model.py [--seasons 10] [--file premier_league_historical.json]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from models.goals_model import DixonColesModel  # noqa: E402
+from utils.match_record import Match  # noqa: E402
+from utils.match_stream import iter_matches  # noqa: E402
+from synthetic import espn_seasons  # noqa: E402
+
+
+def per_call(call, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        call()
+    return (time.perf_counter() - start) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seasons', type=int, default=10)
+    parser.add_argument('--file', help='historical data file, synthetic seasons otherwise')
+    args = parser.parse_args()
+
+    raw = iter_matches(args.file) if args.file else espn_seasons(args.seasons)
+    matches = [Match.from_dict(m) for m in raw]
+
+    start = time.perf_counter()
+    model = DixonColesModel().fit(matches)
+    fit_time = time.perf_counter() - start
+
+    home, away = model.teams[0], model.teams[1]
+    season = [(m.home_team, m.away_team) for m in matches[-380:]]
+    home_teams, away_teams = [h for h, _ in season], [a for _, a in season]
+
+    single = per_call(lambda: model.score_matrix(home, away), 10000)
+    model.outcome_probabilities(home, away)
+    cached = per_call(lambda: model.outcome_probabilities(home, away), 10000)
+    batch = per_call(lambda: model.predict_arrays(home_teams, away_teams), 100) / len(season)
+
+    print(f"{len(matches)} matches, {len(model.teams)} teams, converged: {model.metadata['converged']}")
+    print(f"{'Step':>30} | {'Time':>12}")
+    print("-" * 45)
+    print(f"{'fit':>30} | {fit_time * 1000:9.1f} ms")
+    print(f"{'score_matrix, one fixture':>30} | {single * 1e6:9.1f} us")
+    print(f"{'outcome_probabilities, cached':>30} | {cached * 1e6:9.1f} us")
+    print(f"{'predict_arrays, per fixture':>30} | {batch * 1e6:9.1f} us")
+
+
+if __name__ == '__main__':
+    main()
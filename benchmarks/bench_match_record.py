@@ -0,0 +1,88 @@
+"""Memory per match and field access cost of each match representation
+
+Loads the parsed ESPN history (or synthetic seasons) as raw dicts, slim
+dicts, Match records and a MatchTable, and reports traced bytes per match
+plus the time to read teams and winner from every match. Strings shared
+with the raw dicts (team names, dates) are only counted once, under raw.
+
+Usage: python benchmarks/bench_match_record.py [--file premier_league_historical.json] [--seasons 20]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+import sys
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from utils.match_record import HOME_WIN, Match, MatchTable  # noqa: E402
+from utils.match_stream import iter_matches, slim_match  # noqa: E402
+from synthetic import espn_seasons  # noqa: E402
+
+
+def traced_build(build):
+    """Return (result, bytes allocated and still held)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def dict_access(matches):
+    return sum(1 for m in matches
+               if m['score']['winner'] == 'HOME_TEAM' and m['homeTeam']['name'] != m['awayTeam']['name'])
+
+
+def record_access(matches):
+    return sum(1 for m in matches if m.winner == 'HOME_TEAM' and m.home_team != m.away_team)
+
+
+def table_access(table):
+    return int(np.count_nonzero((table.outcome == HOME_WIN) & (table.home != table.away)))
+
+
+def timed(access, data, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        access(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--file', help='historical data file, synthetic seasons otherwise')
+    parser.add_argument('--seasons', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.file:
+        load = lambda: list(iter_matches(args.file, slim=False))
+    else:
+        load = lambda: espn_seasons(args.seasons)
+
+    raw, raw_size = traced_build(load)
+    modes = {
+        'raw dicts': (raw, raw_size, dict_access),
+        'slim dicts': (*traced_build(lambda: [slim_match(m) for m in raw]), dict_access),
+        'Match records': (*traced_build(lambda: [Match.from_dict(m) for m in raw]), record_access),
+    }
+    records = modes['Match records'][0]
+    modes['MatchTable'] = (*traced_build(lambda: MatchTable.from_matches(records)), table_access)
+
+    n = len(raw)
+    print(f"{n} matches")
+    print(f"{'Format':>14} | {'Bytes/match':>11} | {'Access (ms)':>11}")
+    print("-" * 42)
+    for label, (data, size, access) in modes.items():
+        print(f"{label:>14} | {size / n:11.0f} | {timed(access, data) * 1000:11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Head-to-head and home/away lookups from the matchup index vs scanning matches
+
+Builds a MatchupIndex over --seasons synthetic seasons in one pass, then
+answers the same point-in-time queries (a fixture's head-to-head record,
+its last 5 meetings and both sides' venue splits, as of a random date)
+from the index and by filtering the match list per query, the way a
+backtest would without it. Both must agree. Saving and loading the index
+is timed too, since that is all /api/predict does at startup.
+
+Usage: python benchmarks/bench_matchup_index.py [--seasons 25] [--queries 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from models.matchup_index import MatchupIndex  # noqa: E402
+from utils.match_record import Match, team_key  # noqa: E402
+from synthetic import espn_seasons  # noqa: E402
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - start
+
+
+def record(results):
+    wins = sum(goals_for > goals_against for goals_for, goals_against in results)
+    draws = sum(goals_for == goals_against for goals_for, goals_against in results)
+    return (len(results), wins, draws, sum(goals_for for goals_for, _ in results),
+            sum(goals_against for _, goals_against in results))
+
+
+def scan_matchup(matches, home_team, away_team, as_of, last_n=5):
+    """The index's matchup() by filtering every match before as_of"""
+    home_key, away_key = team_key(home_team), team_key(away_team)
+    meetings, home_games, away_games = [], [], []
+    for m in matches:
+        if m.date >= as_of:
+            continue
+        home, away = team_key(m.home_team), team_key(m.away_team)
+        if home == home_key and away == away_key:
+            meetings.append((m.home_goals, m.away_goals))
+        elif home == away_key and away == home_key:
+            meetings.append((m.away_goals, m.home_goals))
+        if home == home_key:
+            home_games.append((m.home_goals, m.away_goals))
+        if away == away_key:
+            away_games.append((m.away_goals, m.home_goals))
+    return (record(meetings), record(meetings[-last_n:]),
+            record(home_games[-last_n:]), record(away_games[-last_n:]))
+
+
+def index_matchup(index, home_team, away_team, as_of):
+    matchup = index.matchup(home_team, away_team, as_of)
+    return tuple((r['played'], r['wins'], r['draws'], r['goals_for'], r['goals_against'])
+                 for r in (matchup['head_to_head'], matchup['recent_head_to_head'],
+                           matchup['home_at_home'], matchup['away_on_road']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seasons', type=int, default=25)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    matches = sorted((Match.from_espn(m) for m in espn_seasons(args.seasons)), key=lambda m: m.date)
+    index, build_time = timed(lambda: MatchupIndex().build(matches))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'matchup_index.json')
+        _, save_time = timed(lambda: index.save(path))
+        _, load_time = timed(lambda: MatchupIndex.load(path))
+        size_kb = os.path.getsize(path) / 1024
+
+    rng = random.Random(0)
+    teams = sorted({m.home_team for m in matches})
+    queries = [(*rng.sample(teams, 2), rng.choice(matches).date[:10]) for _ in range(args.queries)]
+    from_index, index_time = timed(lambda: [index_matchup(index, *query) for query in queries])
+    # Scans are slow, so time a sample and scale up
+    sample = queries[:100]
+    from_scan, scan_time = timed(lambda: [scan_matchup(matches, *query) for query in sample])
+    assert from_index[:len(sample)] == from_scan
+    scan_time *= len(queries) / len(sample)
+
+    print(f"{len(matches)} matches over {args.seasons} seasons, {len(index.totals)} index keys, {size_kb:.0f} KB saved")
+    print(f"{'Mode':>32} | {'Time (ms)':>10}")
+    print("-" * 45)
+    print(f"{'build (one pass)':>32} | {build_time * 1000:10.1f}")
+    print(f"{'save':>32} | {save_time * 1000:10.1f}")
+    print(f"{'load':>32} | {load_time * 1000:10.1f}")
+    print(f"{f'{args.queries} matchups, index':>32} | {index_time * 1000:10.1f}")
+    print(f"{f'{args.queries} matchups, match scan':>32} | {scan_time * 1000:10.1f}")
+    print(f"Index lookup: {index_time / len(queries) * 1e6:.1f}us per matchup, "
+          f"{scan_time / index_time:.0f}x faster than scanning")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Per-request cost of the metrics hooks and the sampling profiler
+
+Serves the same /api/predict requests from three apps sharing one model:
+the bare routes with CORS, the default app (route histograms on,
+profiler off) and the default app plus the slow-request profiler
+sampling every request. The profiler's threshold is set out of reach, so
+its numbers cover sampling only, not writing stacks. Apps take turns
+over --rounds and the best round is reported, to keep noise out. The
+hooks' own cost, one histogram observation per request, is timed
+directly as well, since it sits well inside request-to-request noise.
+
+Usage: python benchmarks/bench_metrics_overhead.py [--requests 1000] [--rounds 5] [--interval-ms 5]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from flask import Flask
+from flask_cors import CORS
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+import app as backend_app  # noqa: E402
+from utils.metrics import Histogram  # noqa: E402
+from utils.profiler import profile_slow_requests  # noqa: E402
+
+BODY = {'homeTeam': {'name': 'Arsenal FC', 'shortName': 'Arsenal'},
+        'awayTeam': {'name': 'Chelsea FC', 'shortName': 'Chelsea'}}
+
+
+def per_request_us(flask_app, requests):
+    client = flask_app.test_client()
+    for _ in range(50):
+        client.post('/api/predict', json=BODY)
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.post('/api/predict', json=BODY)
+        assert response.status_code == 200
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000, help='requests per app per round')
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument('--interval-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    services = backend_app.app.extensions['services']
+    services.model_server
+
+    bare = Flask('bare')
+    CORS(bare)
+    bare.register_blueprint(backend_app.api)
+    bare.extensions['services'] = services
+
+    profiled = backend_app.create_app()
+    profiled.extensions['services'] = services
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = profile_slow_requests(profiled, str(Path(tmp) / 'stacks.folded'),
+                                         slow_ms=float('inf'), interval_ms=args.interval_ms)
+        apps = [('bare routes', bare), ('metrics (default)', backend_app.app), ('metrics + profiler', profiled)]
+        best = {label: float('inf') for label, _ in apps}
+        for _ in range(args.rounds):
+            for label, flask_app in apps:
+                best[label] = min(best[label], per_request_us(flask_app, args.requests))
+        profiler.stop()
+    timings = list(best.items())
+
+    histogram = Histogram('bench_seconds', "observe() timing", ['method', 'route', 'status'])
+    start = time.perf_counter()
+    for _ in range(100000):
+        histogram.observe(0.001, method='POST', route='/api/predict', status=200)
+    observe_us = (time.perf_counter() - start) / 100000 * 1e6
+
+    baseline = timings[0][1]
+    print(f"POST /api/predict, best of {args.rounds} rounds of {args.requests}")
+    print(f"{'App':>20} | {'us/request':>10} | {'overhead':>9}")
+    print("-" * 46)
+    for label, micros in timings:
+        print(f"{label:>20} | {micros:10.1f} | {micros - baseline:+8.1f}us")
+    print(f"Histogram.observe(): {observe_us:.2f}us per request")
+
+
+if __name__ == '__main__':
+    main()
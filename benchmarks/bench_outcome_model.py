@@ -0,0 +1,75 @@
+"""Outcome model training with parallel cross-validation, and batched inference per match
+
+Builds point-in-time features over --seasons synthetic seasons, trains
+the logistic outcome model serially and with --n-jobs parallel fits,
+then times scoring a fixture list through the folded numpy path, the
+scikit-learn pipeline and one fixture at a time. Both batched paths
+must give the same probabilities.
+
+Usage: python benchmarks/bench_outcome_model.py [--seasons 10] [--fixtures 380] [--n-jobs -1]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / 'models'))
+
+from prediction_model import OutcomeModel, train, training_set  # noqa: E402
+from probability_analyzer import ProbabilityAnalyzer  # noqa: E402
+from utils.match_record import Match  # noqa: E402
+from synthetic import espn_seasons  # noqa: E402
+
+
+def timed(call, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = call()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seasons', type=int, default=10)
+    parser.add_argument('--fixtures', type=int, default=380)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    args = parser.parse_args()
+
+    matches = [Match.from_espn(m) for m in espn_seasons(args.seasons)]
+    # The analyzer reports its missing form cache, which doesn't matter here
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = ProbabilityAnalyzer(matches)
+    (X, y, _), feature_time = timed(lambda: training_set(analyzer))
+    train(X[:500], y[:500], n_jobs=1)  # imports and first-fit warm-up
+    (pipeline, metrics), serial_time = timed(lambda: train(X, y, n_jobs=1))
+    _, parallel_time = timed(lambda: train(X, y, n_jobs=args.n_jobs))
+
+    model = OutcomeModel(pipeline, 'logistic', metrics)
+    fixtures = X[-args.fixtures:]
+    fast, fast_time = timed(lambda: model.predict_proba(fixtures), repeat=200)
+    slow, sklearn_time = timed(lambda: pipeline.predict_proba(fixtures), repeat=20)
+    _, single_time = timed(lambda: [model.predict_proba(row[None]) for row in fixtures], repeat=5)
+    assert np.allclose(fast, slow)
+
+    print(f"{len(y)} matches, {X.shape[1]} features, CV log loss {metrics['cv_log_loss']:.4f}, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'Step':>36} | {'Time (ms)':>10} | {'us/match':>8}")
+    print("-" * 62)
+    print(f"{'point-in-time features':>36} | {feature_time * 1000:10.1f} | {feature_time / len(y) * 1e6:8.1f}")
+    print(f"{'train + 5-fold grid search, 1 job':>36} | {serial_time * 1000:10.1f} |")
+    print(f"{f'train + 5-fold grid search, {args.n_jobs} jobs':>36} | {parallel_time * 1000:10.1f} |")
+    for label, seconds in ((f'score {len(fixtures)} fixtures, numpy', fast_time),
+                           (f'score {len(fixtures)} fixtures, sklearn', sklearn_time),
+                           (f'score {len(fixtures)} fixtures one by one', single_time)):
+        print(f"{label:>36} | {seconds * 1000:10.3f} | {seconds / len(fixtures) * 1e6:8.2f}")
+
+
+if __name__ == '__main__':
+    main()
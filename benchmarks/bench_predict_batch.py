@@ -0,0 +1,65 @@
+"""Throughput of batch predictions over 24-25_fixtures.json
+
+Predicts every fixture of the season (repeated --repeat times) through
+ModelServer.predict_fixtures, through POST /api/predict/batch with the
+NDJSON body fully read, and with one POST /api/predict per fixture, and
+prints fixtures per second.
+
+Usage: python benchmarks/bench_predict_batch.py [--repeat 10]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+import app as backend_app  # noqa: E402
+
+FIXTURES_FILE = BACKEND_DIR / 'data' / '24-25_fixtures.json'
+
+
+def timed(call, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help='copies of the 380 fixture season')
+    args = parser.parse_args()
+
+    with open(FIXTURES_FILE, 'r') as f:
+        fixtures = json.load(f) * args.repeat
+    server = backend_app.app.extensions['services'].model_server
+    client = backend_app.app.test_client()
+
+    def endpoint():
+        response = client.post('/api/predict/batch', json=fixtures)
+        assert response.status_code == 200
+        assert response.data.count(b'\n') == len(fixtures)
+
+    def one_by_one():
+        for fixture in fixtures:
+            response = client.post('/api/predict', json={'homeTeam': fixture['homeTeam'],
+                                                         'awayTeam': fixture['awayTeam']})
+            assert response.status_code == 200
+
+    print(f"{len(fixtures)} fixtures")
+    print(f"{'Mode':>26} | {'Time (s)':>8} | {'Fixtures/s':>10}")
+    print("-" * 50)
+    for label, call in [('predict_fixtures', lambda: server.predict_fixtures(fixtures)),
+                        ('/api/predict/batch', endpoint),
+                        ('/api/predict per fixture', one_by_one)]:
+        seconds = timed(call)
+        print(f"{label:>26} | {seconds:8.3f} | {len(fixtures) / seconds:10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Measure /api/predict latency against the old upstream form lookups
+
+Runs the four football-data form lookups the route used to make against
+the local mock API (response cache disabled, so every lookup pays the
+mock's round-trip latency), then /api/predict served from the in-memory
+model, with and without a reload loop swapping snapshots underneath it.
+
+Usage: python benchmarks/bench_predict_latency.py [--latency 0.05] [--requests 50]
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+import app as backend_app  # noqa: E402
+from data.api_client import RateLimiter, ResponseCache  # noqa: E402
+from mock_football_api import MockFootballAPI  # noqa: E402
+
+FIXTURES = [
+    ('Arsenal FC', 'Arsenal', 'Chelsea FC', 'Chelsea'),
+    ('Liverpool FC', 'Liverpool', 'Manchester City FC', 'Man City'),
+    ('Tottenham Hotspur FC', 'Tottenham', 'Aston Villa FC', 'Aston Villa'),
+]
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99), 'mean': statistics.mean(ordered)}
+
+
+def sequential_lookups(api, home, away):
+    """The four upstream lookups the route used to make"""
+    api.get_recent_form(home, limit=5)
+    api.get_recent_form(away, limit=5)
+    api.get_season_form(home)
+    api.get_season_form(away)
+
+
+def run(label, call, n):
+    samples = []
+    for i in range(n):
+        fixture = FIXTURES[i % len(FIXTURES)]
+        start = time.perf_counter()
+        call(fixture)
+        samples.append((time.perf_counter() - start) * 1000)
+    stats = percentiles(samples)
+    print(f"{label:>22} | " + " | ".join(f"{stats[k]:8.1f}" for k in ('p50', 'p95', 'p99', 'mean')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05, help='mock API latency in seconds')
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    mock = MockFootballAPI(latency=args.latency).start()
+    services = backend_app.app.extensions['services']
+    api = services.football_api
+    api.base_url = mock.base_url
+    api.rate_limiter = RateLimiter(requests_per_minute=10 ** 6)
+    # Team list stays cached so only the per-team /matches calls are measured
+    api.team_registry().ensure_loaded()
+    api.cache = ResponseCache(max_entries=0)
+    client = backend_app.app.test_client()
+    # The model loads on first use, keep that out of the timings
+    services.model_server
+
+    def predict(fixture):
+        home, home_short, away, away_short = fixture
+        response = client.post('/api/predict', json={
+            'homeTeam': {'name': home, 'shortName': home_short},
+            'awayTeam': {'name': away, 'shortName': away_short},
+        })
+        assert response.status_code == 200
+
+    print(f"Mock latency {args.latency * 1000:.0f} ms, {args.requests} requests, times in ms")
+    print(f"{'Mode':>22} | {'p50':>8} | {'p95':>8} | {'p99':>8} | {'mean':>8}")
+    print("-" * 66)
+    run('old upstream lookups', lambda f: sequential_lookups(api, f[0], f[2]), args.requests)
+    run('/api/predict', predict, args.requests)
+
+    # Reloads build a new snapshot off the request path and swap it in
+    stop = threading.Event()
+
+    def reload_loop():
+        while not stop.is_set():
+            services.model_server.load()
+
+    reloader = threading.Thread(target=reload_loop)
+    reloader.start()
+    run('/api/predict reloading', predict, args.requests)
+    stop.set()
+    reloader.join()
+    print(f"{services.model_server.reloads} model loads")
+    mock.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Season simulator timings: full runs by worker count vs add_result
+
+Simulates the 24-25 season from --as-of onwards, serially and with a
+process pool, checks both give identical odds for the same seed, then
+times conditioning the stored simulations on the next real result
+against re-running everything.
+
+Usage: python benchmarks/bench_season_simulator.py [--simulations 100000] [--as-of 2025-03-01]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+MODELS_DIR = Path(__file__).resolve().parent.parent / 'backend' / 'models'
+sys.path.insert(0, str(MODELS_DIR))
+
+from model_server import ModelServer  # noqa: E402
+from season_simulator import SeasonSimulator  # noqa: E402
+
+FIXTURES_FILE = MODELS_DIR.parent / 'data' / '24-25_fixtures.json'
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--simulations', type=int, default=100000)
+    parser.add_argument('--as-of', default='2025-03-01')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with open(FIXTURES_FILE, 'r') as f:
+        fixtures = json.load(f)
+    server = ModelServer()
+
+    def simulator(workers):
+        return SeasonSimulator(fixtures, model_server=server, num_simulations=args.simulations,
+                               workers=workers, as_of=args.as_of)
+
+    serial = simulator(1)
+    serial_odds, serial_time = timed(serial.run)
+    simulated_fixtures = len(serial.remaining)
+    pooled_odds, pooled_time = timed(simulator(args.workers).run)
+    assert serial_odds == pooled_odds, "odds depend on the worker count"
+
+    next_result = serial.remaining[0]
+    _, incremental_time = timed(lambda: serial.add_result(next_result))
+    _, rerun_time = timed(serial.run)
+
+    print(f"{args.simulations} simulations of {simulated_fixtures} fixtures")
+    print(f"{'Mode':>22} | {'Time (s)':>8}")
+    print("-" * 35)
+    print(f"{'run, 1 worker':>22} | {serial_time:8.3f}")
+    print(f"{f'run, {args.workers} workers':>22} | {pooled_time:8.3f}")
+    print(f"{'add_result':>22} | {incremental_time:8.3f}")
+    print(f"{'run after the result':>22} | {rerun_time:8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Peak memory of loading vs streaming the historical match dataset
+
+Builds a multi-decade dataset by repeating the parsed ESPN seasons with
+shifted dates, writes it as one indented JSON document and as JSON Lines,
+then runs each load mode in a fresh process and reports peak RSS.
+
+Usage: python benchmarks/bench_streaming_memory.py [--copies 10]
+"""
+import argparse
+import contextlib
+import io
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+ESPN_DIR = BACKEND_DIR / 'data' / 'espn'
+sys.path[:0] = [str(BACKEND_DIR), str(ESPN_DIR)]
+
+from espn_json_parser import ESPNJSONParser, HistoricalProbabilityAnalyzer  # noqa: E402
+from utils.match_record import Match, MatchTable, read_matches  # noqa: E402
+from utils.match_stream import iter_matches, write_matches  # noqa: E402
+
+MODES = {
+    'json.load document': lambda path: json.load(open(path, encoding='utf-8'))['matches'],
+    'slim records list': lambda path: list(iter_matches(path)),
+    'Match records list': read_matches,
+    'MatchTable': lambda path: MatchTable.from_matches(Match.from_dict(m) for m in iter_matches(path, slim=False)),
+    'analyzer in memory': lambda path: HistoricalProbabilityAnalyzer(path).calculate_basic_probabilities(),
+    'analyzer streaming': lambda path: HistoricalProbabilityAnalyzer(path, stream=True).calculate_basic_probabilities(),
+}
+
+
+def shifted_copies(matches, copies, years_per_copy=5):
+    """Repeat the dataset further back in time so it spans decades"""
+    for copy in range(copies - 1, -1, -1):
+        shift = copy * years_per_copy
+        for match in matches:
+            shifted = dict(match)
+            shifted['date'] = f"{int(match['date'][:4]) - shift}{match['date'][4:]}"
+            shifted['season'] = match['season'] - shift if match.get('season') else None
+            shifted['_original_id'] = f"{match['_original_id']}-{copy}"
+            yield shifted
+
+
+def build_dataset(directory, copies):
+    parser = ESPNJSONParser()
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser.parse_directory(str(ESPN_DIR), workers=1)
+    matches = list(shifted_copies(parser.parsed_matches, copies))
+
+    json_path = Path(directory) / 'historical.json'
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({'matches': matches, 'metadata': {'total_matches': len(matches)}},
+                  f, indent=2, ensure_ascii=False)
+    jsonl_path = Path(directory) / 'historical.jsonl'
+    write_matches(str(jsonl_path), matches)
+    return len(matches), json_path, jsonl_path
+
+
+def run_mode(mode, path):
+    """Child process: run one mode and print seconds and peak RSS in MB"""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        MODES[mode](path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'seconds': elapsed, 'peak_mb': peak / 1024, 'added_mb': (peak - baseline) / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--copies', type=int, default=10, help='times to repeat the ESPN seasons')
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.file)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        total, json_path, jsonl_path = build_dataset(directory, args.copies)
+        print(f"{total} matches | JSON {json_path.stat().st_size / 1e6:.1f} MB | "
+              f"JSON Lines {jsonl_path.stat().st_size / 1e6:.1f} MB")
+        print(f"{'Mode':>20} | {'Input':>5} | {'Time (s)':>8} | {'Peak RSS (MB)':>13} | {'Added (MB)':>10}")
+        print("-" * 70)
+        for mode in MODES:
+            for path in (json_path, jsonl_path):
+                if mode == 'json.load document' and path == jsonl_path:
+                    continue
+                output = subprocess.run([sys.executable, __file__, '--mode', mode, '--file', str(path)],
+                                        capture_output=True, text=True, check=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f"{mode:>20} | {path.suffix[1:]:>5} | {result['seconds']:8.2f} | "
+                      f"{result['peak_mb']:13.1f} | {result['added_mb']:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
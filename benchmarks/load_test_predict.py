@@ -0,0 +1,194 @@
+"""Load test for POST /api/predict with throughput and latency targets
+
+Client processes each hold one keep-alive connection and post fixtures
+from 24-25_fixtures.json back to back for --duration seconds. Exits with
+status 1 when throughput is under --min-rps, p99 latency is over
+--max-p99-ms, or any request fails, so it can gate a deploy.
+
+Point it at a running server with --url, or pass --serve to start the
+production gunicorn config (backend/gunicorn.conf.py) on a free port.
+With --serve, the resident (RSS) and proportional (PSS) memory of the
+master and each worker is reported too. PSS splits shared pages between
+the processes sharing them, so workers far below their RSS are sharing
+the model loaded before the fork.
+
+Usage: python benchmarks/load_test_predict.py --serve [--workers 4] [--clients 8] [--duration 10]
+       python benchmarks/load_test_predict.py --url http://127.0.0.1:5000 [--min-rps 300] [--max-p99-ms 50]
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+FIXTURES_FILE = BACKEND_DIR / 'data' / '24-25_fixtures.json'
+
+
+def request_bodies():
+    with open(FIXTURES_FILE, 'r') as f:
+        fixtures = json.load(f)
+    fixtures = fixtures['matches'] if isinstance(fixtures, dict) else fixtures
+    return [json.dumps({'homeTeam': fixture['homeTeam'], 'awayTeam': fixture['awayTeam']}).encode('utf-8')
+            for fixture in fixtures]
+
+
+def client(url, bodies, start_at, stop_at, results):
+    """Post bodies in turn until stop_at, sending back (latencies after start_at, errors)"""
+    target = urlparse(url)
+    connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=10)
+    headers = {'Content-Type': 'application/json'}
+    latencies, errors, i = [], 0, 0
+    while True:
+        sent = time.perf_counter()
+        if sent >= stop_at:
+            break
+        try:
+            connection.request('POST', '/api/predict', bodies[i % len(bodies)], headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            ok = False
+        if sent >= start_at:
+            latencies.append(time.perf_counter() - sent)
+            errors += not ok
+        i += 1
+    connection.close()
+    results.put((latencies, errors))
+
+
+def run_load(url, clients, duration, warmup):
+    bodies = request_bodies()
+    results = multiprocessing.Queue()
+    start_at = time.perf_counter() + warmup
+    stop_at = start_at + duration
+    processes = [multiprocessing.Process(target=client, args=(url, bodies[i::clients], start_at, stop_at, results))
+                 for i in range(clients)]
+    for process in processes:
+        process.start()
+    latencies, errors = [], 0
+    for _ in processes:
+        client_latencies, client_errors = results.get()
+        latencies.extend(client_latencies)
+        errors += client_errors
+    for process in processes:
+        process.join()
+    return np.array(latencies) * 1000, errors
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers, threads):
+    """gunicorn with the production config, returns (process, url) once it answers"""
+    port = free_port()
+    env = dict(os.environ, BIND=f"127.0.0.1:{port}", GUNICORN_THREADS=str(threads))
+    if workers:
+        env['WEB_CONCURRENCY'] = str(workers)
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', str(BACKEND_DIR / 'gunicorn.conf.py'), 'app:app'],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup, is it installed? pip install gunicorn")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                pass
+            # Workers are forked once the master has loaded the model
+            if len(child_pids(server.pid)) >= int(env.get('WEB_CONCURRENCY', os.cpu_count() + 1)):
+                return server, f"http://127.0.0.1:{port}"
+        except OSError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("gunicorn did not start within 60s")
+
+
+def child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", 'r') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_kb(pid):
+    """(RSS, PSS) in kB from /proc, None off Linux"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", 'r') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line and not line.startswith(' '))
+    except OSError:
+        return None
+    return int(fields['Rss'].split()[0]), int(fields['Pss'].split()[0])
+
+
+def print_memory(master_pid):
+    print(f"\n{'Process':>12} | {'RSS (MB)':>9} | {'PSS (MB)':>9}")
+    print("-" * 36)
+    for label, pid in [('master', master_pid)] + [(f"worker {pid}", pid) for pid in child_pids(master_pid)]:
+        memory = memory_kb(pid)
+        if memory is None:
+            print(f"{label:>12} | memory figures need Linux /proc")
+            return
+        rss, pss = memory
+        print(f"{label:>12} | {rss / 1024:9.1f} | {pss / 1024:9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--serve', action='store_true', help="start backend/gunicorn.conf.py on a free port")
+    parser.add_argument('--workers', type=int, help="gunicorn workers with --serve, the config's default otherwise")
+    parser.add_argument('--threads', type=int, default=4, help="threads per worker with --serve")
+    parser.add_argument('--clients', type=int, default=8, help="client processes, one connection each")
+    parser.add_argument('--duration', type=float, default=10.0, help="measured seconds")
+    parser.add_argument('--warmup', type=float, default=2.0, help="unmeasured seconds first")
+    parser.add_argument('--min-rps', type=float, default=300.0)
+    parser.add_argument('--max-p99-ms', type=float, default=50.0)
+    args = parser.parse_args()
+
+    server, url = start_server(args.workers, args.threads) if args.serve else (None, args.url)
+    try:
+        latencies, errors = run_load(url, args.clients, args.duration, args.warmup)
+        if server is not None:
+            print_memory(server.pid)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if not len(latencies):
+        print(f"No requests completed against {url}")
+        sys.exit(1)
+    rps = len(latencies) / args.duration
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"\nPOST {url}/api/predict, {args.clients} clients for {args.duration:.0f}s: "
+          f"{len(latencies)} requests, {errors} errors")
+    print(f"{'Metric':>14} | {'Value':>9} | {'Target':>9}")
+    print("-" * 38)
+    print(f"{'req/s':>14} | {rps:9.1f} | {f'>= {args.min_rps:g}':>9}")
+    print(f"{'p50 (ms)':>14} | {p50:9.2f} |")
+    print(f"{'p95 (ms)':>14} | {p95:9.2f} |")
+    print(f"{'p99 (ms)':>14} | {p99:9.2f} | {f'<= {args.max_p99_ms:g}':>9}")
+
+    failed = [name for name, missed in (('throughput', rps < args.min_rps), ('p99 latency', p99 > args.max_p99_ms),
+                                        ('errors', errors > 0)) if missed]
+    print(f"\n{'FAILED: ' + ', '.join(failed) if failed else 'All targets met'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""Local stand-in for the football-data.org v4 API
+
+Serves competition teams and team matches built from 23-24_PLData.json,
+competition matches filtered by ?season= (extra competitions can be
+passed in, e.g. synthetic seasons for bulk collection), with ETag / 304 support, optional artificial latency, an optional
+per-minute quota reported through football-data.org's rate-limit headers
+(429 once exhausted), injected 5xx errors and request counting.
+Point FootballDataAPI at it by setting api.base_url to server.base_url.
+
+Usage: python benchmarks/mock_football_api.py [--port 8099] [--latency 0.05]
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+DATA_FILE = Path(__file__).resolve().parent.parent / 'backend' / 'data' / '23-24_PLData.json'
+
+
+def load_fixture_data(data_file=DATA_FILE):
+    """Teams and finished matches in football-data.org shape"""
+    with open(data_file, 'r') as f:
+        matches = json.load(f)
+    teams = {}
+    for match in matches:
+        for side in ('homeTeam', 'awayTeam'):
+            teams[match[side]['id']] = match[side]
+    return {'teams': sorted(teams.values(), key=lambda t: t['name']), 'matches': matches}
+
+
+def season_start_year(match):
+    """Year a football-data.org match's season started in, from its kick-off"""
+    year, month = int(match['utcDate'][:4]), int(match['utcDate'][5:7])
+    return year if month >= 7 else year - 1
+
+
+class MockFootballAPI:
+    """Threaded HTTP server emulating the endpoints FootballDataAPI uses"""
+    def __init__(self, port=0, latency=0.0, data=None, quota=None, error_rate=0.0, seed=0, competitions=None):
+        self.latency = latency
+        self.data = data or load_fixture_data()
+        # Competition code -> matches for /competitions/{code}/matches, PL from data by default
+        self.competitions = {'PL': self.data['matches'], **(competitions or {})}
+        self.quota = quota
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.request_counts = {}
+        self.counts_lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/v4"
+
+    def count(self, path):
+        with self.counts_lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+
+    def take_quota(self):
+        """Return (allowed, available, reset_seconds) for the current minute"""
+        with self.counts_lock:
+            now = time.monotonic()
+            if now - self.window_start >= 60:
+                self.window_start, self.window_count = now, 0
+            reset = max(0, int(60 - (now - self.window_start)))
+            if self.window_count >= self.quota:
+                return False, 0, reset
+            self.window_count += 1
+            return True, self.quota - self.window_count, reset
+
+    def inject_error(self):
+        with self.counts_lock:
+            return self.rng.random() < self.error_rate
+
+    def total_requests(self):
+        with self.counts_lock:
+            return sum(self.request_counts.values())
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def respond(self, path, query):
+        """Return (status, payload) for a request path"""
+        if path == '/v4/competitions':
+            return 200, {'competitions': [{'id': 2021, 'code': 'PL', 'name': 'Premier League'}]}
+
+        found = re.fullmatch(r'/v4/competitions/(\w+)/teams', path)
+        if found:
+            return 200, {'count': len(self.data['teams']), 'teams': self.data['teams']}
+
+        found = re.fullmatch(r'/v4/teams/(\d+)/matches', path)
+        if found:
+            team_id = int(found.group(1))
+            matches = [m for m in self.data['matches']
+                       if team_id in (m['homeTeam']['id'], m['awayTeam']['id'])]
+            wins = draws = losses = 0
+            for m in matches:
+                winner = m['score']['winner']
+                if winner == 'DRAW':
+                    draws += 1
+                elif (winner == 'HOME_TEAM') == (m['homeTeam']['id'] == team_id):
+                    wins += 1
+                else:
+                    losses += 1
+            limit = int(query.get('limit', [len(matches)])[0])
+            return 200, {
+                'resultSet': {'count': len(matches), 'played': len(matches),
+                              'wins': wins, 'draws': draws, 'losses': losses},
+                'matches': matches[-limit:] if limit else [],
+            }
+
+        found = re.fullmatch(r'/v4/competitions/(\w+)/matches', path)
+        if found:
+            matches = self.competitions.get(found.group(1))
+            if matches is None:
+                return 404, {'message': f"Competition {found.group(1)} not found"}
+            if 'season' in query:
+                season = int(query['season'][0])
+                matches = [m for m in matches if season_start_year(m) == season]
+            return 200, {'resultSet': {'count': len(matches)}, 'matches': matches}
+
+        return 404, {'message': 'Not found'}
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                mock.count(parsed.path)
+                if mock.latency:
+                    time.sleep(mock.latency)
+
+                quota_headers = {}
+                if mock.quota is not None:
+                    allowed, available, reset = mock.take_quota()
+                    quota_headers = {'X-Requests-Available-Minute': str(available),
+                                     'X-RequestCounter-Reset': str(reset)}
+                    if not allowed:
+                        self.send_json(429, {'message': 'Too many requests'}, quota_headers)
+                        return
+                if mock.error_rate and mock.inject_error():
+                    self.send_json(503, {'message': 'Service unavailable'}, quota_headers)
+                    return
+
+                status, payload = mock.respond(parsed.path, parse_qs(parsed.query))
+                body = json.dumps(payload).encode()
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+
+                if status == 200 and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    for name, value in quota_headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    return
+
+                self.send_json(status, body, dict(quota_headers, ETag=etag))
+
+            def send_json(self, status, payload, headers):
+                body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--quota', type=int, default=None, help='requests allowed per minute')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered 503')
+    args = parser.parse_args()
+
+    mock = MockFootballAPI(port=args.port, latency=args.latency, quota=args.quota, error_rate=args.error_rate)
+    print(f"Mock football-data API on {mock.base_url}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Synthetic Premier League style seasons for benchmarks
+
+Generates double round-robin seasons in the same shapes the backend reads:
+the ESPN-derived format from espn_json_parser.py and the football-data.org
+format from data_collection.py.
+"""
+import random
+from datetime import datetime, timedelta
+
+TEAM_NAMES = [
+    'Arsenal', 'Aston Villa', 'Bournemouth', 'Brentford', 'Brighton',
+    'Burnley', 'Chelsea', 'Crystal Palace', 'Everton', 'Fulham',
+    'Leeds United', 'Leicester City', 'Liverpool', 'Manchester City',
+    'Manchester United', 'Newcastle United', 'Nottingham Forest',
+    'Southampton', 'Tottenham Hotspur', 'West Ham United',
+    'Wolverhampton Wanderers', 'Watford', 'Norwich City', 'Sheffield United',
+]
+
+
+def _fixtures(year, n_teams, rng):
+    """Yield (kickoff, home_index, away_index, home_goals, away_goals)"""
+    teams = list(range(n_teams))
+    pairs = [(h, a) for h in teams for a in teams if h != a]
+    rng.shuffle(pairs)
+    start = datetime(year, 8, 10, 15, 0)
+    per_round = n_teams // 2
+    for i, (home, away) in enumerate(pairs):
+        kickoff = start + timedelta(days=7 * (i // per_round), hours=i % per_round)
+        yield kickoff, home, away, rng.randint(0, 4), rng.randint(0, 3)
+
+
+def _winner(home_goals, away_goals):
+    if home_goals > away_goals:
+        return 'HOME_TEAM'
+    if away_goals > home_goals:
+        return 'AWAY_TEAM'
+    return 'DRAW'
+
+
+def _statistics(rng, home_goals, away_goals):
+    """statistics block as espn_json_parser.py stores it, displayValue strings"""
+    home_possession = round(rng.uniform(30, 70), 1)
+    statistics = {}
+    for side, goals, possession in (('home', home_goals, home_possession),
+                                    ('away', away_goals, round(100 - home_possession, 1))):
+        shots = goals + rng.randint(3, 15)
+        statistics[side] = {
+            'foulsCommitted': str(rng.randint(5, 18)),
+            'wonCorners': str(rng.randint(0, 10)),
+            'possessionPct': str(possession),
+            'shotsOnTarget': str(goals + rng.randint(0, shots - goals)),
+            'totalGoals': str(goals),
+            'totalShots': str(shots),
+        }
+    return statistics
+
+
+def _match_events(rng, home, away, home_goals, away_goals):
+    """match_events as espn_json_parser.py stores them: goals and cards"""
+    events = []
+    for team, goals in ((home, home_goals), (away, away_goals)):
+        for _ in range(goals):
+            penalty = rng.random() < 0.1
+            events.append((rng.randint(1, 94), 'Penalty - Scored' if penalty else 'Goal', team, True, False, False, penalty))
+        for _ in range(rng.randint(0, 4)):
+            events.append((rng.randint(1, 94), 'Yellow Card', team, False, False, True, False))
+        if rng.random() < 0.05:
+            events.append((rng.randint(1, 94), 'Red Card', team, False, True, False, False))
+    return [{
+        'type': kind,
+        'clock': f"{minute}'" if minute <= 90 else f"90'+{minute - 90}'",
+        'team_id': str(team),
+        'scoring_play': scoring,
+        'red_card': red,
+        'yellow_card': yellow,
+        'penalty': penalty,
+        'players': [],
+    } for minute, kind, team, scoring, red, yellow, penalty in sorted(events)]
+
+
+def espn_seasons(num_seasons, first_year=2000, n_teams=20, seed=0, details=False):
+    """Matches in the ESPN-derived format used by ProbabilityAnalyzer
+
+    details adds statistics and match_events, drawn from their own random
+    stream so the fixtures and scores are the same either way.
+    """
+    rng = random.Random(seed)
+    details_rng = random.Random(seed + 1)
+    matches = []
+    for year in range(first_year, first_year + num_seasons):
+        for kickoff, home, away, home_goals, away_goals in _fixtures(year, n_teams, rng):
+            match = {
+                'homeTeam': {'name': TEAM_NAMES[home], 'id': str(home)},
+                'awayTeam': {'name': TEAM_NAMES[away], 'id': str(away)},
+                'score': {
+                    'winner': _winner(home_goals, away_goals),
+                    'homeScore': home_goals,
+                    'awayScore': away_goals,
+                },
+                'date': kickoff.strftime('%Y-%m-%dT%H:%MZ'),
+                'season': year,
+            }
+            if details:
+                match['statistics'] = _statistics(details_rng, home_goals, away_goals)
+                match['match_events'] = _match_events(details_rng, home, away, home_goals, away_goals)
+            matches.append(match)
+    return matches
+
+
+def football_data_seasons(num_seasons, first_year=2000, n_teams=20, seed=0):
+    """Matches in the football-data.org format used by FormCacheBuilder"""
+    rng = random.Random(seed)
+    matches = []
+    for year in range(first_year, first_year + num_seasons):
+        for kickoff, home, away, home_goals, away_goals in _fixtures(year, n_teams, rng):
+            matches.append({
+                'season': f"{year}-{str(year + 1)[-2:]}",
+                'utcDate': kickoff.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'status': 'FINISHED',
+                'homeTeam': {'id': home, 'name': f"{TEAM_NAMES[home]} FC"},
+                'awayTeam': {'id': away, 'name': f"{TEAM_NAMES[away]} FC"},
+                'score': {
+                    'winner': _winner(home_goals, away_goals),
+                    'fullTime': {'home': home_goals, 'away': away_goals},
+                },
+            })
+    return matches
@@ -0,0 +1,10 @@
+"""Import paths for the tests, the same ones the backend scripts and benchmarks run with"""
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / 'backend'
+
+for path in (BACKEND_DIR, BACKEND_DIR / 'models', BACKEND_DIR / 'data', ROOT_DIR / 'benchmarks'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
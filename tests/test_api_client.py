@@ -0,0 +1,194 @@
+"""FootballDataAPI response cache and retries against the local mock of football-data.org"""
+import time
+
+import pytest
+
+from api_client import FootballDataAPI, RateLimiter, ResponseCache, SQLiteCacheStore
+from mock_football_api import MockFootballAPI
+
+
+@pytest.fixture(scope='module')
+def mock_api():
+    server = MockFootballAPI().start()
+    yield server
+    server.stop()
+
+
+def make_api(mock_api, cache):
+    api = FootballDataAPI(cache=cache)
+    api.base_url = mock_api.base_url
+    api.rate_limiter = RateLimiter(requests_per_minute=10 ** 6)
+    return api
+
+
+def upstream(mock_api, path):
+    """Requests the mock has answered for a path so far"""
+    with mock_api.counts_lock:
+        return mock_api.request_counts.get(f"/v4{path}", 0)
+
+
+def test_fresh_entry_is_served_without_a_request(mock_api):
+    api = make_api(mock_api, ResponseCache())
+    before = upstream(mock_api, '/competitions')
+
+    first = api.get_comps()
+    second = api.get_comps()
+
+    assert second == first
+    assert upstream(mock_api, '/competitions') == before + 1
+    assert api.cache.stats()['hits'] == 1
+
+
+def test_entry_expires_after_its_ttl(mock_api):
+    api = make_api(mock_api, ResponseCache(ttls={'teams': 0.2}))
+    before = upstream(mock_api, '/competitions/2021/teams')
+
+    api.get_teams(2021)
+    api.get_teams(2021)
+    assert upstream(mock_api, '/competitions/2021/teams') == before + 1
+
+    time.sleep(0.3)
+    api.get_teams(2021)
+    assert upstream(mock_api, '/competitions/2021/teams') == before + 2
+    assert api.cache.stats()['hits'] == 1
+
+
+def test_least_recently_used_entry_is_evicted(mock_api):
+    api = make_api(mock_api, ResponseCache(max_entries=2))
+    competitions = api.cache.make_key(f"{mock_api.base_url}/competitions")
+    pl_teams = api.cache.make_key(f"{mock_api.base_url}/competitions/2021/teams")
+    cl_teams = api.cache.make_key(f"{mock_api.base_url}/competitions/2001/teams")
+
+    api.get_comps()
+    api.get_teams(2021)
+    # Touching the competitions entry leaves the PL teams as least recently used
+    api.get_comps()
+    api.get_teams(2001)
+
+    assert list(api.cache.entries) == [competitions, cl_teams]
+    assert pl_teams not in api.cache.entries
+    assert api.cache.stats()['evictions'] == 1
+
+    before = upstream(mock_api, '/competitions/2021/teams')
+    api.get_teams(2021)
+    assert upstream(mock_api, '/competitions/2021/teams') == before + 1
+
+
+def test_stale_entry_is_revalidated_with_its_etag(mock_api):
+    api = make_api(mock_api, ResponseCache(ttls={'teams': 0}))
+    key = api.cache.make_key(f"{mock_api.base_url}/competitions/2021/teams")
+
+    first = api.get_teams(2021)
+    entry = api.cache.entries[key]
+    assert entry.etag
+
+    # Already stale with a zero TTL, so the second call sends If-None-Match and gets a 304
+    before = upstream(mock_api, '/competitions/2021/teams')
+    second = api.get_teams(2021)
+
+    assert second == first
+    assert upstream(mock_api, '/competitions/2021/teams') == before + 1
+    assert api.cache.entries[key] is entry
+    stats = api.cache.stats()
+    assert (stats['misses'], stats['revalidated'], stats['hits']) == (1, 1, 0)
+
+
+def test_sqlite_store_survives_a_restart(mock_api, tmp_path):
+    path = str(tmp_path / 'api_cache.db')
+    api = make_api(mock_api, ResponseCache(store=SQLiteCacheStore(path)))
+    first = api.get_teams(2021)
+    api.cache.store.conn.close()
+
+    before = upstream(mock_api, '/competitions/2021/teams')
+    restarted = make_api(mock_api, ResponseCache(store=SQLiteCacheStore(path)))
+    second = restarted.get_teams(2021)
+
+    assert second == first
+    assert upstream(mock_api, '/competitions/2021/teams') == before
+    stats = restarted.cache.stats()
+    assert (stats['disk_hits'], stats['hits'], stats['misses'], stats['entries']) == (1, 1, 0, 1)
+
+
+def test_stats_count_hits_and_misses(mock_api):
+    api = make_api(mock_api, ResponseCache())
+
+    api.get_comps()
+    api.get_teams(2021)
+    for _ in range(3):
+        api.get_comps()
+        api.get_teams(2021)
+
+    stats = api.cache.stats()
+    assert (stats['hits'], stats['misses'], stats['revalidated'], stats['entries']) == (6, 2, 0, 2)
+    assert stats['hit_ratio'] == pytest.approx(6 / 8)
+    assert ResponseCache().stats()['hit_ratio'] == 0.0
+
+
+@pytest.fixture
+def flaky_api():
+    """A mock started per test, for quota and error settings"""
+    servers = []
+
+    def start(**settings):
+        servers.append(MockFootballAPI(**settings).start())
+        api = make_api(servers[-1], ResponseCache(max_entries=0))
+        api.backoff_base = 0.01
+        return servers[-1], api
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def test_server_errors_are_retried(flaky_api):
+    mock_api, api = flaky_api(error_rate=0.3, seed=1)
+
+    statuses = [api.request(f"{mock_api.base_url}/competitions").status_code for _ in range(20)]
+
+    assert statuses == [200] * 20
+    # Some of those took more than one request
+    assert upstream(mock_api, '/competitions') > 20
+
+
+def test_last_response_is_returned_once_retries_run_out(flaky_api):
+    mock_api, api = flaky_api(error_rate=1.0)
+    api.max_retries = 2
+
+    response = api.request(f"{mock_api.base_url}/competitions")
+
+    assert response.status_code == 503
+    assert upstream(mock_api, '/competitions') == api.max_retries + 1
+
+
+def test_exhausted_quota_is_waited_out(flaky_api):
+    mock_api, api = flaky_api(quota=1)
+    # A fixed delay instead of the jitter, so the retries are known to outlast the minute
+    api._backoff = lambda attempt: 0.25
+    # The mock's minute is nearly over, so the second request gets 429s until it rolls over
+    mock_api.window_start = time.monotonic() - 59.6
+    url = f"{mock_api.base_url}/competitions"
+    assert api.request(url).status_code == 200
+
+    started = time.monotonic()
+    response = api.request(url)
+
+    assert response.status_code == 200
+    assert time.monotonic() - started >= 0.25
+    assert upstream(mock_api, '/competitions') >= 3
+    # The bucket follows the mock's headers: the new minute's one request is used up
+    assert api.rate_limiter.tokens < 1
+
+
+def test_backoff_is_jittered_below_its_cap():
+    api = FootballDataAPI(cache=ResponseCache())
+    api.backoff_base, api.backoff_cap = 1.0, 5.0
+    for attempt in range(6):
+        delays = [api._backoff(attempt) for _ in range(200)]
+        assert 0 <= min(delays) and max(delays) <= min(5.0, 2 ** attempt)
+        assert len(set(delays)) > 1
+
+
+@pytest.mark.parametrize('requests_per_minute', [0, -5])
+def test_rate_limit_below_one_request_a_minute_is_refused(requests_per_minute):
+    with pytest.raises(ValueError):
+        RateLimiter(requests_per_minute)
@@ -0,0 +1,100 @@
+"""Bulk season collection against the local mock of football-data.org, interrupted and resumed"""
+import asyncio
+import filecmp
+import os
+
+import pytest
+
+from api_client import FootballDataAPI, RateLimiter, ResponseCache
+from bulk_collector import CHECKPOINT_FILE, BulkCollector, season_file
+from mock_football_api import MockFootballAPI
+from synthetic import football_data_seasons
+
+CODES = ['C0', 'C1']
+YEARS = list(range(2000, 2006))
+
+
+@pytest.fixture(scope='module')
+def mock_api():
+    competitions = {code: football_data_seasons(len(YEARS), YEARS[0], n_teams=6, seed=i)
+                    for i, code in enumerate(CODES)}
+    server = MockFootballAPI(latency=0.01, competitions=competitions).start()
+    yield server
+    server.stop()
+
+
+def make_api(mock_api):
+    api = FootballDataAPI(cache=ResponseCache(max_entries=0))
+    api.base_url = mock_api.base_url
+    api.rate_limiter = RateLimiter(requests_per_minute=10 ** 6)
+    return api
+
+
+def season_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.jsonl'))
+
+
+async def interrupt(collector, after):
+    """Run collect() and cancel it once `after` seasons are checkpointed, like a Ctrl-C"""
+    task = asyncio.create_task(collector.collect(CODES, YEARS))
+    while len(collector.checkpoint.completed) < after and not task.done():
+        await asyncio.sleep(0.001)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def test_resumed_run_matches_a_sequential_one(mock_api, tmp_path):
+    sequential_dir, concurrent_dir = str(tmp_path / 'sequential'), str(tmp_path / 'concurrent')
+    sequential = BulkCollector(make_api(mock_api), sequential_dir, concurrency=1, verbose=False).run(CODES, YEARS)
+    assert len(sequential['collected']) == len(CODES) * len(YEARS)
+    assert not sequential['failed']
+
+    asyncio.run(interrupt(BulkCollector(make_api(mock_api), concurrent_dir, concurrency=4, verbose=False),
+                          len(CODES) * len(YEARS) // 2))
+    checkpointed = set(BulkCollector(make_api(mock_api), concurrent_dir, verbose=False).checkpoint.completed)
+    assert 0 < len(checkpointed) < len(CODES) * len(YEARS)
+
+    before = mock_api.total_requests()
+    resumed = BulkCollector(make_api(mock_api), concurrent_dir, concurrency=4, verbose=False).run(CODES, YEARS)
+
+    assert {f"{code}/{year}" for code, year in resumed['skipped']} == checkpointed
+    assert len(resumed['collected']) + len(checkpointed) == len(CODES) * len(YEARS)
+    assert not resumed['failed']
+    # Only the seasons missing from the checkpoint are fetched again
+    assert mock_api.total_requests() - before == len(resumed['collected'])
+
+    files = season_files(sequential_dir)
+    assert files == season_files(concurrent_dir)
+    assert os.path.exists(os.path.join(concurrent_dir, CHECKPOINT_FILE))
+    _, mismatched, errors = filecmp.cmpfiles(sequential_dir, concurrent_dir, files, shallow=False)
+    assert not mismatched and not errors
+    # Nothing half-written is left behind by the cancelled run
+    assert not [name for name in os.listdir(concurrent_dir) if name.endswith('.tmp')]
+
+
+def test_checkpointed_season_without_its_file_is_collected_again(mock_api, tmp_path):
+    output_dir = str(tmp_path)
+    BulkCollector(make_api(mock_api), output_dir, verbose=False).run(CODES[:1], YEARS[:2])
+    os.remove(season_file(output_dir, CODES[0], YEARS[0]))
+
+    rerun = BulkCollector(make_api(mock_api), output_dir, verbose=False).run(CODES[:1], YEARS[:2])
+
+    assert rerun['collected'] == [(CODES[0], YEARS[0])]
+    assert rerun['skipped'] == [(CODES[0], YEARS[1])]
+    assert os.path.exists(season_file(output_dir, CODES[0], YEARS[0]))
+
+
+def test_failed_season_is_reported_with_its_error(mock_api, tmp_path, capsys):
+    output_dir = str(tmp_path)
+    summary = BulkCollector(make_api(mock_api), output_dir, verbose=False).run(['C0', 'XX'], YEARS[:1])
+
+    assert summary['collected'] == [('C0', YEARS[0])]
+    (competition, year, error), = summary['failed']
+    assert (competition, year) == ('XX', YEARS[0])
+    assert error == "RuntimeError: API Error Code: 404"
+    assert 'Failed XX' in capsys.readouterr().out
+    # Not checkpointed, so a rerun tries it again
+    assert not BulkCollector(make_api(mock_api), output_dir, verbose=False).checkpoint.is_done('XX', YEARS[0])
@@ -0,0 +1,53 @@
+"""Match database: one row per source for a fixture both sources stored"""
+import pytest
+
+from database import ESPN, FOOTBALL_DATA, MatchDatabase
+from utils.match_record import Match
+
+# The same fixture as ESPN and football-data.org store it
+ESPN_MATCH = Match('401', '2023-08-12T14:00Z', '2023', 'Arsenal', 'Nottingham Forest', '359', '393',
+                   2, 1, 'HOME_TEAM')
+FOOTBALL_DATA_MATCH = Match(435, '2023-08-12T12:30:00Z', '2023', 'Arsenal FC', 'Nottingham Forest FC', 57, 351,
+                            2, 1, 'HOME_TEAM')
+FOOTBALL_DATA_ONLY = Match(436, '2023-08-19T12:30:00Z', '2023', 'Arsenal FC', 'Chelsea FC', 57, 61,
+                           0, 0, 'DRAW')
+
+
+@pytest.fixture
+def database():
+    database = MatchDatabase('sqlite://')
+    database.insert_matches([ESPN_MATCH], ESPN)
+    database.insert_matches([FOOTBALL_DATA_MATCH, FOOTBALL_DATA_ONLY], FOOTBALL_DATA)
+    yield database
+    database.engine.dispose()
+
+
+def test_each_source_keeps_its_copy_of_a_shared_fixture(database):
+    espn = database.load_matches(source=ESPN)
+    football_data = database.load_matches(source=FOOTBALL_DATA)
+
+    assert [(m.match_id, m.date, m.home_team) for m in espn] == [('401', '2023-08-12T14:00Z', 'Arsenal')]
+    assert [(m.match_id, m.date, m.home_team) for m in football_data] == [
+        ('435', '2023-08-12T12:30:00Z', 'Arsenal FC'), ('436', '2023-08-19T12:30:00Z', 'Arsenal FC')]
+    assert (database.match_count(ESPN), database.match_count(FOOTBALL_DATA)) == (1, 2)
+
+
+def test_queries_across_sources_count_a_fixture_once(database):
+    # The first source to store a fixture answers for it
+    assert [m.date for m in database.load_matches()] == ['2023-08-12T14:00Z', '2023-08-19T12:30:00Z']
+    assert database.match_count() == 2
+    assert [m.date for m in database.last_n_before('Arsenal', '2024-01-01')] == [
+        '2023-08-19T12:30:00Z', '2023-08-12T14:00Z']
+    assert database.form_before('Arsenal FC', '2024-01-01', min_games=2) == 2.0
+
+
+def test_reingest_updates_scores_but_not_kick_off(database):
+    corrected = Match(435, '2023-08-12T16:00:00Z', '2023', 'Arsenal FC', 'Nottingham Forest FC', 57, 351,
+                      1, 1, 'DRAW')
+    assert database.insert_matches([corrected, FOOTBALL_DATA_ONLY], FOOTBALL_DATA) == 2
+
+    football_data = database.load_matches(source=FOOTBALL_DATA)
+    assert len(football_data) == 2
+    assert (football_data[0].date, football_data[0].winner) == ('2023-08-12T12:30:00Z', 'DRAW')
+    # The ESPN copy is untouched
+    assert database.load_matches(source=ESPN)[0].winner == 'HOME_TEAM'
@@ -0,0 +1,30 @@
+"""Base rates from the parsed ESPN history"""
+import contextlib
+import io
+
+import pytest
+
+from data.espn.espn_json_parser import HistoricalProbabilityAnalyzer
+from utils.match_record import Match
+
+
+def make_match(date, winner, season='2023'):
+    return Match(match_id=date, date=date, season=season, home_team='Arsenal', away_team='Chelsea',
+                 home_id=None, away_id=None, home_goals=None, away_goals=None, winner=winner)
+
+
+def test_matches_without_a_winner_are_left_out_of_the_rates(tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = HistoricalProbabilityAnalyzer(str(tmp_path / 'missing.jsonl'))
+    # A postponed fixture has no winner
+    analyzer.matches = [make_match('2023-08-12', 'HOME_TEAM'), make_match('2023-08-19', 'DRAW'),
+                        make_match('2023-08-26', None), make_match('2023-09-02', 'AWAY_TEAM'),
+                        make_match('2023-09-16', 'HOME_TEAM')]
+
+    rates = analyzer.calculate_basic_probabilities()
+    assert rates['total_matches'] == 4
+    assert (rates['home_win_rate'], rates['draw_rate'], rates['away_win_rate']) == pytest.approx((0.5, 0.25, 0.25))
+    assert analyzer.analyze_by_season()['2023']['total'] == 4
+
+    analyzer.matches = [make_match('2023-08-26', None)]
+    assert analyzer.calculate_basic_probabilities() is None
@@ -0,0 +1,96 @@
+"""Rolling feature cache: reuse, extension of a cached prefix and invalidation"""
+import copy
+import os
+
+import numpy as np
+import pytest
+
+import feature_pipeline
+from feature_pipeline import MATCH_COLUMNS, FeatureConfig, FeaturePipeline
+from synthetic import espn_seasons
+
+
+@pytest.fixture(scope='module')
+def matches():
+    return espn_seasons(3, n_teams=6, details=True)
+
+
+def scratch_build(tmp_path, matches, config=None):
+    return FeaturePipeline(config, str(tmp_path / 'scratch')).build(matches)
+
+
+def assert_same_features(features, expected):
+    np.testing.assert_array_equal(features.values, expected.values)
+    assert (features.dates, features.home_teams, features.away_teams) == (
+        expected.dates, expected.home_teams, expected.away_teams)
+
+
+def test_unchanged_matches_come_from_the_cache(tmp_path, matches):
+    pipeline = FeaturePipeline(cache_dir=str(tmp_path / 'cache'))
+    first = pipeline.build(matches)
+    assert pipeline.last_build['computed'] == len(matches)
+    path = pipeline.last_build['file']
+
+    # Input order doesn't matter, matches are sorted by date first
+    second = pipeline.build(matches[::-1])
+
+    assert pipeline.last_build == {'cached': len(matches), 'computed': 0, 'file': path}
+    assert_same_features(second, first)
+
+
+def test_appended_matches_extend_the_cached_prefix(tmp_path, matches):
+    earlier = matches[:len(matches) * 2 // 3]
+    pipeline = FeaturePipeline(cache_dir=str(tmp_path / 'cache'))
+    pipeline.build(earlier)
+    earlier_file = pipeline.last_build['file']
+
+    extended = pipeline.build(matches)
+
+    assert pipeline.last_build['cached'] == len(earlier)
+    assert pipeline.last_build['computed'] == len(matches) - len(earlier)
+    assert_same_features(extended, scratch_build(tmp_path, matches))
+    # Only the latest build is kept
+    assert pipeline.cached_files() == [pipeline.last_build['file']]
+    assert not os.path.exists(earlier_file)
+
+
+def test_changed_match_rebuilds_from_scratch(tmp_path, matches):
+    pipeline = FeaturePipeline(cache_dir=str(tmp_path / 'cache'))
+    stale = pipeline.build(matches)
+
+    changed = copy.deepcopy(matches)
+    changed[5]['statistics']['home']['totalShots'] = '99'
+    rebuilt = pipeline.build(changed)
+
+    assert pipeline.last_build['cached'] == 0
+    assert_same_features(rebuilt, scratch_build(tmp_path, changed))
+    assert not np.array_equal(rebuilt.column('home_shots'), stale.column('home_shots'), equal_nan=True)
+
+
+def test_config_and_version_are_part_of_the_cache_key(tmp_path, matches, monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+    pipeline = FeaturePipeline(cache_dir=cache_dir)
+    pipeline.build(matches)
+
+    shorter = FeaturePipeline(FeatureConfig(window=3), cache_dir)
+    features = shorter.build(matches)
+    assert shorter.last_build['cached'] == 0
+    assert_same_features(features, scratch_build(tmp_path, matches, FeatureConfig(window=3)))
+
+    monkeypatch.setattr(feature_pipeline, 'FEATURE_VERSION', feature_pipeline.FEATURE_VERSION + 1)
+    bumped = FeaturePipeline(cache_dir=cache_dir)
+    assert bumped.config_key != pipeline.config_key
+    bumped.build(matches)
+    assert bumped.last_build['cached'] == 0
+
+
+def test_features_wait_for_min_matches(tmp_path, matches):
+    config = FeatureConfig(window=4, min_matches=3)
+    features = scratch_build(tmp_path, matches, config)
+    team = features.home_teams[0]
+    dates, rows = features.team_features(team)
+
+    goals = MATCH_COLUMNS.index('goals_for')
+    assert np.isnan(rows[:3, goals]).all()
+    assert not np.isnan(rows[3:, goals]).any()
+    assert len(dates) == len(rows)
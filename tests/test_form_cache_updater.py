@@ -0,0 +1,105 @@
+"""Form cache updates through the append-only log: replay, repeats and compaction"""
+import copy
+import json
+
+import pytest
+
+from form_cache_updater import FormCacheUpdater
+from utils.form_cache_log import append_entries, apply_entry, log_path, read_entries
+from utils.match_record import Match
+
+TEAMS = ['Arsenal', 'Chelsea', 'Everton', 'Fulham']
+
+
+def make_match(day, home_team, away_team, home_goals, away_goals, match_id=True):
+    date = f"2023-08-{day:02d}T15:00:00Z"
+    winner = 'HOME_TEAM' if home_goals > away_goals else 'AWAY_TEAM' if home_goals < away_goals else 'DRAW'
+    return Match(match_id=f"{date}-{home_team}" if match_id else None, date=date, season='2023',
+                 home_team=home_team, away_team=away_team, home_id=None, away_id=None,
+                 home_goals=home_goals, away_goals=away_goals, winner=winner)
+
+
+MATCHES = [
+    make_match(5, 'Arsenal', 'Chelsea', 2, 1), make_match(5, 'Everton', 'Fulham', 0, 0),
+    make_match(12, 'Chelsea', 'Everton', 1, 3), make_match(12, 'Fulham', 'Arsenal', 1, 1),
+    make_match(19, 'Arsenal', 'Everton', 0, 1), make_match(19, 'Chelsea', 'Fulham', 2, 2),
+    make_match(26, 'Everton', 'Arsenal', 2, 2, match_id=False), make_match(26, 'Fulham', 'Chelsea', 0, 4),
+]
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    path = tmp_path / 'form_cache.json'
+    path.write_text(json.dumps({'metadata': {'total_matches': 0}, 'teams': {}}))
+    return str(path)
+
+
+def test_restart_replays_the_log_into_the_same_cache(cache_file):
+    updater = FormCacheUpdater(cache_file)
+    assert updater.apply_matches(MATCHES[:4]) == 4
+    assert updater.apply_matches(MATCHES[4:]) == 4
+    entries, _ = read_entries(log_path(cache_file))
+    assert len(entries) == len(MATCHES)
+
+    restarted = FormCacheUpdater(cache_file)
+
+    assert restarted.cache == updater.cache
+    assert restarted.windows == updater.windows
+    assert restarted.cache['metadata']['total_matches'] == len(MATCHES)
+    assert [t['after_match'] for t in restarted.cache['teams']['Arsenal']['form_timeline']] == [1, 2, 3, 4]
+
+
+def test_repeated_matches_are_not_applied_again(cache_file):
+    FormCacheUpdater(cache_file).apply_matches(MATCHES)
+    restarted = FormCacheUpdater(cache_file)
+    before = copy.deepcopy(restarted.cache)
+
+    # Ids come from the log; the id-less match is caught by its teams' latest dates
+    assert restarted.apply_matches(MATCHES) == 0
+    assert restarted.cache == before
+    assert len(read_entries(log_path(cache_file))[0]) == len(MATCHES)
+
+    later = make_match(30, 'Arsenal', 'Fulham', 1, 0, match_id=False)
+    assert restarted.apply_matches([later]) == 1
+
+
+def test_apply_entry_is_idempotent(cache_file):
+    updater = FormCacheUpdater(cache_file)
+    entries = [updater.apply_match(match) for match in MATCHES]
+
+    once = {'teams': {}}
+    for entry in entries:
+        apply_entry(once, entry)
+    twice = copy.deepcopy(once)
+    for entry in entries[3:]:
+        apply_entry(twice, entry)
+
+    assert twice == once == updater.cache
+
+
+def test_partly_written_line_waits_for_the_next_read(cache_file):
+    path = log_path(cache_file)
+    entries = [FormCacheUpdater(cache_file).apply_match(match) for match in MATCHES[:2]]
+    append_entries(path, entries[:1])
+    line = json.dumps(entries[1])
+    with open(path, 'a') as f:
+        f.write(line[:20])
+
+    read, offset = read_entries(path)
+    assert read == entries[:1]
+
+    with open(path, 'a') as f:
+        f.write(line[20:] + '\n')
+    read, _ = read_entries(path, offset)
+    assert read == entries[1:]
+
+
+def test_compact_folds_the_log_into_the_cache_file(cache_file):
+    updater = FormCacheUpdater(cache_file)
+    updater.apply_matches(MATCHES)
+    updater.compact()
+
+    assert read_entries(log_path(cache_file)) == ([], 0)
+    with open(cache_file) as f:
+        assert json.load(f) == updater.cache
+    assert FormCacheUpdater(cache_file).cache == updater.cache
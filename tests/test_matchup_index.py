@@ -0,0 +1,85 @@
+"""Point-in-time head-to-head and venue records, and the saved index"""
+import pytest
+
+from matchup_index import MatchupIndex
+from utils.match_record import Match
+
+
+def make_match(date, home_team, away_team, home_goals, away_goals):
+    return Match(match_id=f"{date}-{home_team}", date=date, season='2023', home_team=home_team,
+                 away_team=away_team, home_id=None, away_id=None, home_goals=home_goals,
+                 away_goals=away_goals, winner=None)
+
+
+# Arsenal v Chelsea meetings in date order: W 2-0, D 1-1, L 0-1 (away), W 3-1 (away), L 0-2
+MEETINGS = [
+    make_match('2023-01-07T15:00:00Z', 'Arsenal', 'Chelsea', 2, 0),
+    make_match('2023-02-11T15:00:00Z', 'Arsenal', 'Chelsea', 1, 1),
+    make_match('2023-03-18T15:00:00Z', 'Chelsea', 'Arsenal', 1, 0),
+    make_match('2023-04-22T15:00:00Z', 'Chelsea', 'Arsenal', 1, 3),
+    make_match('2023-05-27T15:00:00Z', 'Arsenal', 'Chelsea', 0, 2),
+]
+
+
+@pytest.fixture
+def index():
+    # Out of date order on purpose, finalize() sorts each key
+    return MatchupIndex().build(MEETINGS[::-1])
+
+
+def test_as_of_only_counts_meetings_strictly_before(index):
+    record = index.head_to_head('Arsenal', 'Chelsea', as_of='2023-03-18T15:00:00Z')
+    assert (record['played'], record['wins'], record['draws'], record['losses']) == (2, 1, 1, 0)
+    assert (record['goals_for'], record['goals_against'], record['points']) == (3, 1, 4)
+
+    # A date-only as_of sorts before that day's kick-off
+    assert index.head_to_head('Arsenal', 'Chelsea', as_of='2023-03-18')['played'] == 2
+    assert index.head_to_head('Arsenal', 'Chelsea', as_of='2023-03-19')['played'] == 3
+    assert index.head_to_head('Arsenal', 'Chelsea', as_of='2023-01-01')['points_per_game'] is None
+
+
+def test_last_n_is_the_last_n_before_as_of(index):
+    record = index.head_to_head('Arsenal', 'Chelsea', as_of='2023-05-27', last_n=2)
+    # The 0-1 defeat and the 3-1 win
+    assert (record['played'], record['wins'], record['losses']) == (2, 1, 1)
+    assert (record['goals_for'], record['goals_against']) == (3, 2)
+
+    latest = index.head_to_head('Arsenal', 'Chelsea', last_n=3)
+    assert (latest['wins'], latest['losses'], latest['points_per_game']) == (1, 2, 1.0)
+    assert index.head_to_head('Arsenal', 'Chelsea', last_n=10) == index.head_to_head('Arsenal', 'Chelsea')
+
+
+def test_records_from_either_side_mirror_each_other(index):
+    arsenal = index.head_to_head('Arsenal', 'Chelsea', as_of='2023-05-01')
+    chelsea = index.head_to_head('Chelsea FC', 'Arsenal FC', as_of='2023-05-01')
+    assert (chelsea['wins'], chelsea['draws'], chelsea['losses']) == (
+        arsenal['losses'], arsenal['draws'], arsenal['wins'])
+    assert (chelsea['goals_for'], chelsea['goals_against']) == (arsenal['goals_against'], arsenal['goals_for'])
+
+    home = index.venue_record('Arsenal', 'home', as_of='2023-05-01')
+    assert (home['played'], home['points']) == (2, 4)
+    with pytest.raises(ValueError):
+        index.venue_record('Arsenal', 'neutral')
+
+
+def test_team_form_merges_home_and_away(index):
+    # Last 3 before the final meeting: D, L, W
+    assert index.team_form('Arsenal', as_of='2023-05-27', last_n=3) == pytest.approx(4 / 3)
+    assert index.team_form('Arsenal', as_of='2023-03-01') is None
+    assert index.team_form('Unknown FC') is None
+
+
+def test_loaded_index_still_skips_fixtures_it_has_counted(index, tmp_path):
+    path = str(tmp_path / 'matchup_index.json')
+    index.save(path)
+    loaded = MatchupIndex.load(path)
+    assert loaded.to_dict() == index.to_dict()
+
+    # The same fixture again, as the other source names it, is not counted twice
+    assert not loaded.add(make_match('2023-05-27T14:00:00Z', 'Arsenal FC', 'Chelsea FC', 0, 2))
+    assert loaded.add(make_match('2023-08-12T15:00:00Z', 'Arsenal', 'Chelsea', 1, 0))
+    loaded.finalize()
+
+    assert loaded.match_count == len(MEETINGS) + 1
+    assert loaded.head_to_head('Arsenal', 'Chelsea')['played'] == len(MEETINGS) + 1
+    assert loaded.head_to_head('Arsenal', 'Chelsea', as_of='2023-08-12') == index.head_to_head('Arsenal', 'Chelsea')
@@ -0,0 +1,97 @@
+"""Prometheus text exposition from MetricsRegistry and the /metrics route"""
+import pytest
+from flask import Flask
+
+from utils.metrics import CONTENT_TYPE, Gauge, MetricsRegistry, instrument
+
+
+def test_registry_renders_the_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter('upstream_requests_total', "Requests sent upstream", ['endpoint'])
+    latency = registry.histogram('predict_seconds', "Prediction time", buckets=(1.0, 0.25))
+    registry.gauge('model_reloads', "Model snapshots loaded").set(3)
+    requests.inc(endpoint='teams')
+    requests.inc(2, endpoint='matches')
+    for seconds in (0.25, 0.5, 4.0):
+        latency.observe(seconds)
+
+    assert registry.render() == '\n'.join([
+        '# HELP upstream_requests_total Requests sent upstream',
+        '# TYPE upstream_requests_total counter',
+        'upstream_requests_total{endpoint="matches"} 2',
+        'upstream_requests_total{endpoint="teams"} 1',
+        '# HELP predict_seconds Prediction time',
+        '# TYPE predict_seconds histogram',
+        # Buckets are cumulative, and an observation on a bound counts in that bucket
+        'predict_seconds_bucket{le="0.25"} 1',
+        'predict_seconds_bucket{le="1"} 2',
+        'predict_seconds_bucket{le="+Inf"} 3',
+        'predict_seconds_sum 4.75',
+        'predict_seconds_count 3',
+        '# HELP model_reloads Model snapshots loaded',
+        '# TYPE model_reloads gauge',
+        'model_reloads 3',
+    ]) + '\n'
+
+
+def test_label_values_and_help_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter('errors_total', 'Errors\nby "message"', ['message']).inc(message='bad "value"\\\n')
+
+    assert registry.render().splitlines() == [
+        '# HELP errors_total Errors\\nby \\"message\\"',
+        '# TYPE errors_total counter',
+        'errors_total{message="bad \\"value\\"\\\\\\n"} 1',
+    ]
+
+
+def test_metrics_are_declared_once_per_name():
+    registry = MetricsRegistry()
+    counter = registry.counter('hits_total', "Hits", ['cache'])
+
+    assert registry.counter('hits_total', "Hits", ['cache']) is counter
+    with pytest.raises(ValueError):
+        registry.gauge('hits_total', "Hits")
+    with pytest.raises(ValueError):
+        counter.inc(kind='memory')
+
+
+def test_collectors_are_called_on_every_scrape():
+    registry = MetricsRegistry()
+    scrapes = []
+
+    def collect():
+        scrapes.append(1)
+        gauge = Gauge('cache_entries', "Cached responses")
+        gauge.set(len(scrapes))
+        return [gauge]
+
+    registry.set_collector('cache', collect)
+    assert 'cache_entries 1\n' in registry.render()
+    assert 'cache_entries 2\n' in registry.render()
+
+    registry.set_collector('cache', lambda: [])
+    assert registry.render() == '\n'
+
+
+def test_metrics_route_times_requests_by_route_template():
+    registry = MetricsRegistry()
+    app = instrument(Flask(__name__), registry)
+
+    @app.route('/api/teams/<team>/matches')
+    def team_matches(team):
+        return {'team': team}
+
+    client = app.test_client()
+    for team in ('Arsenal', 'Chelsea'):
+        assert client.get(f'/api/teams/{team}/matches').status_code == 200
+    assert client.get('/missing').status_code == 404
+
+    response = client.get('/metrics')
+    assert response.headers['Content-Type'] == CONTENT_TYPE
+    lines = response.get_data(as_text=True).splitlines()
+    assert '# TYPE http_request_duration_seconds histogram' in lines
+    assert ('http_request_duration_seconds_count{method="GET",route="/api/teams/<team>/matches",status="200"} 2'
+            in lines)
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1' in lines
+    assert 'http_request_duration_seconds_bucket{method="GET",route="unmatched",status="404",le="+Inf"} 1' in lines
@@ -0,0 +1,98 @@
+"""ModelServer hot reload from the files on disk, and form updates from the cache log"""
+import contextlib
+import io
+import json
+import os
+
+import pytest
+
+from model_server import ModelServer
+from utils.form_cache_log import append_entries, log_path
+
+BASIC = {'home_win_rate': 0.45, 'draw_rate': 0.25, 'away_win_rate': 0.3, 'total_matches': 100}
+
+
+def team(form, points_per_game=1.5):
+    return {
+        'season_stats': {'matches': 10, 'wins': 4, 'draws': 3, 'losses': 3, 'win_rate': 0.4,
+                         'points_per_game': points_per_game},
+        'representative_form': {'score': form, 'description': 'Average form from mid-season period'},
+        'form_timeline': [],
+    }
+
+
+def write_json(path, data, mtime):
+    """Write and stamp an mtime, so a change is seen however fast the test runs"""
+    path.write_text(json.dumps(data) if not isinstance(data, str) else data)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def files(tmp_path):
+    model_file, cache_file = tmp_path / 'model.json', tmp_path / 'form_cache.json'
+    write_json(model_file, {'basic_probabilities': BASIC}, 1_000_000)
+    write_json(cache_file, {'teams': {'Arsenal': team(2.0), 'Chelsea': team(1.0)}}, 1_000_000)
+    return model_file, cache_file
+
+
+def make_server(tmp_path, model_file, cache_file):
+    return ModelServer(str(model_file), str(cache_file), ratings_file=str(tmp_path / 'elo_ratings.json'),
+                       matchups_file=str(tmp_path / 'matchup_index.json'),
+                       outcome_model_file=str(tmp_path / 'outcome_model.joblib'))
+
+
+def test_failed_reload_keeps_the_current_snapshot(tmp_path, files):
+    model_file, cache_file = files
+    server = make_server(tmp_path, model_file, cache_file)
+    snapshot = server.snapshot
+
+    write_json(model_file, '{"basic_probabilities": {', 1_000_100)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        assert not server.reload_if_changed()
+    assert server.snapshot is snapshot
+    assert server.last_error and 'keeping current model' in output.getvalue()
+    assert server.predict('Arsenal', 'Chelsea')['form']['home'] == 2.0
+
+    # The broken file is not retried until it changes again
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        assert not server.reload_if_changed()
+    assert not output.getvalue()
+
+    write_json(model_file, {'basic_probabilities': dict(BASIC, home_win_rate=0.5, away_win_rate=0.25)}, 1_000_200)
+    assert server.reload_if_changed()
+    assert server.snapshot is not snapshot and server.last_error is None
+    assert server.reloads == 2
+    assert server.snapshot.base_probs.tolist() == [0.5, 0.25, 0.25]
+
+
+def test_missing_form_cache_keeps_the_current_snapshot(tmp_path, files):
+    model_file, cache_file = files
+    server = make_server(tmp_path, model_file, cache_file)
+    snapshot = server.snapshot
+
+    os.remove(cache_file)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert not server.reload_if_changed()
+    assert server.snapshot is snapshot
+
+    write_json(cache_file, {'teams': {'Arsenal': team(0.5)}}, 1_000_300)
+    assert server.reload_if_changed()
+    assert server.snapshot.team_form('Arsenal') == 0.5
+
+
+def test_log_entries_update_form_without_a_reload(tmp_path, files):
+    model_file, cache_file = files
+    server = make_server(tmp_path, model_file, cache_file)
+    update = {name: {key: value for key, value in team(form).items() if key != 'form_timeline'}
+              for name, form in (('Chelsea', 2.5), ('Brentford', 1.2))}
+    append_entries(log_path(str(cache_file)), [{'match_id': 1, 'teams': update}])
+
+    assert not server.reload_if_changed()
+    assert server.reloads == 1
+    assert (server.snapshot.team_form('Chelsea'), server.snapshot.team_form('Brentford')) == (2.5, 1.2)
+    assert server.snapshot.team_form('Arsenal') == 2.0
+
+    # A full reload replays the same log over the cache file
+    write_json(model_file, {'basic_probabilities': BASIC}, 1_000_400)
+    assert server.reload_if_changed()
+    assert server.snapshot.team_form('Brentford') == 1.2
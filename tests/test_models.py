@@ -0,0 +1,193 @@
+"""Walk-forward backtest, Elo point-in-time ratings and the Dixon-Coles goals model"""
+import math
+
+import numpy as np
+import pytest
+
+from backtest import Backtester, matchweeks, run_grid, score_predictions
+from elo_ratings import INITIAL_RATING, EloRatings, expected_score
+from goals_model import DixonColesModel
+from utils.match_record import Match
+
+TEAMS = [f"Team {i}" for i in range(6)]
+
+
+def make_match(date, home_team, away_team, home_goals, away_goals, season='2023'):
+    winner = 'HOME_TEAM' if home_goals > away_goals else 'AWAY_TEAM' if home_goals < away_goals else 'DRAW'
+    return Match(match_id=f"{date}-{home_team}", date=date, season=season, home_team=home_team,
+                 away_team=away_team, home_id=None, away_id=None, home_goals=home_goals,
+                 away_goals=away_goals, winner=winner)
+
+
+def round_robin(rounds=10, seed=0):
+    """Every team once per matchweek (Saturdays from 2023-08-05), random scores"""
+    rng = np.random.default_rng(seed)
+    teams = list(TEAMS)
+    matches = []
+    for week in range(rounds):
+        saturday = np.datetime64('2023-08-05') + 7 * week
+        for i in range(len(teams) // 2):
+            home, away = (teams[i], teams[-1 - i]) if week % 2 else (teams[-1 - i], teams[i])
+            goals = rng.poisson([1.5, 1.1])
+            matches.append(make_match(f"{saturday}T{12 + i:02d}:00:00Z", home, away, *goals.tolist()))
+        # Circle method: keep the first team, rotate the rest
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return matches
+
+
+def reversed_result(match):
+    """Same fixture with a different outcome"""
+    if match.home_goals == match.away_goals:
+        return make_match(match.date, match.home_team, match.away_team, match.home_goals + 2, match.away_goals)
+    return make_match(match.date, match.home_team, match.away_team, match.away_goals, match.home_goals)
+
+
+@pytest.mark.parametrize('config', [
+    {'model': 'base'},
+    {'model': 'form', 'window': 3, 'bucket': 0.5},
+    {'model': 'elo', 'k_factor': 30.0, 'bucket': 25.0},
+    {'model': 'goals', 'decay': 0.0019},
+])
+def test_backtest_never_sees_its_own_matchweek(config):
+    matches = round_robin()
+    weeks = matchweeks([m.date for m in matches])
+    probs, outcomes = Backtester(matches, min_samples=1).run(config)
+    # The goals model has nothing to fit before the second week, so scores from there on
+    skipped = len(matches) - len(probs)
+    assert skipped == (3 if config['model'] == 'goals' else 0)
+
+    later_moved = False
+    for i in range(0, len(matches), 2):
+        changed = matches[:i] + [reversed_result(matches[i])] + matches[i + 1:]
+        changed_probs, changed_outcomes = Backtester(changed, min_samples=1).run(config)
+        assert (changed_outcomes != outcomes).sum() == (i >= skipped)
+        # Nothing up to and including the changed match's matchweek may move
+        known = weeks[skipped:] <= weeks[i]
+        np.testing.assert_array_equal(changed_probs[known], probs[known])
+        later_moved |= not np.array_equal(changed_probs[~known], probs[~known])
+    # ...while later weeks do learn from it
+    assert later_moved
+
+
+def test_matchweeks_run_tuesday_to_monday():
+    weeks = matchweeks(['2023-08-11T19:00:00Z', '2023-08-12T14:00:00Z', '2023-08-14T19:00:00Z',
+                        '2023-08-15T19:45:00Z'])
+    assert weeks[0] == weeks[1] == weeks[2] != weeks[3]
+
+
+def test_score_predictions_known_values():
+    probs = np.array([[0.5, 0.3, 0.2], [0.2, 0.5, 0.3]])
+    scores = score_predictions(probs, np.array([0, 2]))
+
+    assert scores['matches'] == 2
+    assert scores['log_loss'] == pytest.approx(-(math.log(0.5) + math.log(0.3)) / 2)
+    assert scores['brier'] == pytest.approx(((0.25 + 0.09 + 0.04) + (0.04 + 0.25 + 0.49)) / 2)
+    assert scores['accuracy'] == 0.5
+    assert score_predictions(np.empty((0, 3)), np.empty(0, dtype=np.int64)) == {'matches': 0}
+
+
+def test_base_rates_backtest_known_scores():
+    # 2022 trains (H, D, A, H), 2023 is scored
+    history = [
+        make_match('2022-08-06T15:00:00Z', 'A', 'B', 2, 0, '2022'),
+        make_match('2022-08-06T17:30:00Z', 'C', 'D', 1, 1, '2022'),
+        make_match('2022-08-13T15:00:00Z', 'A', 'C', 0, 1, '2022'),
+        make_match('2022-08-13T17:30:00Z', 'B', 'D', 3, 1, '2022'),
+        make_match('2023-08-12T15:00:00Z', 'D', 'A', 2, 1, '2023'),
+        make_match('2023-08-12T17:30:00Z', 'B', 'C', 0, 0, '2023'),
+        make_match('2023-08-19T15:00:00Z', 'C', 'A', 0, 2, '2023'),
+        make_match('2023-08-19T17:30:00Z', 'D', 'B', 1, 0, '2023'),
+    ]
+    probs, outcomes = Backtester(history).run({'model': 'base'}, season='2023')
+
+    # The first 2023 week knows 2022 only, the second also knows the first week (H, D)
+    expected = np.array([[2, 1, 1], [2, 1, 1], [3, 2, 1], [3, 2, 1]]) / np.array([[4], [4], [6], [6]])
+    np.testing.assert_allclose(probs, expected)
+    np.testing.assert_array_equal(outcomes, [0, 1, 2, 0])
+
+    result, = run_grid(history, [{'model': 'base'}], test_seasons=['2023'], workers=1)
+    assert result['matches'] == 4
+    assert result['log_loss'] == pytest.approx(-(math.log(1 / 2) + math.log(1 / 4) +
+                                                 math.log(1 / 6) + math.log(1 / 2)) / 4)
+    assert result['brier'] == pytest.approx((0.375 + 0.875 + (1 / 4 + 1 / 9 + 25 / 36) +
+                                             (1 / 4 + 1 / 9 + 1 / 36)) / 4)
+    assert result['accuracy'] == 0.5
+    assert result['folds']['2023']['log_loss'] == pytest.approx(result['log_loss'])
+
+
+def test_rating_as_of_is_the_rating_before_each_match():
+    elo = EloRatings(k_factor=20.0, home_advantage=60.0)
+    matches = round_robin()
+    before = [elo.update(match) for match in matches]
+
+    seen = set()
+    for match, (home_rating, away_rating) in zip(matches, before):
+        for team, rating in ((match.home_team, home_rating), (match.away_team, away_rating)):
+            expected = rating if team in seen else None
+            assert elo.rating_as_of(team, match.date) == expected
+            seen.add(team)
+
+    last = matches[-1]
+    assert elo.rating_as_of(last.home_team, '2030-01-01') == elo.rating(last.home_team)
+    assert elo.rating_as_of('Unknown FC', '2030-01-01') is None
+
+
+def test_rating_as_of_steps_at_kick_off_and_season_start():
+    elo = EloRatings(k_factor=20.0, home_advantage=0.0, season_carryover=0.5)
+    elo.update(make_match('2023-05-20T15:00:00Z', 'Arsenal', 'Chelsea', 1, 0, '2022'))
+    change = 20.0 * (1 - expected_score(0.0))
+
+    assert elo.rating_as_of('Arsenal', '2023-05-20T15:00:00Z') is None
+    assert elo.rating_as_of('Arsenal', '2023-05-20T15:00:01Z') == pytest.approx(INITIAL_RATING + change)
+    # 'Arsenal FC' is the same team as 'Arsenal'
+    assert elo.rating_as_of('Arsenal FC', '2023-06-01') == pytest.approx(INITIAL_RATING + change)
+
+    elo.update(make_match('2023-08-12T15:00:00Z', 'Chelsea', 'Arsenal', 0, 0, '2023'))
+    # Regressed halfway back to the mean before the first kick-off of the season
+    assert elo.rating_as_of('Arsenal', '2023-08-12T15:00:00Z') == pytest.approx(INITIAL_RATING + change / 2)
+    assert elo.rating_as_of('Arsenal', '2023-08-12') == pytest.approx(INITIAL_RATING + change)
+    assert elo.ratings_as_of('2023-08-12T15:00:00Z') == pytest.approx(
+        {'Arsenal': INITIAL_RATING + change / 2, 'Chelsea': INITIAL_RATING - change / 2})
+
+
+def test_dixon_coles_fit_recovers_parameters():
+    rng = np.random.default_rng(1)
+    teams = [f"Team {i}" for i in range(8)]
+    truth = DixonColesModel(decay=0.0)
+    for team in teams:
+        truth.intern(team)
+    truth.attack = np.linspace(-0.35, 0.35, len(teams))
+    truth.defence = rng.uniform(-0.3, 0.3, len(teams))
+    truth.home_advantage, truth.rho = 0.3, -0.1
+
+    fixtures = [(home, away) for home in teams for away in teams if home != away] * 60
+    matrices = truth.score_matrices([h for h, _ in fixtures], [a for _, a in fixtures])
+    size = matrices.shape[1]
+    cells = np.array([rng.choice(size * size, p=m.ravel() / m.sum()) for m in matrices])
+    start = np.datetime64('2015-08-01')
+    matches = [make_match(f"{start + i // 28}T15:00:00Z", home, away, int(cell // size), int(cell % size))
+               for i, ((home, away), cell) in enumerate(zip(fixtures, cells))]
+
+    model = DixonColesModel(decay=0.0).fit(matches)
+
+    assert model.metadata['converged']
+    assert model.metadata['matches'] == len(matches)
+    assert model.home_advantage == pytest.approx(truth.home_advantage, abs=0.05)
+    assert model.rho == pytest.approx(truth.rho, abs=0.06)
+    order = [model.team_id(team) for team in teams]
+    np.testing.assert_allclose(model.attack[order], truth.attack, atol=0.08)
+    np.testing.assert_allclose(model.defence[order], truth.defence, atol=0.08)
+    # Attack strengths are centred on zero
+    assert model.attack.mean() == pytest.approx(0.0, abs=1e-9)
+
+
+def test_dixon_coles_fit_ignores_matches_from_as_of():
+    matches = round_robin()
+    cutoff = matches[len(matches) // 2].date
+    model = DixonColesModel().fit(matches, as_of=cutoff)
+    earlier = DixonColesModel().fit([m for m in matches if m.date < cutoff], as_of=cutoff)
+
+    assert model.metadata['matches'] == len(matches) // 2
+    assert model.home_advantage == pytest.approx(earlier.home_advantage)
+    with pytest.raises(ValueError):
+        DixonColesModel().fit(matches, as_of=matches[0].date)
@@ -0,0 +1,107 @@
+"""Outcome model artifacts and the features it is trained and served on"""
+import contextlib
+import io
+import json
+
+import numpy as np
+import pytest
+
+from model_server import ModelServer
+from prediction_model import FEATURES, OutcomeModel, load_outcome_model, matchup_features, train, training_set
+from probability_analyzer import ProbabilityAnalyzer
+from utils.match_record import OUTCOME_CODES, Match
+from synthetic import espn_seasons
+
+AFTER_HISTORY = '2100-01-01'
+
+
+@pytest.fixture(scope='module')
+def analyzer():
+    matches = [Match.from_espn(m) for m in espn_seasons(3, n_teams=8)]
+    # The analyzer reports its missing form cache, which doesn't matter here
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ProbabilityAnalyzer(matches)
+
+
+@pytest.fixture(scope='module')
+def trained(analyzer):
+    X, y, _ = training_set(analyzer)
+    pipeline, metrics = train(X, y, folds=3, n_jobs=1)
+    return OutcomeModel(pipeline, 'logistic', metrics, '2024-01-01T00:00:00Z'), X, y
+
+
+def test_training_form_is_last_five_points_per_game(analyzer):
+    X, _, dates = training_set(analyzer)
+    matches = sorted((m for m in analyzer.matches if m.winner in OUTCOME_CODES), key=lambda m: m.date)
+
+    for row, match, date in zip(X, matches, dates):
+        for value, team in ((row[0], match.home_team), (row[1], match.away_team)):
+            expected = analyzer.calculate_team_form(team, date)
+            assert (np.isnan(value) if expected is None else value == pytest.approx(expected))
+
+
+def test_folded_probabilities_match_the_pipeline(trained):
+    model, X, _ = trained
+    with_missing = X.copy()
+    with_missing[::7, [0, 5]] = np.nan
+
+    np.testing.assert_allclose(model.predict_proba(with_missing), model.pipeline.predict_proba(with_missing))
+    np.testing.assert_allclose(model.predict_proba(with_missing).sum(axis=1), 1.0)
+
+
+@pytest.mark.parametrize('kind', ['logistic', 'boosting'])
+def test_saved_model_loads_with_the_same_predictions(trained, tmp_path, kind):
+    model, X, y = trained
+    if kind == 'boosting':
+        pipeline, metrics = train(X, y, 'boosting', folds=2, n_jobs=1)
+        model = OutcomeModel(pipeline, kind, metrics)
+    path = str(tmp_path / 'outcome_model.joblib')
+    model.save(path)
+
+    loaded = OutcomeModel.load(path)
+
+    assert (loaded.kind, loaded.metrics, loaded.trained_at) == (model.kind, model.metrics, model.trained_at)
+    np.testing.assert_array_equal(loaded.predict_proba(X), model.predict_proba(X))
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+@pytest.mark.parametrize('field, value', [('version', 0), ('features', list(FEATURES[:-1])),
+                                          ('sklearn_version', '0.0.1')])
+def test_mismatched_artifact_is_refused(trained, tmp_path, field, value):
+    import joblib
+
+    path = str(tmp_path / 'outcome_model.joblib')
+    trained[0].save(path)
+    artifact = joblib.load(path)
+    artifact[field] = value
+    joblib.dump(artifact, path)
+
+    with pytest.raises(ValueError):
+        OutcomeModel.load(path)
+    # The server goes on without the classifier rather than failing
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert load_outcome_model(path) is None
+
+
+def test_server_scores_fixtures_on_the_training_features(analyzer, trained, tmp_path):
+    model = trained[0]
+    model_file, cache_file = tmp_path / 'model.json', tmp_path / 'form_cache.json'
+    model_file.write_text(json.dumps({'basic_probabilities': {
+        'home_win_rate': 0.45, 'draw_rate': 0.25, 'away_win_rate': 0.3, 'total_matches': 100}}))
+    cache_file.write_text(json.dumps({'teams': {}}))
+    analyzer.matchups.save(str(tmp_path / 'matchups.json'))
+    model.save(str(tmp_path / 'outcome_model.joblib'))
+    server = ModelServer(str(model_file), str(cache_file), ratings_file=str(tmp_path / 'elo_ratings.json'),
+                         matchups_file=str(tmp_path / 'matchups.json'),
+                         outcome_model_file=str(tmp_path / 'outcome_model.joblib'))
+
+    teams = sorted({m.home_team for m in analyzer.matches})
+    home_teams, away_teams = teams[:-1] + ['Unknown FC'], teams[1:] + [teams[0]]
+    served = server.predict_arrays(home_teams, away_teams)['model_probs']
+
+    # What training_set() would compute for these fixtures after the last match, without ratings
+    form = [[analyzer.calculate_team_form(team, AFTER_HISTORY) for team in pair]
+            for pair in zip(home_teams, away_teams)]
+    expected = np.column_stack([np.array(form, dtype=np.float64), np.full((len(teams), 3), np.nan),
+                                matchup_features(analyzer.matchups, home_teams, away_teams, AFTER_HISTORY)])
+    np.testing.assert_allclose(served, model.predict_proba(expected))
@@ -0,0 +1,90 @@
+"""Services built in a server's master process and used again in a forked worker"""
+import json
+import os
+
+import pytest
+
+from app import Services
+from database import MatchDatabase
+from model_server import ModelServer
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork")
+
+
+@pytest.fixture
+def services(tmp_path):
+    model_file, cache_file = tmp_path / 'model.json', tmp_path / 'form_cache.json'
+    model_file.write_text(json.dumps({'basic_probabilities': {
+        'home_win_rate': 0.45, 'draw_rate': 0.25, 'away_win_rate': 0.3, 'total_matches': 100}}))
+    cache_file.write_text(json.dumps({'teams': {}}))
+
+    built = Services({})
+    # What warm_up() leaves behind in the master
+    built.built['football_api'] = object()
+    built.built['model_server'] = ModelServer(
+        str(model_file), str(cache_file), ratings_file=str(tmp_path / 'elo_ratings.json'),
+        matchups_file=str(tmp_path / 'matchup_index.json'),
+        outcome_model_file=str(tmp_path / 'outcome_model.joblib'), poll_interval=0.05).start()
+    built.built['match_db'] = MatchDatabase(f"sqlite:///{tmp_path / 'matches.db'}", pool_size=2)
+    yield built
+    built.built['model_server'].stop()
+    built.built['match_db'].engine.dispose()
+
+
+def in_child(check):
+    """Run check() in a forked child and return what it returns, as JSON through a pipe"""
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        try:
+            result = {'result': check()}
+        except BaseException as e:
+            result = {'error': repr(e)}
+        with os.fdopen(write_end, 'w') as f:
+            json.dump(result, f)
+        os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end) as f:
+        output = f.read()
+    os.waitpid(pid, 0)
+    result = json.loads(output)
+    assert 'error' not in result, result.get('error')
+    return result['result']
+
+
+def test_after_fork_restarts_the_watcher_and_drops_inherited_clients(services):
+    database = services.built['match_db']
+    # A pooled connection the master has already used
+    assert database.match_count() == 0
+    parent_pool = database.engine.pool
+
+    def check():
+        server = services.built['model_server']
+        inherited = server.watcher
+        alive_before = inherited.is_alive()
+        services.after_fork()
+        return {
+            'alive_before': alive_before,
+            'alive_after': server.watcher.is_alive(),
+            'new_watcher': server.watcher is not inherited,
+            'api_rebuilt': 'football_api' not in services.built,
+            'new_pool': database.engine.pool is not parent_pool,
+            'match_count': database.match_count(),
+        }
+
+    # Threads don't survive fork(), after_fork() starts the watcher again
+    assert in_child(check) == {'alive_before': False, 'alive_after': True, 'new_watcher': True,
+                               'api_rebuilt': True, 'new_pool': True, 'match_count': 0}
+
+    # The child left the master's pool and watcher alone
+    assert database.engine.pool is parent_pool
+    assert database.match_count() == 0
+    assert services.built['model_server'].watcher.is_alive()
+    assert 'football_api' in services.built
+
+
+def test_after_fork_with_nothing_built_builds_nothing():
+    services = Services({})
+    services.after_fork()
+    assert services.built == {}